@@ -0,0 +1,112 @@
+"""
+Gráfico de abanico: intervalos de predicción por simulación (bootstrap de residuos).
+
+La banda de conf_int() supone innovaciones normales. Aquí se simulan
+N_TRAYECTORIAS futuros del ARMA ajustado remuestreando sus propios residuos:
+
+    x_{n+h} = Σ φ_i x_{n+h-i} + ε_{n+h} + Σ θ_j ε_{n+h-j},   x = y - μ
+
+Todas las trayectorias salen de una sola llamada a lfilter sobre la matriz
+de innovaciones (trayectorias × horizonte), con el estado inicial de cada
+fila armado con lfiltic a partir de las últimas observaciones y residuos.
+El generador usa una semilla fija, así que la misma versión del modelo
+produce siempre las mismas trayectorias; los cuantiles se calculan aparte
+sobre ellas y cambiarlos no vuelve a simular.
+
+scipy se importa al simular, como el resto del stack de modelado.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from almacen import ROMANOS
+
+N_TRAYECTORIAS = 5000
+HORIZONTE_MAXIMO = 12
+SEMILLA = 20240601
+# Cobertura central (%) de cada banda del abanico
+NIVELES = (50, 80, 95)
+NIVELES_DISPONIBLES = (50, 60, 70, 80, 90, 95, 99)
+
+# '2024-IV' (archivo principal), '2024 IV' (libros por área) o '2024' (anual)
+_PERIODO = re.compile(r"^(\d{4})(?:([-\s]+)(I|II|III|IV))?$")
+
+
+@dataclass(frozen=True)
+class Simulacion:
+    trayectorias: np.ndarray   # (N_TRAYECTORIAS × horizonte), en unidades de la serie
+    semilla: int
+
+    @property
+    def horizonte(self):
+        return self.trayectorias.shape[1]
+
+    def mediana(self, horizonte=None):
+        return np.median(self.trayectorias[:, :horizonte], axis=0)
+
+    def bandas(self, niveles=NIVELES, horizonte=None):
+        """
+        Límites de cada banda central
+
+        Returns:
+            dict {nivel: (inferior, superior)}, arreglos de largo `horizonte`
+        """
+        niveles = sorted(niveles)
+        probabilidades = [p for nivel in niveles for p in (0.5 - nivel / 200, 0.5 + nivel / 200)]
+        cuantiles = np.quantile(self.trayectorias[:, :horizonte], probabilidades, axis=0)
+        return {nivel: (cuantiles[2 * i], cuantiles[2 * i + 1]) for i, nivel in enumerate(niveles)}
+
+
+def simular(res, serie, horizonte=HORIZONTE_MAXIMO, n_trayectorias=N_TRAYECTORIAS, semilla=SEMILLA):
+    """
+    Trayectorias futuras del ARMA ajustado con residuos remuestreados
+
+    Args:
+        res: Ajuste ARMA sin diferencias (ARIMAResults o arma11.ResultadoARMA11)
+        serie: Serie usada en el ajuste (pandas Series)
+
+    Returns:
+        Simulacion
+    """
+    from scipy.signal import lfilter, lfiltic
+
+    if res.model.order[1] != 0:
+        raise ValueError("El abanico por bootstrap solo está implementado para modelos sin diferencias (d = 0)")
+
+    phi = np.asarray(res.arparams, dtype=float)
+    theta = np.asarray(res.maparams, dtype=float)
+    mu = float(np.asarray(res.params)[0]) if "const" in getattr(res, "param_names", ()) else 0.0
+
+    x = serie.to_numpy(dtype=float) - mu
+    resid = np.asarray(res.resid, dtype=float)
+    # Los primeros residuos arrastran la inicialización del filtro: no se remuestrean
+    pozo = resid[max(len(phi), len(theta), 1):]
+    pozo = pozo[np.isfinite(pozo)]
+    pozo = pozo - pozo.mean()
+
+    b = np.r_[1.0, theta]
+    a = np.r_[1.0, -phi]
+    zi = lfiltic(b, a, x[::-1][:len(phi)], resid[::-1][:len(theta)])
+
+    rng = np.random.default_rng(semilla)
+    innovaciones = rng.choice(pozo, size=(n_trayectorias, horizonte), replace=True)
+    trayectorias, _ = lfilter(b, a, innovaciones, axis=1, zi=np.tile(zi, (n_trayectorias, 1)))
+    return Simulacion(trayectorias=trayectorias + mu, semilla=semilla)
+
+
+def periodos_siguientes(ultimo, pasos):
+    """Etiquetas de los `pasos` periodos siguientes a `ultimo`, en su mismo formato"""
+    coincidencia = _PERIODO.match(str(ultimo).strip())
+    if coincidencia is None:
+        return [f"t+{paso}" for paso in range(1, pasos + 1)]
+    anio, separador, romano = coincidencia.groups()
+    anio = int(anio)
+    if romano is None:
+        return [str(anio + paso) for paso in range(1, pasos + 1)]
+    trimestre = ROMANOS.index(romano)
+    etiquetas = []
+    for _ in range(pasos):
+        anio, trimestre = (anio + 1, 0) if trimestre == 3 else (anio, trimestre + 1)
+        etiquetas.append(f"{anio}{separador}{ROMANOS[trimestre]}")
+    return etiquetas
@@ -0,0 +1,325 @@
+"""
+Almacén largo de los índices por área (Departamentos y Obras).
+
+Las hojas de esos libros son anchas: una fila por ciudad o área y una
+columna por periodo, y las vistas buscaban "el último periodo" revisando los
+dtypes del DataFrame en cada rerun. Aquí todas las hojas de un libro se
+convierten una sola vez en una tabla larga
+
+    Periodo (PeriodIndex ordenado) × Tipo × Área → Valor
+
+con Tipo y Área categóricas y Valor en float32. Como la tabla queda ordenada
+por (Periodo, Tipo, Área), cada corte (tipo, periodo) es un bloque contiguo
+cuya posición se calcula al construir el almacén: el último periodo y la
+comparación entre ciudades de un periodo son búsquedas O(1) en un dict, y
+los rangos de tiempo se resuelven por búsqueda binaria sobre el índice.
+
+Al construirlo también se calculan, en una sola pasada vectorizada sobre
+esos bloques (np.ufunc.reduceat), las estadísticas de cada corte (máximo,
+mínimo y sus áreas, media, desviación, suma) y el ranking descendente de
+áreas: las tarjetas de métricas y los top-N de las vistas son consultas.
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Encabezados de periodo: 2024 (anual) o '2025 I' (trimestral)
+_PERIODO_ANUAL = re.compile(r"^(\d{4})$")
+_PERIODO_TRIMESTRAL = re.compile(r"^(\d{4})\s+(I|II|III|IV)$")
+ROMANOS = ("I", "II", "III", "IV")
+
+
+def periodo_de_encabezado(encabezado):
+    """
+    Convierte el encabezado de una columna en un pd.Period
+
+    Returns:
+        pd.Period anual o trimestral, o None si la columna no es un periodo
+    """
+    texto = " ".join(str(encabezado).split())
+    coincidencia = _PERIODO_ANUAL.match(texto)
+    if coincidencia:
+        return pd.Period(year=int(coincidencia.group(1)), freq="Y")
+    coincidencia = _PERIODO_TRIMESTRAL.match(texto)
+    if coincidencia:
+        return pd.Period(year=int(coincidencia.group(1)),
+                         quarter=ROMANOS.index(coincidencia.group(2)) + 1, freq="Q")
+    return None
+
+
+def etiqueta_periodo(periodo):
+    """Texto del periodo como lo escribe el DANE ('2025', '2025 II')"""
+    if periodo.freqstr.startswith("Q"):
+        return f"{periodo.year} {ROMANOS[periodo.quarter - 1]}"
+    return str(periodo.year)
+
+
+# ------------------------------------------------
+# 📊 RESUMEN POR CORTE
+# ------------------------------------------------
+COLUMNAS_RESUMEN = ("areas", "validos", "suma", "media", "desv", "maximo", "area_maximo", "minimo", "area_minimo")
+
+
+@dataclass(frozen=True)
+class Resumen:
+    """Estadísticas de un corte; los NaN (sin dato publicado) no cuentan"""
+    areas: int          # áreas del corte, con o sin dato
+    validos: int        # áreas con dato
+    suma: float
+    media: float
+    desv: float         # desviación estándar muestral (ddof=1, como pandas)
+    maximo: float
+    area_maximo: str
+    minimo: float
+    area_minimo: str
+
+
+@dataclass(frozen=True)
+class Corte:
+    """Valores de todas las áreas para un tipo y periodo, con su resumen y ranking"""
+    tipo: str
+    periodo: pd.Period
+    valores: pd.Series   # Área → valor, en el orden del almacén
+    resumen: Resumen
+    ranking: pd.Series   # Área → valor de mayor a menor, sin NaN
+
+
+def _resumir_bloques(valores, inicios, fines):
+    """
+    Estadísticas de todos los bloques contiguos [inicio, fin) en una pasada
+
+    Returns:
+        (dict de arreglos por estadística, posiciones del máximo y del mínimo,
+        orden que deja cada bloque de mayor a menor con los NaN al final)
+    """
+    v = valores.astype(np.float64)  # acumular en float64 como pandas
+    largos = fines - inicios
+    bloque = np.repeat(np.arange(len(inicios)), largos)
+    posiciones = np.arange(len(v))
+    validos = ~np.isnan(v)
+
+    n = np.add.reduceat(validos.astype(np.int64), inicios)
+    suma = np.add.reduceat(np.where(validos, v, 0.0), inicios)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = np.where(n > 0, suma / n, np.nan)
+        desvios = np.where(validos, v - media[bloque], 0.0)
+        desv = np.where(n > 1, np.sqrt(np.add.reduceat(desvios ** 2, inicios) / (n - 1)), np.nan)
+
+    maximo = np.maximum.reduceat(np.where(validos, v, -np.inf), inicios)
+    minimo = np.minimum.reduceat(np.where(validos, v, np.inf), inicios)
+    # Primera posición que alcanza el extremo (como idxmax/idxmin)
+    pos_maximo = np.minimum.reduceat(np.where(validos & (v == maximo[bloque]), posiciones, len(v)), inicios)
+    pos_minimo = np.minimum.reduceat(np.where(validos & (v == minimo[bloque]), posiciones, len(v)), inicios)
+
+    # -NaN sigue siendo NaN y lexsort deja los NaN al final; es estable, así
+    # los empates conservan el orden del almacén (como nlargest)
+    orden = np.lexsort((-v, bloque))
+
+    estadisticas = {
+        "areas": largos,
+        "validos": n,
+        "suma": suma,
+        "media": media,
+        "desv": desv,
+        "maximo": np.where(n > 0, maximo, np.nan),
+        "minimo": np.where(n > 0, minimo, np.nan),
+    }
+    return estadisticas, pos_maximo, pos_minimo, orden
+
+
+# ------------------------------------------------
+# 📦 ALMACÉN
+# ------------------------------------------------
+class AlmacenIndices:
+    """
+    Tabla larga de un libro, con los cortes (tipo, periodo) precalculados
+
+    Args:
+        tabla: DataFrame con índice PeriodIndex 'Periodo' y columnas Área y
+            Tipo (categóricas) y Valor (float32); se ordena si hace falta
+    """
+
+    def __init__(self, tabla):
+        orden = np.lexsort((
+            tabla["Área"].cat.codes.to_numpy(),
+            tabla["Tipo"].cat.codes.to_numpy(),
+            tabla.index.asi8,
+        ))
+        if not (orden == np.arange(len(orden))).all():
+            tabla = tabla.iloc[orden]
+        self.tabla = tabla
+
+        # Bloques contiguos de cada (tipo, periodo): [inicio, fin)
+        ordinales = tabla.index.asi8
+        codigos_tipo = tabla["Tipo"].cat.codes.to_numpy()
+        cambios = np.flatnonzero((np.diff(ordinales) != 0) | (np.diff(codigos_tipo) != 0)) + 1
+        inicios = np.concatenate(([0], cambios)) if len(tabla) else np.array([], dtype=int)
+        fines = np.concatenate((cambios, [len(tabla)])) if len(tabla) else np.array([], dtype=int)
+
+        self._bloques = {}
+        self._ultimo = {}
+        categorias_tipo = tabla["Tipo"].cat.categories
+        for inicio, fin in zip(inicios, fines):
+            tipo = categorias_tipo[codigos_tipo[inicio]]
+            periodo = tabla.index[inicio]
+            self._bloques[(tipo, periodo)] = slice(int(inicio), int(fin))
+            self._ultimo[tipo] = periodo  # los bloques vienen en orden de periodo
+
+        self._resumir(inicios, fines)
+
+    def _resumir(self, inicios, fines):
+        """Tabla de resumen (Tipo, Periodo) → estadísticas y ranking de cada corte"""
+        claves = list(self._bloques)
+        indice = pd.MultiIndex.from_tuples(claves, names=["Tipo", "Periodo"]) if claves else None
+        if not claves:
+            self.resumen = pd.DataFrame(columns=list(COLUMNAS_RESUMEN))
+            self._orden = np.array([], dtype=np.int64)
+            return
+
+        estadisticas, pos_maximo, pos_minimo, self._orden = _resumir_bloques(
+            self.tabla["Valor"].to_numpy(), inicios, fines
+        )
+        areas = self.tabla["Área"].array
+        # Sin dato en todo el bloque la posición es len(tabla): se deja vacío
+        nombres = np.append(areas.categories.take(areas.codes).to_numpy(dtype=object), None)
+        self.resumen = pd.DataFrame(
+            {**estadisticas, "area_maximo": nombres[pos_maximo], "area_minimo": nombres[pos_minimo]},
+            index=indice,
+        )[list(COLUMNAS_RESUMEN)]
+
+    @classmethod
+    def desde_libro(cls, libro):
+        """
+        Construye el almacén a partir de las hojas anchas de un libro
+
+        Args:
+            libro: dict {hoja: DataFrame}; el nombre de la hoja es el tipo de
+                vivienda, la primera columna el área y las columnas cuyo
+                encabezado es un periodo, los valores
+
+        Raises:
+            ValueError: si no hay columnas de periodo o mezclan frecuencias
+        """
+        tipos, areas, ordinales, valores = [], [], [], []
+        frecuencia = None
+
+        for hoja, df in libro.items():
+            columnas = [(c, periodo_de_encabezado(c)) for c in df.columns[1:]]
+            columnas = [(c, p) for c, p in columnas if p is not None]
+            if not columnas:
+                continue
+            for _, periodo in columnas:
+                if frecuencia is None:
+                    frecuencia = periodo.freqstr
+                elif periodo.freqstr != frecuencia:
+                    raise ValueError(f"La hoja '{hoja}' mezcla periodos {frecuencia} y {periodo.freqstr}")
+
+            nombres = df.iloc[:, 0]
+            filas = nombres.notna().to_numpy()
+            nombres = nombres[filas].astype(str).str.strip().to_numpy()
+            matriz = (df.loc[filas, [c for c, _ in columnas]]
+                      .apply(pd.to_numeric, errors="coerce")
+                      .to_numpy(dtype=np.float32))
+
+            n_areas, n_periodos = matriz.shape
+            tipos.append(np.full(n_areas * n_periodos, " ".join(str(hoja).split()), dtype=object))
+            areas.append(np.repeat(nombres, n_periodos))
+            ordinales.append(np.tile([p.ordinal for _, p in columnas], n_areas))
+            valores.append(matriz.ravel())
+
+        if frecuencia is None:
+            raise ValueError("Ninguna hoja tiene columnas de periodo")
+
+        areas = np.concatenate(areas)
+        tipos = np.concatenate(tipos)
+        tabla = pd.DataFrame(
+            {
+                "Área": pd.Categorical(areas, categories=pd.unique(areas)),
+                "Tipo": pd.Categorical(tipos, categories=pd.unique(tipos)),
+                "Valor": np.concatenate(valores),
+            },
+            index=pd.PeriodIndex.from_ordinals(np.concatenate(ordinales), freq=frecuencia, name="Periodo"),
+        )
+        return cls(tabla)
+
+    # --------------------------------------------
+    # 🔎 CONSULTAS
+    # --------------------------------------------
+    @property
+    def tipos(self):
+        return tuple(self._ultimo)
+
+    def periodos(self, tipo=None):
+        """Periodos disponibles (PeriodIndex ordenado)"""
+        periodos = {p for t, p in self._bloques if tipo is None or t == tipo}
+        return pd.PeriodIndex(sorted(periodos), freq=self.tabla.index.freq, name="Periodo")
+
+    def ultimo_periodo(self, tipo):
+        """Último periodo con datos del tipo, o None si el tipo no existe"""
+        return self._ultimo.get(tipo)
+
+    def corte(self, tipo, periodo=None):
+        """
+        Valores de todas las áreas para un tipo y periodo (por defecto el último)
+
+        Returns:
+            Series float32 indexada por Área y nombrada con el periodo, o None
+            si no hay datos para ese tipo y periodo
+        """
+        if periodo is None:
+            periodo = self.ultimo_periodo(tipo)
+        bloque = self._bloques.get((tipo, periodo))
+        if bloque is None:
+            return None
+        areas = self.tabla["Área"].array[bloque]
+        return pd.Series(
+            self.tabla["Valor"].to_numpy()[bloque],
+            index=pd.Index(areas.categories.take(areas.codes), name="Área"),
+            name=periodo,
+        )
+
+    def consultar(self, tipo, periodo=None):
+        """
+        Corte con su resumen y ranking ya calculados (por defecto, el último periodo)
+
+        Returns:
+            Corte, o None si no hay datos para ese tipo y periodo
+        """
+        if periodo is None:
+            periodo = self.ultimo_periodo(tipo)
+        valores = self.corte(tipo, periodo)
+        if valores is None:
+            return None
+
+        fila = self.resumen.loc[(tipo, periodo)]
+        resumen = Resumen(**{
+            c: (int(fila[c]) if c in ("areas", "validos") else fila[c] if c.startswith("area_") else float(fila[c]))
+            for c in COLUMNAS_RESUMEN
+        })
+
+        bloque = self._bloques[(tipo, periodo)]
+        orden = self._orden[bloque.start:bloque.start + resumen.validos]
+        areas = self.tabla["Área"].array
+        ranking = pd.Series(
+            self.tabla["Valor"].to_numpy()[orden],
+            index=pd.Index(areas.categories.take(areas.codes[orden]), name="Área"),
+            name=periodo,
+        )
+        return Corte(tipo=tipo, periodo=periodo, valores=valores, resumen=resumen, ranking=ranking)
+
+    def rebanada(self, desde=None, hasta=None, tipo=None):
+        """Filas entre dos periodos (inclusive), por búsqueda binaria sobre el índice"""
+        tabla = self.tabla.loc[desde:hasta]
+        if tipo is not None:
+            tabla = tabla[tabla["Tipo"] == tipo]
+        return tabla
+
+    def ancho(self, tipo):
+        """Tabla Área × Periodo de un tipo, para comparar ciudades entre periodos"""
+        return pd.DataFrame({p: self.corte(tipo, p) for p in self.periodos(tipo)})
+
+    def memoria(self):
+        """Bytes que ocupa la tabla (memory_usage con deep=True, incluido el índice)"""
+        return int(self.tabla.memory_usage(deep=True, index=True).sum())
@@ -3,16 +3,26 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from statsmodels.tsa.stattools import adfuller
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.graphics.tsaplots import plot_acf, plot_pacf
-from statsmodels.stats.diagnostic import acorr_ljungbox, het_arch
-from statsmodels.stats.stattools import jarque_bera
-import statsmodels.api as sm
-from sklearn.metrics import mean_squared_error, mean_absolute_error
 import os
 
+import almacen
+import configuracion
+import datos
+import ipvn
+import memoria_compartida
+import recarga
+import modelos
+import graficos
+import seleccion_orden
+import backtest
+import abanico
+import pronosticos
+import estacional
+
+# El stack de modelado (statsmodels, scipy, scikit-learn) se importa solo al
+# entrar en "Total y Modelo": modelos lo carga al ajustar y diagnosticos se
+# importa dentro de diagnosticos_arma(). Ver benchmark_importaciones.py.
+
 # ------------------------------------------------
 # ⚙ CONFIG BÁSICA
 # ------------------------------------------------
@@ -20,75 +30,32 @@ st.set_page_config(page_title="🏡 Vivienda Nueva en Colombia", layout="wide")
 st.title("🏡 Índice de precios de la Vivienda Nueva en Colombia con base en los datos del DANE")
 
 # ------------------------------------------------
-# 📂 CONFIGURACIÓN DE RUTAS DINÁMICAS (Local + GitHub) - VERSIÓN CORREGIDA
+# 📂 CONFIGURACIÓN DE RUTAS (entorno, archivo de configuración o sondeo)
 # ------------------------------------------------
-
-def obtener_ruta_base():
-    """
-    Detecta automáticamente si está corriendo en local o en Streamlit Cloud
-    y retorna la ruta base apropiada para los archivos Excel
+@st.cache_resource(show_spinner=False)
+def gestor_configuracion():
     """
-    # Ruta local (Windows) - Tu carpeta original
-    ruta_local = r"C:\Users\Usuario\Desktop\Clases\6 semestre\Econometria II\Dashboard"
-    
-    # Verificar si existe la ruta local (para desarrollo en VS Code)
-    if os.path.exists(ruta_local):
-        print("✅ Ejecutando en LOCAL - Usando ruta de Windows")
-        return ruta_local
-    
-    # Para Streamlit Cloud: Probar múltiples ubicaciones
-    posibles_rutas = [
-        "Dashboard_github",
-        os.path.join(os.getcwd(), "Dashboard_github"),
-        ".",
-    ]
-    
-    # Archivos que buscamos
-    archivos_requeridos = [
-        "Datos vivienda filtrado.xlsx",
-        "Indice Vivienda Departamentos.xlsx",
-        "Indice Vivienda Obras.xlsx"
-    ]
+    Resuelve la ruta de datos UNA SOLA VEZ por proceso (ver configuracion.py)
     
-    for ruta in posibles_rutas:
-        if os.path.exists(ruta):
-            # Verificar si los archivos existen en esta ruta
-            archivos_encontrados = sum(1 for archivo in archivos_requeridos 
-                                      if os.path.exists(os.path.join(ruta, archivo)))
-            
-            if archivos_encontrados >= 2:
-                print(f"✅ Ejecutando en CLOUD - Usando ruta: {ruta}")
-                print(f"   Archivos encontrados: {archivos_encontrados}/{len(archivos_requeridos)}")
-                return ruta
-    
-    # Por defecto, usar Dashboard_github
-    print(f"⚠️ Usando ruta por defecto: Dashboard_github")
-    return "Dashboard_github"
+    Streamlit re-ejecuta el módulo en cada interacción; el gestor evita volver
+    a sondear el disco en cada rerun y vigila los archivos en segundo plano.
+    """
+    return configuracion.GestorConfiguracion()
 
-# Obtener la ruta base UNA SOLA VEZ
-RUTA_BASE = obtener_ruta_base()
+CONFIGURACION = gestor_configuracion().actual()
+RUTA_BASE = CONFIGURACION.ruta_base
 
 # Nombres de los archivos
-ARCHIVO_PRINCIPAL = "Datos vivienda filtrado.xlsx"
-ARCHIVO_DEPARTAMENTOS = "Indice Vivienda Departamentos.xlsx"
-ARCHIVO_CIUDADES = "Indice Vivienda Obras.xlsx"
+ARCHIVO_PRINCIPAL, ARCHIVO_DEPARTAMENTOS, ARCHIVO_CIUDADES = configuracion.ARCHIVOS_REQUERIDOS
+ARCHIVO_IPVN = ipvn.ARCHIVO_IPVN
 
 # ------------------------------------------------
 # 🔍 INFORMACIÓN DE DEBUG
 # ------------------------------------------------
-st.sidebar.markdown("---")
+archivos_info = [f"- {archivo} {'✅' if existe else '❌'}" for archivo, existe in CONFIGURACION.archivos]
+archivos_excel = list(CONFIGURACION.archivos_excel)
 
-archivos_info = []
-for archivo in [ARCHIVO_PRINCIPAL, ARCHIVO_DEPARTAMENTOS, ARCHIVO_CIUDADES]:
-    ruta_completa = os.path.join(RUTA_BASE, archivo)
-    existe = os.path.exists(ruta_completa)
-    archivos_info.append(f"- {archivo} {'✅' if existe else '❌'}")
-
-try:
-    archivos_en_directorio = os.listdir(RUTA_BASE) if os.path.exists(RUTA_BASE) else []
-    archivos_excel = [f for f in archivos_en_directorio if f.endswith('.xlsx')]
-except:
-    archivos_excel = []
+st.sidebar.markdown("---")
 
 # ------------------------------------------------
 # 🎨 EMOJIS Y CONFIGURACIÓN DE SECCIONES
@@ -108,6 +75,11 @@ secciones = {
         "emoji": "📊​",
         "color": "#4ecdc4",
         "gradient": "linear-gradient(135deg, #43e97b 0%, #38f9d7 100%)"
+    },
+    "IPVN": {
+        "emoji": "🏗️​",
+        "color": "#ffd166",
+        "gradient": "linear-gradient(135deg, #f6d365 0%, #fda085 100%)"
     }
 }
 
@@ -271,129 +243,347 @@ def listar_hojas_excel(ruta_archivo):
         st.error(f"Error al leer las hojas del archivo: {e}")
         return []
 
-@st.cache_data
+# Segundos que se recuerda un error de carga antes de volver a sondear el disco
+TTL_ERRORES_CARGA = 60
+
+@st.cache_resource
+def errores_recientes():
+    """Caché negativa compartida por todas las sesiones del proceso"""
+    cache = datos.CacheNegativa(ttl=TTL_ERRORES_CARGA)
+    # Si aparecen o cambian archivos, los errores recordados dejan de valer
+    gestor_configuracion().suscribir(lambda anterior, nueva: cache.limpiar())
+    return cache
+
+def con_cache_negativa(funcion, *args):
+    """
+    Llama a una función cacheada que lanza ErrorDeCarga en caso de fallo
+    
+    Los éxitos quedan en st.cache_data; los fallos se guardan aparte durante
+    TTL_ERRORES_CARGA segundos, así un archivo ausente no se busca en cada rerun.
+    """
+    clave = (funcion.__name__,) + args
+    resultado = errores_recientes().obtener(clave)
+    if resultado is not None:
+        return resultado
+    try:
+        return funcion(*args)
+    except datos.ErrorDeCarga as e:
+        errores_recientes().guardar(clave, e.resultado)
+        return e.resultado
+
+# Con memoria compartida los DataFrames son vistas sobre segmentos mapeados:
+# se guardan por referencia (cache_resource) porque st.cache_data los
+# serializaría y copiaría en cada hit, perdiendo la copia única por máquina
+# Las cargas reciben la versión (mtime, tamaño) del archivo: un Excel nuevo o
+# modificado usa entradas nuevas y recarga_en_caliente() borra las anteriores
+if memoria_compartida.activa():
+    cache_carga = st.cache_resource(show_spinner=False)
+else:
+    cache_carga = st.cache_data(show_spinner=False)
+
+@cache_carga
+def _libro_cacheado(ruta_base, nombre_archivo, version):
+    print(f"Cargando libro: {nombre_archivo}")
+    return datos.exigir_exito(datos.cargar_libro((ruta_base,), nombre_archivo))
+
+@cache_carga
+def _principal_cacheado(ruta_base, version):
+    return datos.exigir_exito(datos.preparar_datos_principal(_libro_cacheado(ruta_base, ARCHIVO_PRINCIPAL, version)))
+
+@cache_carga
+def _almacen_cacheado(ruta_base, nombre_archivo, version):
+    return datos.exigir_exito(datos.preparar_almacen(_libro_cacheado(ruta_base, nombre_archivo, version)))
+
+@st.cache_data(show_spinner=False)
+def _ipvn_cacheado(ruta_base, version):
+    print(f"Cargando libro: {ARCHIVO_IPVN}")
+    return datos.exigir_exito(datos.cargar_ipvn((ruta_base,)))
+
+def mostrar_estado_carga(resultado):
+    """Dibuja el mensaje de éxito o el detalle del error de un ResultadoCarga"""
+    if resultado.ok:
+        if isinstance(resultado.datos, dict):
+            st.success(f"✅ Libro cargado: {resultado.archivo} ({len(resultado.datos)} tablas)")
+        elif isinstance(resultado.datos, almacen.AlmacenIndices):
+            st.success(f"✅ Datos cargados: {resultado.archivo} → {', '.join(resultado.datos.tipos)} "
+                       f"({len(resultado.datos.tabla)} registros)")
+        elif resultado.hoja_buscada is None:
+            st.success(f"✅ Archivo principal cargado: {resultado.archivo}")
+        elif resultado.hoja == resultado.hoja_buscada:
+            st.success(f"✅ Datos cargados: {resultado.archivo} → '{resultado.hoja}' ({len(resultado.datos)} filas)")
+        else:
+            st.success(f"✅ Datos cargados: {resultado.archivo} → '{resultado.hoja}' (buscada como '{resultado.hoja_buscada}') ({len(resultado.datos)} filas)")
+        return
+    
+    error = resultado.error
+    if error.tipo == datos.ARCHIVO_NO_ENCONTRADO:
+        st.error(f"⚠️ No se encontró el archivo: **{error.archivo}**")
+        for ruta in error.rutas_intentadas:
+            st.info(f"📂 Ruta intentada: `{ruta}`")
+        if error.archivos_en_directorio:
+            st.warning(f"Archivos en {RUTA_BASE}: {list(error.archivos_en_directorio)}")
+    elif error.tipo == datos.HOJA_NO_ENCONTRADA:
+        st.error(f"⚠️ No se encontró la hoja **'{resultado.hoja_buscada}'** en **{error.archivo}**")
+        st.warning(f"📋 Hojas disponibles: {', '.join(error.hojas_disponibles)}")
+    else:
+        st.error(f"⚠️ {error.mensaje}")
+        if error.detalle:
+            st.code(error.detalle)
+
+def registrar_memoria(resultado):
+    """Anota la memoria antes y después de compactar tipos, para el panel de debug"""
+    if resultado.ok and resultado.memoria:
+        st.session_state.setdefault("memoria_cargas", {})[resultado.archivo] = resultado.memoria
+
 def cargar_datos_principal():
     """Carga el archivo principal de datos de vivienda"""
-    try:
-        ruta_completa = os.path.join(RUTA_BASE, ARCHIVO_PRINCIPAL)
-        ruta_abs = os.path.abspath(ruta_completa)
-        
-        print(f"Cargando archivo principal: {ruta_abs}")
-        
-        if not os.path.exists(ruta_abs):
-            st.error(f"⚠️ No se encontró el archivo: **{ARCHIVO_PRINCIPAL}**")
-            st.info(f"📂 Ruta intentada: `{ruta_abs}`")
-            return None
-        
-        df = pd.read_excel(ruta_abs)
-        df["Periodo"] = df["Año"].astype(str) + "-" + df["Trimestre"].astype(str)
-        st.success(f"✅ Archivo principal cargado: {ARCHIVO_PRINCIPAL}")
-        return df
-    except Exception as e:
-        st.error(f"⚠️ Error al procesar {ARCHIVO_PRINCIPAL}: {str(e)}")
-        import traceback
-        st.code(traceback.format_exc())
-        return None
+    resultado = con_cache_negativa(_principal_cacheado, RUTA_BASE, CONFIGURACION.version_archivo(ARCHIVO_PRINCIPAL))
+    mostrar_estado_carga(resultado)
+    registrar_memoria(resultado)
+    return resultado.datos
 
-@st.cache_data
-def cargar_excel_con_hoja(nombre_archivo, nombre_hoja):
+def cargar_almacen(nombre_archivo):
+    """Carga un libro por área (Departamentos, Obras) como AlmacenIndices, o None si hay error"""
+    resultado = con_cache_negativa(_almacen_cacheado, RUTA_BASE, nombre_archivo,
+                                   CONFIGURACION.version_archivo(nombre_archivo))
+    mostrar_estado_carga(resultado)
+    registrar_memoria(resultado)
+    return resultado.datos
+
+def corte_elegido(almacen_indices, tipo, etiqueta, clave):
     """
-    Función genérica para cargar cualquier archivo Excel con una hoja específica
-    Maneja automáticamente nombres de hojas con caracteres especiales
+    Corte del periodo que elige el usuario (por defecto, el último publicado)
     
-    Args:
-        nombre_archivo: Nombre del archivo Excel
-        nombre_hoja: Nombre de la hoja a cargar
+    El tipo se busca entre las hojas del libro con la misma tolerancia a
+    caracteres especiales que la carga por hoja. Cambiar de periodo es una
+    consulta al almacén: resumen, ranking y figuras ya están calculados.
     
     Returns:
-        DataFrame o None si hay error
+        almacen.Corte (valores, resumen y ranking) o None
     """
-    try:
-        # Construir ruta absoluta
-        ruta_completa = os.path.join(RUTA_BASE, nombre_archivo)
-        ruta_abs = os.path.abspath(ruta_completa)
-        
-        print(f"Cargando hoja '{nombre_hoja}' de: {ruta_abs}")
-        
-        # Verificar que el archivo existe
-        if not os.path.exists(ruta_abs):
-            st.error(f"⚠️ No se encontró el archivo: **{nombre_archivo}**")
-            st.info(f"📂 Ruta intentada: `{ruta_abs}`")
-            
-            # Listar archivos en el directorio
-            try:
-                archivos_dir = os.listdir(RUTA_BASE)
-                st.warning(f"Archivos en {RUTA_BASE}: {archivos_dir}")
-            except Exception as e:
-                st.error(f"Error al listar directorio: {e}")
-            
-            return None
-        
-        # Listar hojas disponibles
-        xls = pd.ExcelFile(ruta_abs)
-        hojas_disponibles = xls.sheet_names
-        
-        if not hojas_disponibles:
-            st.error(f"⚠️ No se pudieron leer las hojas del archivo: {nombre_archivo}")
-            return None
-        
-        # Función para limpiar nombres de hojas
-        def limpiar_nombre(nombre):
-            import re
-            nombre_limpio = re.sub(r'[\t\r\n\x00-\x1F\x7F-\x9F]', '', nombre)
-            return nombre_limpio.strip()
-        
-        # Buscar coincidencia
-        hoja_encontrada = None
-        
-        # 1. Coincidencia exacta
-        if nombre_hoja in hojas_disponibles:
-            hoja_encontrada = nombre_hoja
-        else:
-            # 2. Buscar por nombre limpio
-            nombre_buscado_limpio = limpiar_nombre(nombre_hoja).lower()
-            
-            for hoja in hojas_disponibles:
-                hoja_limpia = limpiar_nombre(hoja).lower()
-                if hoja_limpia == nombre_buscado_limpio:
-                    hoja_encontrada = hoja
-                    break
-            
-            # 3. Buscar si está contenido
-            if hoja_encontrada is None:
-                for hoja in hojas_disponibles:
-                    if nombre_hoja.lower() in hoja.lower() or hoja.lower().startswith(nombre_hoja.lower()):
-                        hoja_encontrada = hoja
-                        break
-        
-        # Si no se encontró
-        if hoja_encontrada is None:
-            st.error(f"⚠️ No se encontró la hoja **'{nombre_hoja}'** en **{nombre_archivo}**")
-            st.warning(f"📋 Hojas disponibles: {', '.join(hojas_disponibles)}")
-            return None
-        
-        # Cargar la hoja
-        df = pd.read_excel(ruta_abs, sheet_name=hoja_encontrada)
-        
-        # Mensaje de éxito
-        if hoja_encontrada == nombre_hoja:
-            st.success(f"✅ Datos cargados: {nombre_archivo} → '{nombre_hoja}' ({len(df)} filas)")
-        else:
-            st.success(f"✅ Datos cargados: {nombre_archivo} → '{hoja_encontrada}' (buscada como '{nombre_hoja}') ({len(df)} filas)")
-        
-        return df
-        
-    except Exception as e:
-        st.error(f"⚠️ Error al leer {nombre_archivo}: {str(e)}")
-        import traceback
-        st.code(traceback.format_exc())
+    if almacen_indices is None:
+        return None
+    tipo_encontrado = datos.resolver_hoja(tipo, almacen_indices.tipos)
+    if tipo_encontrado is None:
+        st.error(f"⚠️ No se encontró la hoja **'{tipo}'**")
+        st.warning(f"📋 Hojas disponibles: {', '.join(almacen_indices.tipos)}")
         return None
+    periodos = almacen_indices.periodos(tipo_encontrado)
+    periodo = st.selectbox(etiqueta, periodos, index=len(periodos) - 1,
+                           format_func=almacen.etiqueta_periodo, key=clave)
+    return almacen_indices.consultar(tipo_encontrado, periodo)
+
+def top_corte(corte, n, columnas):
+    """Las n áreas con mayor valor del corte, desde su ranking precalculado"""
+    df_top = corte.ranking.head(n).reset_index()
+    df_top.columns = columnas
+    return df_top
+
+def tarjetas_resumen(resumen):
+    """Métricas principales de un corte, leídas de su almacen.Resumen"""
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Índice Máximo", f"{resumen.maximo:.2f}", f"{resumen.area_maximo}")
+    with col2:
+        st.metric("Índice Mínimo", f"{resumen.minimo:.2f}", f"{resumen.area_minimo}")
+    with col3:
+        st.metric("Promedio Nacional", f"{resumen.media:.2f}")
+    with col4:
+        st.metric("Desviación Estándar", f"{resumen.desv:.2f}")
+
+def cargar_datos_ipvn():
+    """Carga las tablas del libro IPVN (dict {tabla: DataFrame} o None si hay error)"""
+    resultado = con_cache_negativa(_ipvn_cacheado, RUTA_BASE, CONFIGURACION.version_archivo(ARCHIVO_IPVN))
+    mostrar_estado_carga(resultado)
+    registrar_memoria(resultado)
+    return resultado.datos
+
+# ------------------------------------------------
+# 🔮 REGISTRO DE MODELOS
+# ------------------------------------------------
+@st.cache_resource
+def registro_modelos():
+    """Ajustes ARIMA compartidos por todas las sesiones del proceso"""
+    return modelos.RegistroModelos()
+
+@st.cache_data(show_spinner=False)
+def diagnosticos_arma(huella, _serie):
+    """Paquete de diagnósticos ARMA de la serie; `huella` identifica la versión de los datos"""
+    import diagnosticos
+    
+    return diagnosticos.obtener_diagnosticos(
+        _serie, lambda: registro_modelos().obtener(_serie, modelos.ORDEN_ARMA)
+    )
+
+def diagnosticos_serie(serie):
+    """Todas las pruebas salen de un mismo paquete, calculado una vez por versión de los datos"""
+    with st.spinner("Calculando diagnósticos del modelo..."):
+        return diagnosticos_arma(modelos.huella_serie(serie), serie)
+
+def seccion_calculada(clave):
+    """
+    Indica si una sección de la pestaña ARMA debe calcularse en este rerun
+    
+    Fuera del modo bajo demanda siempre es True. En ese modo dibuja un botón y
+    solo es True cuando el usuario ya pidió la sección; las calculadas se
+    recuerdan en session_state para no volver a pedirlas.
+    """
+    if not st.session_state.get("arma_bajo_demanda", False):
+        return True
+    
+    calculadas = st.session_state.setdefault("secciones_arma_calculadas", set())
+    if clave in calculadas:
+        return True
+    
+    if st.button("▶️ Calcular esta sección", key=f"calcular_{clave}"):
+        calculadas.add(clave)
+        return True
+    
+    st.caption("⏸️ Sección pendiente: se calcula solo cuando la pides")
+    return False
+
+@st.cache_data(show_spinner=False)
+def validacion_arma(huella, h, _serie):
+    """Pronóstico de los últimos `h` trimestres con el modelo ajustado sin ellos"""
+    return modelos.pronostico_validacion(registro_modelos(), _serie, h, modelos.ORDEN_ARMA)
+
+def figura_arma(huella, tipo, serie):
+    """
+    Figura del modelo ARMA, construida una vez por versión de los datos
+    
+    Pasa por la caché de figuras, que entrega un go.Figure: st.plotly_chart
+    re-valida en cada llamada las figuras que recibe como dict.
+    
+    Args:
+        huella: Huella de la serie (versión de los datos)
+        tipo: 'acf', 'pacf', 'acf_residuos', 'qq' o 'pronostico'
+    """
+    def construir():
+        if tipo == 'pronostico':
+            return graficos.figura_pronostico(
+                validacion_arma(huella, 4, serie), 'Pronóstico ARMA(1,1) - Últimos 4 Trimestres'
+            )
+        diag = diagnosticos_arma(huella, serie)
+        if tipo == 'acf':
+            return graficos.figura_correlograma(
+                diag['acf'], 'ACF de la Serie Original', 'Rezagos (Trimestres)', 'Autocorrelación',
+                rezagos_marcados=graficos.REZAGOS_ESTACIONALES_GRAFICO, altura=450
+            )
+        if tipo == 'pacf':
+            return graficos.figura_correlograma(
+                diag['pacf'], 'PACF de la Serie Original', 'Rezagos (Trimestres)', 'Autocorrelación Parcial',
+                rezagos_marcados=graficos.REZAGOS_ESTACIONALES_GRAFICO, altura=450
+            )
+        if tipo == 'acf_residuos':
+            return graficos.figura_correlograma(
+                diag['acf_residuos'], 'ACF de los residuos ARMA(1,1)', 'Rezagos', 'Autocorrelación'
+            )
+        return graficos.figura_qq(diag['qq'])
+    
+    return cache_figuras().obtener(("arma", huella, tipo), construir)
+
+@st.cache_data(show_spinner=False)
+def abanico_arma(huella, _serie):
+    """Trayectorias bootstrap del ARMA sobre la serie completa, simuladas una vez por versión del modelo"""
+    res = registro_modelos().obtener(_serie, modelos.ORDEN_ARMA)
+    return abanico.simular(res, _serie)
+
+@st.cache_data(show_spinner=False)
+def backtest_arma(huella, _serie):
+    """Backtest con origen móvil (también guardado en disco por versión de los datos)"""
+    return backtest.obtener_backtest(_serie, modelos.ORDEN_ARMA)
+
+@st.cache_data(show_spinner=False)
+def seleccion_orden_arma(huella, criterio, _serie):
+    """Búsqueda del orden SARIMA por AIC/BIC (candidatos cacheados en disco por versión)"""
+    # En este proceso: el servidor de Streamlit tiene varios hilos y un fork desde aquí
+    # puede heredar locks tomados; el pool de procesos queda para la CLI
+    return seleccion_orden.seleccionar_orden(_serie, criterio, procesos=1)
+
+@st.cache_data(show_spinner=False)
+def estacional_arma(huella, orden, _serie):
+    """STL y comparación SARIMA vs ARMA(1,1) (paquete en disco por versión de los datos y orden)"""
+    return estacional.obtener_estacional(_serie, orden)
+
+@st.cache_data(show_spinner=False)
+def _pronosticos_cacheados(version):
+    """Tabla de pronósticos precalculados; `version` es el mtime de sus metadatos (cambia al regenerarla)"""
+    return pronosticos.leer()
+
+def pronosticos_guardados():
+    """Pronósticos del trabajo programado (pronosticos.py), o None si aún no se generaron"""
+    version = pronosticos.version_guardada()
+    return None if version is None else _pronosticos_cacheados(version)
+
+@st.cache_resource
+def cache_figuras():
+    """Figuras compartidas por todas las sesiones: rankings por área, diagnósticos ARMA y análisis estacional"""
+    return graficos.CacheFiguras()
+
+def figura_corte(nombre_archivo, corte, clase, construir):
+    """
+    Figura de un corte, construida una vez por (archivo, versión, tipo, periodo, clase)
+    
+    Args:
+        corte: almacen.Corte del que sale la figura
+        clase: 'barras' o 'torta'
+        construir: Función sin argumentos que arma la figura (solo en un fallo)
+    """
+    clave = (nombre_archivo, CONFIGURACION.version_archivo(nombre_archivo), corte.tipo, str(corte.periodo), clase)
+    return cache_figuras().obtener(clave, construir)
+
+# ------------------------------------------------
+# 🔄 RECARGA EN CALIENTE
+# ------------------------------------------------
+@st.cache_resource(show_spinner=False)
+def recarga_en_caliente():
+    """
+    Conecta el vigilante de archivos con la invalidación de cachés
+    
+    Al cambiar un Excel se borran solo las entradas de ese archivo en su
+    versión anterior (y, si es el principal, los artefactos del modelo) y se
+    pre-calienta la nueva versión en segundo plano.
+    """
+    registro = registro_modelos()
+    precalentador = recarga.Precalentador(registro, ARCHIVO_PRINCIPAL)
+    
+    def al_cambiar(anterior, nueva):
+        cambiados = configuracion.archivos_cambiados(anterior, nueva)
+        for nombre in cambiados:
+            version = anterior.version_archivo(nombre)
+            _libro_cacheado.clear(anterior.ruta_base, nombre, version)
+            _almacen_cacheado.clear(anterior.ruta_base, nombre, version)
+            cache_figuras().limpiar((nombre, version))
+            if nombre == ARCHIVO_IPVN:
+                _ipvn_cacheado.clear(anterior.ruta_base, version)
+            if nombre == ARCHIVO_PRINCIPAL:
+                _principal_cacheado.clear(anterior.ruta_base, version)
+                diagnosticos_arma.clear()
+                validacion_arma.clear()
+                cache_figuras().limpiar(("arma",))
+                seleccion_orden_arma.clear()
+                backtest_arma.clear()
+                abanico_arma.clear()
+                estacional_arma.clear()
+                cache_figuras().limpiar(("estacional",))
+                registro.limpiar()
+        if cambiados:
+            precalentador.programar(nueva.ruta_base, cambiados)
+    
+    gestor_configuracion().suscribir(al_cambiar)
+    return precalentador
+
+recarga_en_caliente()
+
 # ------------------------------------------------
 # 📥 INICIALIZAR SESSION STATE
 # ------------------------------------------------
 if 'vista_actual' not in st.session_state:
     st.session_state.vista_actual = "Casas"
 
+def cambiar_vista(nombre):
+    st.session_state.vista_actual = nombre
+
 # ------------------------------------------------
 # 🔘 MENÚ LATERAL CON EMOJIS INTERACTIVOS
 # ------------------------------------------------
@@ -412,10 +602,10 @@ with st.sidebar:
             # Contenedor con clase específica
             st.markdown(f'<div class="{button_class} {active_class}">', unsafe_allow_html=True)
             
-            # Botón con emoji
-            if st.button(config["emoji"], key=f"btn_{nombre}", use_container_width=True):
-                st.session_state.vista_actual = nombre
-                st.rerun()
+            # Botón con emoji: el callback cambia la vista antes del rerun que
+            # provoca el clic, así no hace falta un st.rerun() adicional
+            st.button(config["emoji"], key=f"btn_{nombre}", use_container_width=True,
+                      on_click=cambiar_vista, args=(nombre,))
             
             st.markdown('</div>', unsafe_allow_html=True)
             
@@ -430,9 +620,12 @@ with st.sidebar:
 # ------------------------------------------------
 # 📊 CONTENIDO PRINCIPAL SEGÚN LA VISTA
 # ------------------------------------------------
+# Cada vista es un fragmento: las interacciones dentro de ella (pestañas,
+# botones, toggles, descargas) re-ejecutan solo su contenido, no todo el script
 st.markdown("---")
 
-if st.session_state.vista_actual == "Casas":
+@st.fragment
+def vista_casas():
     st.subheader("🏚️ Índice de la vivienda enfocado en las Casas")
     st.markdown("*Análisis del índice de precios de vivienda nueva tipo Casa en Colombia*")
     
@@ -440,28 +633,41 @@ if st.session_state.vista_actual == "Casas":
     df_principal = cargar_datos_principal()
     
     # Cargar datos de casas para mapas
+    # (último periodo de cada libro, tomado del almacén largo: Área → valor)
     with st.spinner("Cargando datos de Casas..."):
-        df_dept_casas = cargar_excel_con_hoja(ARCHIVO_DEPARTAMENTOS, "Casas")
-        df_ciudades_casas = cargar_excel_con_hoja(ARCHIVO_CIUDADES, "Casas")
+        col_periodo_indice, col_periodo_obras = st.columns(2)
+        with col_periodo_indice:
+            indice_casas = corte_elegido(cargar_almacen(ARCHIVO_DEPARTAMENTOS), "Casas",
+                                          "📅 Periodo del índice por ciudad", "periodo_indice_casas")
+        with col_periodo_obras:
+            obras_casas = corte_elegido(cargar_almacen(ARCHIVO_CIUDADES), "Casas",
+                                         "📅 Periodo de obras en construcción", "periodo_obras_casas")
     
     # Verificar si se cargaron ambos archivos
-    if df_dept_casas is None and df_ciudades_casas is None:
+    if indice_casas is None and obras_casas is None:
         st.error("❌ No se pudieron cargar los datos de casas (ni departamentos ni ciudades).")
-    elif df_dept_casas is None:
+    elif indice_casas is None:
         st.warning("⚠️ No se pudieron cargar los datos de departamentos, pero sí los de ciudades.")
-    elif df_ciudades_casas is None:
+    elif obras_casas is None:
         st.warning("⚠️ No se pudieron cargar los datos de ciudades, pero sí los de departamentos.")
     
     # GRÁFICA DE EVOLUCIÓN TEMPORAL
     if df_principal is not None and 'Casas' in df_principal.columns:
         st.markdown("---")
         
+        # Rango de la gráfica: rebanada por posición sobre la categórica Periodo
+        periodos = list(df_principal["Periodo"].cat.categories)
+        desde, hasta = st.select_slider("📅 Rango de periodos", options=periodos,
+                                        value=(periodos[0], periodos[-1]), format_func=str.strip,
+                                        key="rango_casas")
+        df_rango = datos.rebanada_periodos(df_principal, desde, hasta)
+        
         # Crear gráfica con Plotly
         fig = go.Figure()
         
         fig.add_trace(go.Scatter(
-            x=df_principal["Periodo"],
-            y=df_principal["Casas"],
+            x=df_rango["Periodo"],
+            y=df_rango["Casas"],
             mode='lines+markers',
             name='Índice Casas',
             line=dict(color='#667eea', width=3),
@@ -496,52 +702,33 @@ if st.session_state.vista_actual == "Casas":
         # Métricas adicionales
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Índice Actual", f"{df_principal['Casas'].iloc[-1]:.2f}", 
-                     f"{((df_principal['Casas'].iloc[-1] - df_principal['Casas'].iloc[-2]) / df_principal['Casas'].iloc[-2] * 100):.2f}%")
+            serie = df_rango['Casas']
+            st.metric("Índice Actual", f"{serie.iloc[-1]:.2f}",
+                     f"{((serie.iloc[-1] - serie.iloc[-2]) / serie.iloc[-2] * 100):.2f}%" if len(serie) > 1 else None)
         with col2:
-            st.metric("Promedio Histórico", f"{df_principal['Casas'].mean():.2f}")
+            st.metric("Promedio Histórico", f"{df_rango['Casas'].mean():.2f}")
         with col3:
-            st.metric("Máximo Histórico", f"{df_principal['Casas'].max():.2f}")
+            st.metric("Máximo Histórico", f"{df_rango['Casas'].max():.2f}")
         with col4:
-            st.metric("Mínimo Histórico", f"{df_principal['Casas'].min():.2f}")
+            st.metric("Mínimo Histórico", f"{df_rango['Casas'].min():.2f}")
     
         st.markdown("---")
     
-    if df_dept_casas is not None or df_ciudades_casas is not None:
+    if indice_casas is not None or obras_casas is not None:
         
         # Tabs para organizar la información
         tab1, tab2, tab3 = st.tabs(["📊 Resumen General", "🌆​Indice en ciudades", "🏗️ Obras en Construcción"])
 
         with tab1:
-            st.write("### Estadísticas Generales de Casas en 2025 por Ciudades")
-            
-            if df_dept_casas is not None:
-                # Calcular última columna disponible (último periodo)
-                columnas_numericas = df_dept_casas.select_dtypes(include=[np.number]).columns
-                if len(columnas_numericas) > 0:
-                    ultima_col = columnas_numericas[-1]
-                    
-                    # Métricas principales
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        valor_max = df_dept_casas[ultima_col].max()
-                        dept_max = df_dept_casas.loc[df_dept_casas[ultima_col].idxmax()].iloc[0]
-                        st.metric("Índice Máximo", f"{valor_max:.2f}", f"{dept_max}")
-                    with col2:
-                        valor_min = df_dept_casas[ultima_col].min()
-                        dept_min = df_dept_casas.loc[df_dept_casas[ultima_col].idxmin()].iloc[0]
-                        st.metric("Índice Mínimo", f"{valor_min:.2f}", f"{dept_min}")
-                    with col3:
-                        promedio = df_dept_casas[ultima_col].mean()
-                        st.metric("Promedio Nacional", f"{promedio:.2f}")
-                    with col4:
-                        desv_std = df_dept_casas[ultima_col].std()
-                        st.metric("Desviación Estándar", f"{desv_std:.2f}")
+            if indice_casas is not None:
+                st.write(f"### Estadísticas Generales de Casas en {almacen.etiqueta_periodo(indice_casas.periodo)} por Ciudades")
+                if indice_casas.resumen.validos:
+                    # Métricas principales (precalculadas al cargar el almacén)
+                    tarjetas_resumen(indice_casas.resumen)
                     
                     # Tabla de departamentos
                     st.write("### Top 10 Ciudades - Índice de Precios de Casas")
-                    df_top = df_dept_casas.nlargest(10, ultima_col)[[df_dept_casas.columns[0], ultima_col]].reset_index(drop=True)
-                    df_top.columns = ['Departamento', 'Índice']
+                    df_top = top_corte(indice_casas, 10, ['Departamento', 'Índice'])
                     st.dataframe(df_top.style.format({'Índice': '{:.2f}'}).hide(axis="index"), use_container_width=True)
                     
             else:
@@ -550,51 +737,35 @@ if st.session_state.vista_actual == "Casas":
         with tab2:
             st.write("### 👩‍💻​ Índice en ciudades")
             
-            if df_dept_casas is not None:
-                columnas_numericas = df_dept_casas.select_dtypes(include=[np.number]).columns
-                if len(columnas_numericas) > 0:
-                    ultima_col = columnas_numericas[-1]
+            if indice_casas is not None:
+                if indice_casas.resumen.validos:
+                    ultimo_periodo = almacen.etiqueta_periodo(indice_casas.periodo)
                     
                     # Preparar datos para el mapa
-                    df_mapa = df_dept_casas[[df_dept_casas.columns[0], ultima_col]].copy()
+                    df_mapa = indice_casas.valores.reset_index()
                     df_mapa.columns = ['Departamento', 'Indice']
                     
                     # Crear dos columnas: gráfico de barras y gráfico de pastel
                     col_bar, col_pie = st.columns([2, 1])
                     
                     with col_bar:
-                        # Crear gráfico de barras horizontal con colores de mapa de calor
-                        fig = px.bar(
-                            df_mapa.sort_values('Indice', ascending=True),
-                            x='Indice',
-                            y='Departamento',
-                            orientation='h',
-                            title=f'Índice de Precios de Casas por Ciudad - Periodo {ultima_col}',
-                            color='Indice',
-                            color_continuous_scale='RdYlGn',
-                            labels={'Indice': 'Índice de Vivienda', 'Departamento': 'Departamento'}
-                        )
-                        
-                        fig.update_layout(
-                            template="plotly_dark",
-                            height=max(600, len(df_mapa) * 25),
-                            showlegend=False,
-                            xaxis_title="Índice de Vivienda",
-                            yaxis_title="Departamento"
-                        )
-                        
+                        # Gráfico de barras horizontal con colores de mapa de calor (cacheado)
+                        fig = figura_corte(ARCHIVO_DEPARTAMENTOS, indice_casas, 'barras', lambda: graficos.figura_barras_ranking(
+                            df_mapa, 'Departamento',
+                            f'Índice de Precios de Casas por Ciudad - Periodo {ultimo_periodo}',
+                            'Índice de Vivienda', "Índice de Vivienda"
+                        ))
                         st.plotly_chart(fig, use_container_width=True)
                     
                     with col_pie:
                         st.write("#### Proporción por Ciudad (resumen)")
                         # Mostrar tabla con los top 10 departamentos como alternativa al pie
-                        df_top_pie = df_mapa.nlargest(10, 'Indice').reset_index(drop=True)
+                        df_top_pie = top_corte(indice_casas, 10, ['Departamento', 'Indice'])
                         st.dataframe(df_top_pie.style.format({'Indice': '{:.2f}'}).hide(axis="index"), use_container_width=True)
 
                         # Métricas adicionales
-                        total_indice = df_mapa['Indice'].sum()
-                        st.metric("Total Índice", f"{total_indice:.2f}")
-                        st.metric("Departamentos", len(df_mapa))
+                        st.metric("Total Índice", f"{indice_casas.resumen.suma:.2f}")
+                        st.metric("Departamentos", indice_casas.resumen.areas)
                     
                     # Información adicional
                     st.info("""
@@ -609,68 +780,33 @@ if st.session_state.vista_actual == "Casas":
             st.write("### 🏗️ Obras en Construcción")
             st.info("📌 **Nota:** Estos datos representan la cantidad de viviendas nuevas (casas) en construcción por municipio.")
             
-            if df_ciudades_casas is not None:
-                columnas_num_ciudad = df_ciudades_casas.select_dtypes(include=[np.number]).columns
-                if len(columnas_num_ciudad) > 0:
-                    ultima_col_ciudad = columnas_num_ciudad[-1]
+            if obras_casas is not None:
+                if obras_casas.resumen.validos:
+                    ultimo_periodo_ciudad = almacen.etiqueta_periodo(obras_casas.periodo)
                     
                     # Preparar datos para el mapa de ciudades
-                    df_mapa_ciudad = df_ciudades_casas[[df_ciudades_casas.columns[0], ultima_col_ciudad]].copy()
+                    df_mapa_ciudad = obras_casas.valores.reset_index()
                     df_mapa_ciudad.columns = ['Ciudad', 'Indice']
                     
-                    # Crear gráfico de barras horizontal
-                    fig_ciudad = px.bar(
-                        df_mapa_ciudad.sort_values('Indice', ascending=True),
-                        x='Indice',
-                        y='Ciudad',
-                        orientation='h',
-                        title=f'Cantidad de Casas en Construcción por Ciudad - Periodo {ultima_col_ciudad}',
-                        color='Indice',
-                        color_continuous_scale='RdYlGn',
-                        labels={'Indice': 'Cantidad de Viviendas', 'Ciudad': 'Ciudad'}
-                    )
-                    
-                    fig_ciudad.update_layout(
-                        template="plotly_dark",
-                        height=max(800, len(df_mapa_ciudad) * 20),
-                        showlegend=False,
-                        xaxis_title="Cantidad de Viviendas en Construcción",
-                        yaxis_title="Ciudad"
-                    )
-                    
+                    # Gráfico de barras horizontal (cacheado)
+                    fig_ciudad = figura_corte(ARCHIVO_CIUDADES, obras_casas, 'barras', lambda: graficos.figura_barras_ranking(
+                        df_mapa_ciudad, 'Ciudad',
+                        f'Cantidad de Casas en Construcción por Ciudad - Periodo {ultimo_periodo_ciudad}',
+                        'Cantidad de Viviendas', "Cantidad de Viviendas en Construcción",
+                        altura_minima=800, alto_fila=20
+                    ))
                     st.plotly_chart(fig_ciudad, use_container_width=True)
                     
                     # Gráfico de pastel - Top 10 ciudades (proporción) - Casas
-                    df_top_ciudad_pie = df_mapa_ciudad.nlargest(10, 'Indice')
-                    fig_pie_ciudad = px.pie(
-                        df_top_ciudad_pie,
-                        values='Indice',
-                        names='Ciudad',
-                        title=f'Top 10 Ciudades - Proporción de Casas en Construcción - Periodo {ultima_col_ciudad}',
-                        color_discrete_sequence=px.colors.sequential.RdBu
-                    )
-                    fig_pie_ciudad.update_traces(
-                        textposition='inside',
-                        textinfo='percent+label',
-                        hovertemplate='<b>%{label}</b><br>Índice: %{value:.2f}<br>Porcentaje: %{percent}<extra></extra>'
-                    )
-                    fig_pie_ciudad.update_layout(
-                        template="plotly_dark",
-                        height=500,
-                        showlegend=True,
-                        legend=dict(
-                            orientation="v",
-                            yanchor="middle",
-                            y=0.5,
-                            xanchor="left",
-                            x=1.02
-                        )
-                    )
+                    fig_pie_ciudad = figura_corte(ARCHIVO_CIUDADES, obras_casas, 'torta', lambda: graficos.figura_torta_top(
+                        top_corte(obras_casas, 10, ['Ciudad', 'Indice']), 'Ciudad',
+                        f'Top 10 Ciudades - Proporción de Casas en Construcción - Periodo {ultimo_periodo_ciudad}'
+                    ))
                     st.plotly_chart(fig_pie_ciudad, use_container_width=True)
 
                     # Top ciudades (tabla)
                     st.write("### Top 10 Ciudades - Cantidad de Casas en Construcción")
-                    df_top_ciudad = df_mapa_ciudad.nlargest(10, 'Indice').reset_index(drop=True)
+                    df_top_ciudad = top_corte(obras_casas, 10, ['Ciudad', 'Indice'])
                     col1, col2 = st.columns(2)
                     with col1:
                         st.dataframe(df_top_ciudad.head(8).style.format({'Indice': '{:.2f}'}).hide(axis="index"), use_container_width=True)
@@ -679,7 +815,8 @@ if st.session_state.vista_actual == "Casas":
             else:
                 st.warning("⚠️ No hay datos de ciudades disponibles para el mapa de calor.")
 
-elif st.session_state.vista_actual == "Departamento":
+@st.fragment
+def vista_departamento():
     st.subheader("🏙️ Índice de la vivienda enfocado en los Apartamentos")
     st.markdown("*Análisis del índice de precios de vivienda nueva tipo Apartamento en Colombia*")
     
@@ -687,28 +824,41 @@ elif st.session_state.vista_actual == "Departamento":
     df_principal = cargar_datos_principal()
     
     # Cargar datos de apartamentos para mapas
+    # (último periodo de cada libro, tomado del almacén largo: Área → valor)
     with st.spinner("Cargando datos de Apartamentos..."):
-        df_dept_aptos = cargar_excel_con_hoja(ARCHIVO_DEPARTAMENTOS, "Apartamentos")
-        df_ciudades_aptos = cargar_excel_con_hoja(ARCHIVO_CIUDADES, "Apartamentos")
+        col_periodo_indice, col_periodo_obras = st.columns(2)
+        with col_periodo_indice:
+            indice_aptos = corte_elegido(cargar_almacen(ARCHIVO_DEPARTAMENTOS), "Apartamentos",
+                                          "📅 Periodo del índice por ciudad", "periodo_indice_aptos")
+        with col_periodo_obras:
+            obras_aptos = corte_elegido(cargar_almacen(ARCHIVO_CIUDADES), "Apartamentos",
+                                         "📅 Periodo de obras en construcción", "periodo_obras_aptos")
     
     # Verificar si se cargaron ambos archivos
-    if df_dept_aptos is None and df_ciudades_aptos is None:
+    if indice_aptos is None and obras_aptos is None:
         st.error("❌ No se pudieron cargar los datos de apartamentos (ni departamentos ni ciudades).")
-    elif df_dept_aptos is None:
+    elif indice_aptos is None:
         st.warning("⚠️ No se pudieron cargar los datos de departamentos, pero sí los de ciudades.")
-    elif df_ciudades_aptos is None:
+    elif obras_aptos is None:
         st.warning("⚠️ No se pudieron cargar los datos de ciudades, pero sí los de departamentos.")
     
     # GRÁFICA DE EVOLUCIÓN TEMPORAL (similar a Total y Modelo)
     if df_principal is not None and 'Apartamentos' in df_principal.columns:
         st.markdown("---")
         
+        # Rango de la gráfica: rebanada por posición sobre la categórica Periodo
+        periodos = list(df_principal["Periodo"].cat.categories)
+        desde, hasta = st.select_slider("📅 Rango de periodos", options=periodos,
+                                        value=(periodos[0], periodos[-1]), format_func=str.strip,
+                                        key="rango_aptos")
+        df_rango = datos.rebanada_periodos(df_principal, desde, hasta)
+        
         # Crear gráfica con Plotly
         fig = go.Figure()
         
         fig.add_trace(go.Scatter(
-            x=df_principal["Periodo"],
-            y=df_principal["Apartamentos"],
+            x=df_rango["Periodo"],
+            y=df_rango["Apartamentos"],
             mode='lines+markers',
             name='Índice Apartamentos',
             line=dict(color='#f093fb', width=3),
@@ -743,52 +893,33 @@ elif st.session_state.vista_actual == "Departamento":
         # Métricas adicionales
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Índice Actual", f"{df_principal['Apartamentos'].iloc[-1]:.2f}", 
-                     f"{((df_principal['Apartamentos'].iloc[-1] - df_principal['Apartamentos'].iloc[-2]) / df_principal['Apartamentos'].iloc[-2] * 100):.2f}%")
+            serie = df_rango['Apartamentos']
+            st.metric("Índice Actual", f"{serie.iloc[-1]:.2f}",
+                     f"{((serie.iloc[-1] - serie.iloc[-2]) / serie.iloc[-2] * 100):.2f}%" if len(serie) > 1 else None)
         with col2:
-            st.metric("Promedio Histórico", f"{df_principal['Apartamentos'].mean():.2f}")
+            st.metric("Promedio Histórico", f"{df_rango['Apartamentos'].mean():.2f}")
         with col3:
-            st.metric("Máximo Histórico", f"{df_principal['Apartamentos'].max():.2f}")
+            st.metric("Máximo Histórico", f"{df_rango['Apartamentos'].max():.2f}")
         with col4:
-            st.metric("Mínimo Histórico", f"{df_principal['Apartamentos'].min():.2f}")
+            st.metric("Mínimo Histórico", f"{df_rango['Apartamentos'].min():.2f}")
         
         st.markdown("---")
     
-    if df_dept_aptos is not None or df_ciudades_aptos is not None:
+    if indice_aptos is not None or obras_aptos is not None:
         
         # Tabs para organizar la información
         tab1, tab2, tab3 = st.tabs(["📊 Resumen General", "🌆​ Índice en ciudades", "🏗️ Obras en Construcción"])
         
         with tab1:
-            st.write("### Estadísticas Generales de Apartamentos en 2025 por Ciudades")
-            
-            if df_dept_aptos is not None:
-                # Calcular última columna disponible (último periodo)
-                columnas_numericas = df_dept_aptos.select_dtypes(include=[np.number]).columns
-                if len(columnas_numericas) > 0:
-                    ultima_col = columnas_numericas[-1]
-                    
-                    # Métricas principales
-                    col1, col2, col3, col4 = st.columns(4)
-                    with col1:
-                        valor_max = df_dept_aptos[ultima_col].max()
-                        dept_max = df_dept_aptos.loc[df_dept_aptos[ultima_col].idxmax()].iloc[0]
-                        st.metric("Índice Máximo", f"{valor_max:.2f}", f"{dept_max}")
-                    with col2:
-                        valor_min = df_dept_aptos[ultima_col].min()
-                        dept_min = df_dept_aptos.loc[df_dept_aptos[ultima_col].idxmin()].iloc[0]
-                        st.metric("Índice Mínimo", f"{valor_min:.2f}", f"{dept_min}")
-                    with col3:
-                        promedio = df_dept_aptos[ultima_col].mean()
-                        st.metric("Promedio Nacional", f"{promedio:.2f}")
-                    with col4:
-                        desv_std = df_dept_aptos[ultima_col].std()
-                        st.metric("Desviación Estándar", f"{desv_std:.2f}")
+            if indice_aptos is not None:
+                st.write(f"### Estadísticas Generales de Apartamentos en {almacen.etiqueta_periodo(indice_aptos.periodo)} por Ciudades")
+                if indice_aptos.resumen.validos:
+                    # Métricas principales (precalculadas al cargar el almacén)
+                    tarjetas_resumen(indice_aptos.resumen)
                     
                     # Tabla de departamentos
                     st.write("### Top 10 Ciudad - Índice de Precios de Apartamentos")
-                    df_top = df_dept_aptos.nlargest(10, ultima_col)[[df_dept_aptos.columns[0], ultima_col]].reset_index(drop=True)
-                    df_top.columns = ['Departamento', 'Índice']
+                    df_top = top_corte(indice_aptos, 10, ['Departamento', 'Índice'])
                     st.dataframe(df_top.style.format({'Índice': '{:.2f}'}).hide(axis="index"), use_container_width=True)
             else:
                 st.info("No hay datos de departamentos disponibles para mostrar estadísticas.")
@@ -796,51 +927,35 @@ elif st.session_state.vista_actual == "Departamento":
         with tab2:
             st.write("### 👩‍💻​ Índice en ciudades")
             
-            if df_dept_aptos is not None:
-                columnas_numericas = df_dept_aptos.select_dtypes(include=[np.number]).columns
-                if len(columnas_numericas) > 0:
-                    ultima_col = columnas_numericas[-1]
+            if indice_aptos is not None:
+                if indice_aptos.resumen.validos:
+                    ultimo_periodo = almacen.etiqueta_periodo(indice_aptos.periodo)
                     
                     # Preparar datos para el mapa
-                    df_mapa = df_dept_aptos[[df_dept_aptos.columns[0], ultima_col]].copy()
+                    df_mapa = indice_aptos.valores.reset_index()
                     df_mapa.columns = ['Departamento', 'Indice']
                     
                     # Crear dos columnas: gráfico de barras y tabla resumen
                     col_bar, col_pie = st.columns([2, 1])
                     
                     with col_bar:
-                        # Crear gráfico de barras horizontal con colores de mapa de calor
-                        fig = px.bar(
-                            df_mapa.sort_values('Indice', ascending=True),
-                            x='Indice',
-                            y='Departamento',
-                            orientation='h',
-                            title=f'Índice de Precios de Apartamentos por Departamento - Periodo {ultima_col}',
-                            color='Indice',
-                            color_continuous_scale='RdYlGn',
-                            labels={'Indice': 'Índice de Vivienda', 'Departamento': 'Departamento'}
-                        )
-                        
-                        fig.update_layout(
-                            template="plotly_dark",
-                            height=max(600, len(df_mapa) * 25),
-                            showlegend=False,
-                            xaxis_title="Índice de Vivienda",
-                            yaxis_title="Departamento"
-                        )
-                        
+                        # Gráfico de barras horizontal con colores de mapa de calor (cacheado)
+                        fig = figura_corte(ARCHIVO_DEPARTAMENTOS, indice_aptos, 'barras', lambda: graficos.figura_barras_ranking(
+                            df_mapa, 'Departamento',
+                            f'Índice de Precios de Apartamentos por Departamento - Periodo {ultimo_periodo}',
+                            'Índice de Vivienda', "Índice de Vivienda"
+                        ))
                         st.plotly_chart(fig, use_container_width=True)
                     
                     with col_pie:
                         st.write("#### Proporción por Departamento (resumen)")
                         # Mostrar tabla con los top 10 departamentos
-                        df_top_pie = df_mapa.nlargest(10, 'Indice').reset_index(drop=True)
+                        df_top_pie = top_corte(indice_aptos, 10, ['Departamento', 'Indice'])
                         st.dataframe(df_top_pie.style.format({'Indice': '{:.2f}'}).hide(axis="index"), use_container_width=True)
 
                         # Métricas adicionales
-                        total_indice = df_mapa['Indice'].sum()
-                        st.metric("Total Índice", f"{total_indice:.2f}")
-                        st.metric("Departamentos", len(df_mapa))
+                        st.metric("Total Índice", f"{indice_aptos.resumen.suma:.2f}")
+                        st.metric("Departamentos", indice_aptos.resumen.areas)
                     
                     # Información adicional
                     st.info("""
@@ -856,68 +971,33 @@ elif st.session_state.vista_actual == "Departamento":
             st.write("### 🏗️ Obras en Construcción")
             st.info("📌 **Nota:** Estos datos representan la cantidad de viviendas nuevas (apartamentos) en construcción por municipio.")
             
-            if df_ciudades_aptos is not None:
-                columnas_num_ciudad = df_ciudades_aptos.select_dtypes(include=[np.number]).columns
-                if len(columnas_num_ciudad) > 0:
-                    ultima_col_ciudad = columnas_num_ciudad[-1]
+            if obras_aptos is not None:
+                if obras_aptos.resumen.validos:
+                    ultimo_periodo_ciudad = almacen.etiqueta_periodo(obras_aptos.periodo)
                     
                     # Preparar datos para el mapa de ciudades
-                    df_mapa_ciudad = df_ciudades_aptos[[df_ciudades_aptos.columns[0], ultima_col_ciudad]].copy()
+                    df_mapa_ciudad = obras_aptos.valores.reset_index()
                     df_mapa_ciudad.columns = ['Ciudad', 'Indice']
                     
-                    # Crear gráfico de barras horizontal
-                    fig_ciudad = px.bar(
-                        df_mapa_ciudad.sort_values('Indice', ascending=True),
-                        x='Indice',
-                        y='Ciudad',
-                        orientation='h',
-                        title=f'Cantidad de Apartamentos en Construcción por Ciudad - Periodo {ultima_col_ciudad}',
-                        color='Indice',
-                        color_continuous_scale='RdYlGn',
-                        labels={'Indice': 'Cantidad de Viviendas', 'Ciudad': 'Ciudad'}
-                    )
-                    
-                    fig_ciudad.update_layout(
-                        template="plotly_dark",
-                        height=max(800, len(df_mapa_ciudad) * 20),
-                        showlegend=False,
-                        xaxis_title="Cantidad de Viviendas en Construcción",
-                        yaxis_title="Ciudad"
-                    )
-                    
+                    # Gráfico de barras horizontal (cacheado)
+                    fig_ciudad = figura_corte(ARCHIVO_CIUDADES, obras_aptos, 'barras', lambda: graficos.figura_barras_ranking(
+                        df_mapa_ciudad, 'Ciudad',
+                        f'Cantidad de Apartamentos en Construcción por Ciudad - Periodo {ultimo_periodo_ciudad}',
+                        'Cantidad de Viviendas', "Cantidad de Viviendas en Construcción",
+                        altura_minima=800, alto_fila=20
+                    ))
                     st.plotly_chart(fig_ciudad, use_container_width=True)
                     
                     # Gráfico de pastel - Top 10 ciudades (proporción) - Apartamentos
-                    df_top_ciudad_pie_apt = df_mapa_ciudad.nlargest(10, 'Indice')
-                    fig_pie_ciudad_apt = px.pie(
-                        df_top_ciudad_pie_apt,
-                        values='Indice',
-                        names='Ciudad',
-                        title=f'Top 10 Ciudades - Proporción de Apartamentos en Construcción - Periodo {ultima_col_ciudad}',
-                        color_discrete_sequence=px.colors.sequential.RdBu
-                    )
-                    fig_pie_ciudad_apt.update_traces(
-                        textposition='inside',
-                        textinfo='percent+label',
-                        hovertemplate='<b>%{label}</b><br>Índice: %{value:.2f}<br>Porcentaje: %{percent}<extra></extra>'
-                    )
-                    fig_pie_ciudad_apt.update_layout(
-                        template="plotly_dark",
-                        height=500,
-                        showlegend=True,
-                        legend=dict(
-                            orientation="v",
-                            yanchor="middle",
-                            y=0.5,
-                            xanchor="left",
-                            x=1.02
-                        )
-                    )
+                    fig_pie_ciudad_apt = figura_corte(ARCHIVO_CIUDADES, obras_aptos, 'torta', lambda: graficos.figura_torta_top(
+                        top_corte(obras_aptos, 10, ['Ciudad', 'Indice']), 'Ciudad',
+                        f'Top 10 Ciudades - Proporción de Apartamentos en Construcción - Periodo {ultimo_periodo_ciudad}'
+                    ))
                     st.plotly_chart(fig_pie_ciudad_apt, use_container_width=True)
 
                     # Top ciudades
                     st.write("### Top 15 Ciudades - Cantidad de Apartamentos en Construcción")
-                    df_top_ciudad = df_mapa_ciudad.nlargest(15, 'Indice').reset_index(drop=True)
+                    df_top_ciudad = top_corte(obras_aptos, 15, ['Ciudad', 'Indice'])
                     col1, col2 = st.columns(2)
                     with col1:
                         st.dataframe(df_top_ciudad.head(8).style.format({'Indice': '{:.2f}'}).hide(axis="index"), use_container_width=True)
@@ -926,7 +1006,8 @@ elif st.session_state.vista_actual == "Departamento":
             else:
                 st.warning("⚠️ No hay datos de ciudades disponibles para el mapa de calor.")
 
-elif st.session_state.vista_actual == "Total y Modelo":
+@st.fragment
+def vista_total_modelo():
     st.subheader("🏭 Análisis de la vivienda total en los últimos 20 años")
     st.markdown("*Movimiento y predicción con modelo ARMA para el índice de crecimiento en el precio de la vivienda en Colombia*")
     
@@ -984,7 +1065,8 @@ elif st.session_state.vista_actual == "Total y Modelo":
             st.metric("Mínimo Histórico", f"{df['Total'].min():.2f}")
         
         # Tabs adicionales
-        tab1, tab2, tab3 = st.tabs(["📈 Análisis Estadístico", "📋 Datos Completos", "🔮 Modelo ARMA"])
+        tab1, tab2, tab3, tab4 = st.tabs(["📈 Análisis Estadístico", "📋 Datos Completos", "🔮 Modelo ARMA",
+                                          "🔭 Próximo Trimestre"])
         
         with tab1:
             st.write("### Estadísticas Descriptivas")
@@ -1024,40 +1106,51 @@ elif st.session_state.vista_actual == "Total y Modelo":
             st.write("### 🔮 Modelo ARMA - Análisis Completo")
             st.info("💡 Haz clic en cada sección para expandir y ver los detalles del análisis")
             
+            # st.expander no difiere la ejecución: en modo bajo demanda cada sección
+            # espera a que el usuario la pida y las ya calculadas quedan en session_state
+            st.toggle(
+                "⚡ Calcular cada sección solo cuando la abra",
+                key="arma_bajo_demanda",
+                help="Útil para revisar una sola prueba sin pagar el costo de todas las demás"
+            )
+            
             # ============================================
             # 1. TEST DE ESTACIONARIEDAD (SOLO ADF)
             # ============================================
             with st.expander("1️⃣ Test de Estacionariedad", expanded=False):
                 st.subheader("Test de Estacionariedad - ADF")
                 
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("#### Test ADF (Augmented Dickey-Fuller)")
-                    result_adf = adfuller(df['Total'].dropna())
+                if seccion_calculada("adf"):
+                    diag = diagnosticos_serie(df['Total'])
                     
-                    st.metric("ADF Statistic", f"{result_adf[0]:.6f}")
-                    st.metric("p-value", f"{result_adf[1]:.6f}")
-                    st.metric("Lags usados", result_adf[2])
-                    st.metric("Observaciones", result_adf[3])
-                    
-                    if result_adf[1] < 0.05:
-                        st.success("✅ La serie ES estacionaria (rechazamos H0)")
-                    else:
-                        st.warning("⚠️ La serie NO es estacionaria (no rechazamos H0)")
-                
-                with col2:
-                    st.write("#### Valores Críticos ADF")
-                    st.write("Comparación del estadístico con valores críticos:")
+                    col1, col2 = st.columns(2)
                     
-                    for key, val in result_adf[4].items():
-                        st.metric(f"Nivel {key}", f"{val:.4f}")
+                    with col1:
+                        st.write("#### Test ADF (Augmented Dickey-Fuller)")
+                        adf = diag["adf"]
+                        
+                        st.metric("ADF Statistic", f"{adf['estadistico']:.6f}")
+                        st.metric("p-value", f"{adf['pvalue']:.6f}")
+                        st.metric("Lags usados", adf['rezagos'])
+                        st.metric("Observaciones", adf['observaciones'])
+                        
+                        if adf['pvalue'] < 0.05:
+                            st.success("✅ La serie ES estacionaria (rechazamos H0)")
+                        else:
+                            st.warning("⚠️ La serie NO es estacionaria (no rechazamos H0)")
                     
-                    st.info("""
-                    **Información:**
-                    - Si ADF Statistic < Valores Críticos → Serie estacionaria
-                    - Si p-value < 0.05 → Rechazamos H0 (la serie es estacionaria)
-                    """)
+                    with col2:
+                        st.write("#### Valores Críticos ADF")
+                        st.write("Comparación del estadístico con valores críticos:")
+                        
+                        for key, val in adf['criticos'].items():
+                            st.metric(f"Nivel {key}", f"{val:.4f}")
+                        
+                        st.info("""
+                        **Información:**
+                        - Si ADF Statistic < Valores Críticos → Serie estacionaria
+                        - Si p-value < 0.05 → Rechazamos H0 (la serie es estacionaria)
+                        """)
             
             # ============================================
             # 2. AJUSTE DEL MODELO ARMA(1,1)
@@ -1065,31 +1158,33 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("2️⃣ Modelo ARMA(1,1) Ajustado", expanded=False):
                 st.subheader("Modelo ARMA(1,1) Ajustado")
                 
-                # Ajustar el modelo
-                res = ARIMA(df['Total'], order=(1,0,1)).fit()
-                
-                # Mostrar resumen del modelo
-                with st.expander("📊 Ver resumen completo del modelo"):
-                    st.text(str(res.summary()))
-                
-                # Coeficientes del modelo
-                st.write("#### Coeficientes del Modelo")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("AR(1) - φ₁", f"{res.arparams[0]:.6f}")
-                with col2:
-                    st.metric("MA(1) - θ₁", f"{res.maparams[0]:.6f}")
-                with col3:
-                    st.metric("Intercepto", f"{res.params['const']:.6f}")
-                
-                st.write("#### Criterios de Información")
-                col1, col2, col3 = st.columns(3)
-                with col1:
-                    st.metric("AIC", f"{res.aic:.4f}")
-                with col2:
-                    st.metric("BIC", f"{res.bic:.4f}")
-                with col3:
-                    st.metric("Log-Likelihood", f"{res.llf:.4f}")
+                if seccion_calculada("modelo"):
+                    diag = diagnosticos_serie(df['Total'])
+                    
+                    modelo = diag["modelo"]
+                    
+                    # Mostrar resumen del modelo
+                    with st.expander("📊 Ver resumen completo del modelo"):
+                        st.text(modelo['resumen'])
+                    
+                    # Coeficientes del modelo
+                    st.write("#### Coeficientes del Modelo")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("AR(1) - φ₁", f"{modelo['ar'][0]:.6f}")
+                    with col2:
+                        st.metric("MA(1) - θ₁", f"{modelo['ma'][0]:.6f}")
+                    with col3:
+                        st.metric("Intercepto", f"{modelo['const']:.6f}")
+                    
+                    st.write("#### Criterios de Información")
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("AIC", f"{modelo['aic']:.4f}")
+                    with col2:
+                        st.metric("BIC", f"{modelo['bic']:.4f}")
+                    with col3:
+                        st.metric("Log-Likelihood", f"{modelo['llf']:.4f}")
             
             # ============================================
             # 3. ANÁLISIS DE RESIDUOS
@@ -1097,24 +1192,23 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("3️⃣ Análisis de Residuos", expanded=False):
                 st.subheader("Análisis de Residuos")
                 
-                # Calcular residuos solo si el modelo ya fue ajustado
-                if 'res' not in locals():
-                    res = ARIMA(df['Total'], order=(1,0,1)).fit()
-                
-                resid = res.resid.dropna()
-                
-                st.write("#### Estadísticas de Residuos")
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Media", f"{resid.mean():.8f}")
-                with col2:
-                    st.metric("Desviación Estándar", f"{resid.std():.6f}")
-                with col3:
-                    st.metric("Sesgo", f"{resid.skew():.6f}")
-                with col4:
-                    st.metric("Curtosis", f"{resid.kurtosis():.6f}")
-                
-                st.info("📊 Los residuos deben tener media cercana a cero y comportarse como ruido blanco")
+                if seccion_calculada("residuos"):
+                    diag = diagnosticos_serie(df['Total'])
+                    
+                    residuos = diag["residuos"]
+                    
+                    st.write("#### Estadísticas de Residuos")
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Media", f"{residuos['media']:.8f}")
+                    with col2:
+                        st.metric("Desviación Estándar", f"{residuos['std']:.6f}")
+                    with col3:
+                        st.metric("Sesgo", f"{residuos['sesgo']:.6f}")
+                    with col4:
+                        st.metric("Curtosis", f"{residuos['curtosis']:.6f}")
+                    
+                    st.info("📊 Los residuos deben tener media cercana a cero y comportarse como ruido blanco")
             
             # ============================================
             # 4. TEST DE LJUNG-BOX
@@ -1122,54 +1216,36 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("4️⃣ Test de Ljung-Box (Autocorrelación de Residuos)", expanded=False):
                 st.subheader("Test de Ljung-Box - Autocorrelación de Residuos")
                 
-                if 'resid' not in locals():
-                    res = ARIMA(df['Total'], order=(1,0,1)).fit()
-                    resid = res.resid.dropna()
-                
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    st.write("#### Resultados del Test")
-                    lags = [4, 8, 12, 16, 20]
-                    lb = acorr_ljungbox(resid, lags=lags, return_df=True)
-                    st.dataframe(lb.style.format("{:.6f}"), use_container_width=True)
-                    
-                    # Interpretación
-                    if (lb['lb_pvalue'] > 0.05).all():
-                        st.success("✅ No hay evidencia de autocorrelación en los residuos")
-                    else:
-                        st.warning("⚠️ Existe autocorrelación significativa en algunos rezagos")
+                if seccion_calculada("ljung_box"):
+                    diag = diagnosticos_serie(df['Total'])
                     
-                    st.info("""
-                    **Información:**
-                    - **H0:** No hay autocorrelación en los residuos (ruido blanco)
-                    - **H1:** Existe autocorrelación en los residuos
-                    - Si p-value > 0.05 → No rechazamos H0 (residuos son ruido blanco ✓)
-                    - Si p-value < 0.05 → Rechazamos H0 (hay autocorrelación)
-                    """)
-                
-                with col2:
-                    st.write("#### ACF de los Residuos")
-                    fig_acf, ax = plt.subplots(figsize=(8, 4))
-                    plot_acf(resid, lags=20, ax=ax, title='')
-                    ax.set_title('ACF de los residuos ARMA(1,1)', fontsize=12, color='white', pad=10)
-                    ax.set_xlabel('Rezagos', fontsize=10, color='white')
-                    ax.set_ylabel('Autocorrelación', fontsize=10, color='white')
-                    ax.set_facecolor('#1a1a2e')
-                    fig_acf.patch.set_facecolor('#1a1a2e')
-                    ax.tick_params(colors='white')
-                    ax.xaxis.label.set_color('white')
-                    ax.yaxis.label.set_color('white')
-                    ax.grid(True, alpha=0.2, color='white')
-                    
-                    # Mejorar visibilidad de las líneas de confianza
-                    for line in ax.get_lines()[1:]:
-                        line.set_color('#00c4ff')
-                        line.set_linewidth(1.5)
-                        line.set_alpha(0.7)
-                    
-                    st.pyplot(fig_acf)
-                    plt.close()
+                    col1, col2 = st.columns([1, 1])
+                    
+                    with col1:
+                        st.write("#### Resultados del Test")
+                        lb = pd.DataFrame(
+                            {'lb_stat': diag['ljung_box']['lb_stat'], 'lb_pvalue': diag['ljung_box']['lb_pvalue']},
+                            index=diag['ljung_box']['rezagos']
+                        )
+                        st.dataframe(lb.style.format("{:.6f}"), use_container_width=True)
+                        
+                        # Interpretación
+                        if (lb['lb_pvalue'] > 0.05).all():
+                            st.success("✅ No hay evidencia de autocorrelación en los residuos")
+                        else:
+                            st.warning("⚠️ Existe autocorrelación significativa en algunos rezagos")
+                        
+                        st.info("""
+                        **Información:**
+                        - **H0:** No hay autocorrelación en los residuos (ruido blanco)
+                        - **H1:** Existe autocorrelación en los residuos
+                        - Si p-value > 0.05 → No rechazamos H0 (residuos son ruido blanco ✓)
+                        - Si p-value < 0.05 → Rechazamos H0 (hay autocorrelación)
+                        """)
+                    
+                    with col2:
+                        st.write("#### ACF de los Residuos")
+                        st.plotly_chart(figura_arma(modelos.huella_serie(df['Total']), 'acf_residuos', df['Total']), use_container_width=True)
             
             # ============================================
             # 5. ANÁLISIS ACF Y PACF PARA ESTACIONALIDAD
@@ -1177,92 +1253,63 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("5️⃣ Análisis ACF y PACF - Identificación de Patrones y Estacionalidad", expanded=False):
                 st.subheader("Análisis ACF y PACF - Identificación de Patrones y Estacionalidad")
                 
-                st.info("""
-                **ACF y PACF para detectar estacionalidad:**
-                - **ACF (Autocorrelación):** Muestra la correlación de la serie con sus rezagos. Picos significativos en múltiplos de 4 (trimestres) indican estacionalidad anual.
-                - **PACF (Autocorrelación Parcial):** Muestra la correlación directa con cada rezago, eliminando efectos intermedios.
-                - **Estacionalidad trimestral:** Buscar picos en los rezagos 4, 8, 12, 16... (cada 4 trimestres = 1 año)
-                """)
-                
-                # ACF y PACF de la serie original
-                st.write("### 📊 ACF y PACF de la Serie Original")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("#### ACF - Autocorrelación")
-                    fig_acf_original, ax1 = plt.subplots(figsize=(10, 5))
-                    plot_acf(df['Total'].dropna(), lags=24, ax=ax1, title='')
-                    ax1.set_title('ACF de la Serie Original', fontsize=14, color='white', pad=15)
-                    ax1.set_xlabel('Rezagos (Trimestres)', fontsize=11, color='white')
-                    ax1.set_ylabel('Autocorrelación', fontsize=11, color='white')
-                    ax1.set_facecolor('#1a1a2e')
-                    fig_acf_original.patch.set_facecolor('#1a1a2e')
-                    ax1.tick_params(colors='white')
-                    ax1.grid(True, alpha=0.2, color='white')
-                    
-                    # Marcar rezagos estacionales
-                    for lag in [4, 8, 12, 16, 20, 24]:
-                        ax1.axvline(x=lag, color='#ff6b6b', linestyle='--', alpha=0.5, linewidth=1)
-                    
-                    st.pyplot(fig_acf_original)
-                    plt.close()
-                    
-                    st.caption("🔴 Líneas rojas marcan rezagos estacionales (múltiplos de 4 trimestres)")
-                
-                with col2:
-                    st.write("#### PACF - Autocorrelación Parcial")
-                    fig_pacf_original, ax2 = plt.subplots(figsize=(10, 5))
-                    plot_pacf(df['Total'].dropna(), lags=24, ax=ax2, title='', method='ywm')
-                    ax2.set_title('PACF de la Serie Original', fontsize=14, color='white', pad=15)
-                    ax2.set_xlabel('Rezagos (Trimestres)', fontsize=11, color='white')
-                    ax2.set_ylabel('Autocorrelación Parcial', fontsize=11, color='white')
-                    ax2.set_facecolor('#1a1a2e')
-                    fig_pacf_original.patch.set_facecolor('#1a1a2e')
-                    ax2.tick_params(colors='white')
-                    ax2.grid(True, alpha=0.2, color='white')
-                    
-                    # Marcar rezagos estacionales
-                    for lag in [4, 8, 12, 16, 20, 24]:
-                        ax2.axvline(x=lag, color='#ff6b6b', linestyle='--', alpha=0.5, linewidth=1)
-                    
-                    st.pyplot(fig_pacf_original)
-                    plt.close()
-                    
-                    st.caption("🔴 Líneas rojas marcan rezagos estacionales (múltiplos de 4 trimestres)")
-                
-                # Interpretación automática de estacionalidad
-                st.write("### 🔍 Interpretación de Estacionalidad")
-                
-                from statsmodels.tsa.stattools import acf
-                acf_values = acf(df['Total'].dropna(), nlags=24)
-                
-                # Detectar picos en rezagos estacionales
-                seasonal_lags = [4, 8, 12, 16, 20]
-                seasonal_peaks = [lag for lag in seasonal_lags if abs(acf_values[lag]) > 0.3]
-                
-                col1, col2 = st.columns([2, 1])
-                
-                with col1:
-                    if len(seasonal_peaks) > 0:
-                        st.warning(f"""
-                        ⚠️ **Posible estacionalidad detectada** en los rezagos: {seasonal_peaks}
-                        
-                        Esto sugiere que existe un patrón que se repite cada {seasonal_peaks[0]} trimestres (aproximadamente cada año).
+                if seccion_calculada("acf_pacf"):
+                    diag = diagnosticos_serie(df['Total'])
+                    
+                    st.info("""
+                    **ACF y PACF para detectar estacionalidad:**
+                    - **ACF (Autocorrelación):** Muestra la correlación de la serie con sus rezagos. Picos significativos en múltiplos de 4 (trimestres) indican estacionalidad anual.
+                    - **PACF (Autocorrelación Parcial):** Muestra la correlación directa con cada rezago, eliminando efectos intermedios.
+                    - **Estacionalidad trimestral:** Buscar picos en los rezagos 4, 8, 12, 16... (cada 4 trimestres = 1 año)
+                    """)
+                    
+                    # ACF y PACF de la serie original
+                    st.write("### 📊 ACF y PACF de la Serie Original")
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.write("#### ACF - Autocorrelación")
+                        st.plotly_chart(figura_arma(modelos.huella_serie(df['Total']), 'acf', df['Total']), use_container_width=True)
                         
-                        **Recomendación:** Considerar un modelo SARIMA (Seasonal ARIMA) en lugar de ARMA simple.
-                        """)
-                    else:
-                        st.success("""
-                        ✅ **No se detecta estacionalidad significativa** en la serie.
+                        st.caption("🔴 Líneas rojas marcan rezagos estacionales (múltiplos de 4 trimestres)")
+                    
+                    with col2:
+                        st.write("#### PACF - Autocorrelación Parcial")
+                        st.plotly_chart(figura_arma(modelos.huella_serie(df['Total']), 'pacf', df['Total']), use_container_width=True)
                         
-                        El modelo ARMA(1,1) es apropiado para esta serie temporal.
-                        """)
-                
-                with col2:
-                    st.metric("Rezagos Estacionales Detectados", len(seasonal_peaks))
-                    if len(seasonal_peaks) > 0:
-                        st.metric("Periodo Estacional", f"{seasonal_peaks[0]} trimestres")
-                    st.metric("Total Rezagos Analizados", 24)
+                        st.caption("🔴 Líneas rojas marcan rezagos estacionales (múltiplos de 4 trimestres)")
+                    
+                    # Interpretación automática de estacionalidad
+                    st.write("### 🔍 Interpretación de Estacionalidad")
+                    
+                    # Picos en rezagos estacionales (|ACF| > 0.3), detectados en el paquete
+                    seasonal_peaks = diag['estacionalidad']['picos']
+                    
+                    col1, col2 = st.columns([2, 1])
+                    
+                    with col1:
+                        if len(seasonal_peaks) > 0:
+                            st.warning(f"""
+                            ⚠️ **Posible estacionalidad detectada** en los rezagos: {seasonal_peaks}
+                            
+                            Esto sugiere que existe un patrón que se repite cada {seasonal_peaks[0]} trimestres (aproximadamente cada año).
+                            
+                            **Recomendación:** Considerar un modelo SARIMA (Seasonal ARIMA) en lugar de ARMA simple.
+                            La sección 🔟 busca el orden (p,d,q)(P,D,Q,4) con menor AIC/BIC y la
+                            1️⃣1️⃣ descompone la serie con STL y compara un SARIMA con el ARMA(1,1).
+                            """)
+                        else:
+                            st.success("""
+                            ✅ **No se detecta estacionalidad significativa** en la serie.
+                            
+                            El modelo ARMA(1,1) es apropiado para esta serie temporal.
+                            """)
+                    
+                    with col2:
+                        st.metric("Rezagos Estacionales Detectados", len(seasonal_peaks))
+                        if len(seasonal_peaks) > 0:
+                            st.metric("Periodo Estacional", f"{seasonal_peaks[0]} trimestres")
+                        st.metric("Total Rezagos Analizados", 24)
             
             # ============================================
             # 6. TEST DE JARQUE-BERA (NORMALIDAD)
@@ -1270,49 +1317,38 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("6️⃣ Test de Jarque-Bera (Normalidad de Residuos)", expanded=False):
                 st.subheader("Test de Jarque-Bera - Normalidad de Residuos")
                 
-                if 'resid' not in locals():
-                    res = ARIMA(df['Total'], order=(1,0,1)).fit()
-                    resid = res.resid.dropna()
-                
-                col1, col2 = st.columns([1, 1])
-                
-                with col1:
-                    jb_stat, jb_p, skew, kurtosis = jarque_bera(resid)
+                if seccion_calculada("jarque_bera"):
+                    diag = diagnosticos_serie(df['Total'])
                     
-                    st.write("#### Resultados del Test")
-                    st.metric("Estadístico JB", f"{jb_stat:.6f}")
-                    st.metric("p-value", f"{jb_p:.6f}")
-                    st.metric("Sesgo", f"{skew:.6f}")
-                    st.metric("Curtosis", f"{kurtosis:.6f}")
+                    col1, col2 = st.columns([1, 1])
                     
-                    if jb_p > 0.05:
-                        st.success("✅ Los residuos siguen una distribución normal")
-                    else:
-                        st.warning("⚠️ Los residuos NO siguen una distribución normal perfecta")
+                    with col1:
+                        jb = diag['jarque_bera']
+                        jb_stat, jb_p, skew, kurtosis = jb['estadistico'], jb['pvalue'], jb['sesgo'], jb['curtosis']
+                        
+                        st.write("#### Resultados del Test")
+                        st.metric("Estadístico JB", f"{jb_stat:.6f}")
+                        st.metric("p-value", f"{jb_p:.6f}")
+                        st.metric("Sesgo", f"{skew:.6f}")
+                        st.metric("Curtosis", f"{kurtosis:.6f}")
+                        
+                        if jb_p > 0.05:
+                            st.success("✅ Los residuos siguen una distribución normal")
+                        else:
+                            st.warning("⚠️ Los residuos NO siguen una distribución normal perfecta")
+                        
+                        st.info("""
+                        **Información:**
+                        - **H0:** Los residuos siguen una distribución normal
+                        - **H1:** Los residuos NO siguen una distribución normal
+                        - Si p-value > 0.05 → No rechazamos H0 (residuos normales ✓)
+                        - Si p-value < 0.05 → Rechazamos H0 (residuos no normales)
+                        - Sesgo cercano a 0 y curtosis cercana a 3 indican normalidad
+                        """)
                     
-                    st.info("""
-                    **Información:**
-                    - **H0:** Los residuos siguen una distribución normal
-                    - **H1:** Los residuos NO siguen una distribución normal
-                    - Si p-value > 0.05 → No rechazamos H0 (residuos normales ✓)
-                    - Si p-value < 0.05 → Rechazamos H0 (residuos no normales)
-                    - Sesgo cercano a 0 y curtosis cercana a 3 indican normalidad
-                    """)
-                
-                with col2:
-                    st.write("#### QQ-Plot")
-                    fig_qq, ax = plt.subplots(figsize=(6, 6))
-                    sm.qqplot(resid, line='s', ax=ax)
-                    ax.set_title('QQ-plot de los residuos', color='white')
-                    ax.set_facecolor('#1a1a2e')
-                    fig_qq.patch.set_facecolor('#1a1a2e')
-                    ax.tick_params(colors='white')
-                    ax.xaxis.label.set_color('white')
-                    ax.yaxis.label.set_color('white')
-                    ax.get_lines()[0].set_color('#43e97b')
-                    ax.get_lines()[1].set_color('#ff6b6b')
-                    st.pyplot(fig_qq)
-                    plt.close()
+                    with col2:
+                        st.write("#### QQ-Plot")
+                        st.plotly_chart(figura_arma(modelos.huella_serie(df['Total']), 'qq', df['Total']), use_container_width=True)
             
             # ============================================
             # 7. TEST ARCH (HETEROCEDASTICIDAD)
@@ -1320,33 +1356,32 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("7️⃣ Test ARCH-LM (Heterocedasticidad)", expanded=False):
                 st.subheader("Test ARCH-LM - Heterocedasticidad")
                 
-                if 'resid' not in locals():
-                    res = ARIMA(df['Total'], order=(1,0,1)).fit()
-                    resid = res.resid.dropna()
-                
-                arch_res = het_arch(resid, nlags=4)
-                
-                col1, col2 = st.columns(2)
-                with col1:
-                    st.metric("Estadístico LM", f"{arch_res[0]:.6f}")
-                    st.metric("p-value", f"{arch_res[1]:.6f}")
-                with col2:
-                    st.metric("Estadístico F", f"{arch_res[2]:.6f}")
-                    st.metric("p-value F", f"{arch_res[3]:.6f}")
-                
-                if arch_res[1] > 0.05:
-                    st.success("✅ No hay evidencia de heterocedasticidad condicional (efecto ARCH)")
-                else:
-                    st.warning("⚠️ Existe heterocedasticidad condicional (efecto ARCH presente)")
-                
-                st.info("""
-                **Información:**
-                - **H0:** No hay efecto ARCH (homocedasticidad - varianza constante)
-                - **H1:** Existe efecto ARCH (heterocedasticidad condicional)
-                - Si p-value > 0.05 → No rechazamos H0 (varianza constante ✓)
-                - Si p-value < 0.05 → Rechazamos H0 (la varianza cambia en el tiempo)
-                - Efecto ARCH indica que la volatilidad de los errores varía con el tiempo
-                """)
+                if seccion_calculada("arch"):
+                    diag = diagnosticos_serie(df['Total'])
+                    
+                    arch = diag['arch']
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("Estadístico LM", f"{arch['lm']:.6f}")
+                        st.metric("p-value", f"{arch['lm_pvalue']:.6f}")
+                    with col2:
+                        st.metric("Estadístico F", f"{arch['f']:.6f}")
+                        st.metric("p-value F", f"{arch['f_pvalue']:.6f}")
+                    
+                    if arch['lm_pvalue'] > 0.05:
+                        st.success("✅ No hay evidencia de heterocedasticidad condicional (efecto ARCH)")
+                    else:
+                        st.warning("⚠️ Existe heterocedasticidad condicional (efecto ARCH presente)")
+                    
+                    st.info("""
+                    **Información:**
+                    - **H0:** No hay efecto ARCH (homocedasticidad - varianza constante)
+                    - **H1:** Existe efecto ARCH (heterocedasticidad condicional)
+                    - Si p-value > 0.05 → No rechazamos H0 (varianza constante ✓)
+                    - Si p-value < 0.05 → Rechazamos H0 (la varianza cambia en el tiempo)
+                    - Efecto ARCH indica que la volatilidad de los errores varía con el tiempo
+                    """)
             
             # ============================================
             # 8. ESTABILIDAD E INVERTIBILIDAD
@@ -1354,64 +1389,66 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("8️⃣ Estabilidad e Invertibilidad del Modelo", expanded=False):
                 st.subheader("Estabilidad e Invertibilidad del Modelo")
                 
-                if 'res' not in locals():
-                    res = ARIMA(df['Total'], order=(1,0,1)).fit()
-                
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("#### Test de Estabilidad (Raíces AR)")
-                    try:
-                        arparams = res.arparams
-                        ar_roots = res.arroots
-                        mods_ar_roots = np.abs(ar_roots)
-                        
-                        st.metric("Parámetro AR (φ₁)", f"{arparams[0]:.6f}")
-                        st.metric("Raíz AR (z)", f"{ar_roots[0]:.6f}")
-                        st.metric("Módulo |z|", f"{mods_ar_roots[0]:.6f}")
-                        
-                        ar_ok = all(mods_ar_roots > 1.0)
-                        if ar_ok:
-                            st.success(f"✅ Modelo ESTABLE (todas las raíces AR |z| > 1)")
-                        else:
-                            st.error(f"❌ Modelo INESTABLE (alguna raíz AR tiene |z| ≤ 1)")
-                        
-                        st.info("""
-                        **Información:**
-                        - **Condición de estabilidad:** |z| > 1
-                        - Si todas las raíces AR están fuera del círculo unitario → Modelo estable ✓
-                        - Un modelo estable garantiza que los efectos de shocks se disipan con el tiempo
-                        """)
-                        
-                    except Exception as e:
-                        st.error(f"Error al calcular estabilidad: {e}")
-                
-                with col2:
-                    st.write("#### Test de Invertibilidad (Raíces MA)")
-                    try:
-                        maparams = res.maparams
-                        ma_roots = res.maroots
-                        mods_ma_roots = np.abs(ma_roots)
-                        
-                        st.metric("Parámetro MA (θ₁)", f"{maparams[0]:.6f}")
-                        st.metric("Raíz MA (z)", f"{ma_roots[0]:.6f}")
-                        st.metric("Módulo |z|", f"{mods_ma_roots[0]:.6f}")
-                        
-                        ma_ok = all(mods_ma_roots > 1.0)
-                        if ma_ok:
-                            st.success(f"✅ Modelo INVERTIBLE (todas las raíces MA |z| > 1)")
-                        else:
-                            st.error(f"❌ Modelo NO INVERTIBLE (alguna raíz MA tiene |z| ≤ 1)")
-                        
-                        st.info("""
-                        **Información:**
-                        - **Condición de invertibilidad:** |z| > 1
-                        - Si todas las raíces MA están fuera del círculo unitario → Modelo invertible ✓
-                        - Un modelo invertible permite representar el proceso como un AR(∞)
-                        """)
-                        
-                    except Exception as e:
-                        st.error(f"Error al calcular invertibilidad: {e}")
+                if seccion_calculada("raices"):
+                    diag = diagnosticos_serie(df['Total'])
+                    
+                    modelo = diag['modelo']
+                    
+                    col1, col2 = st.columns(2)
+                    
+                    with col1:
+                        st.write("#### Test de Estabilidad (Raíces AR)")
+                        try:
+                            arparams = modelo['ar']
+                            ar_roots = np.real_if_close(np.asarray(modelo['raices_ar']['real']) + 1j * np.asarray(modelo['raices_ar']['imag']))
+                            mods_ar_roots = np.asarray(modelo['raices_ar']['modulo'])
+                            
+                            st.metric("Parámetro AR (φ₁)", f"{arparams[0]:.6f}")
+                            st.metric("Raíz AR (z)", f"{ar_roots[0]:.6f}")
+                            st.metric("Módulo |z|", f"{mods_ar_roots[0]:.6f}")
+                            
+                            ar_ok = all(mods_ar_roots > 1.0)
+                            if ar_ok:
+                                st.success(f"✅ Modelo ESTABLE (todas las raíces AR |z| > 1)")
+                            else:
+                                st.error(f"❌ Modelo INESTABLE (alguna raíz AR tiene |z| ≤ 1)")
+                            
+                            st.info("""
+                            **Información:**
+                            - **Condición de estabilidad:** |z| > 1
+                            - Si todas las raíces AR están fuera del círculo unitario → Modelo estable ✓
+                            - Un modelo estable garantiza que los efectos de shocks se disipan con el tiempo
+                            """)
+                            
+                        except Exception as e:
+                            st.error(f"Error al calcular estabilidad: {e}")
+                    
+                    with col2:
+                        st.write("#### Test de Invertibilidad (Raíces MA)")
+                        try:
+                            maparams = modelo['ma']
+                            ma_roots = np.real_if_close(np.asarray(modelo['raices_ma']['real']) + 1j * np.asarray(modelo['raices_ma']['imag']))
+                            mods_ma_roots = np.asarray(modelo['raices_ma']['modulo'])
+                            
+                            st.metric("Parámetro MA (θ₁)", f"{maparams[0]:.6f}")
+                            st.metric("Raíz MA (z)", f"{ma_roots[0]:.6f}")
+                            st.metric("Módulo |z|", f"{mods_ma_roots[0]:.6f}")
+                            
+                            ma_ok = all(mods_ma_roots > 1.0)
+                            if ma_ok:
+                                st.success(f"✅ Modelo INVERTIBLE (todas las raíces MA |z| > 1)")
+                            else:
+                                st.error(f"❌ Modelo NO INVERTIBLE (alguna raíz MA tiene |z| ≤ 1)")
+                            
+                            st.info("""
+                            **Información:**
+                            - **Condición de invertibilidad:** |z| > 1
+                            - Si todas las raíces MA están fuera del círculo unitario → Modelo invertible ✓
+                            - Un modelo invertible permite representar el proceso como un AR(∞)
+                            """)
+                            
+                        except Exception as e:
+                            st.error(f"Error al calcular invertibilidad: {e}")
             
             # ============================================
             # 9. PRONÓSTICO Y VALIDACIÓN
@@ -1419,73 +1456,248 @@ elif st.session_state.vista_actual == "Total y Modelo":
             with st.expander("9️⃣ Pronóstico y Validación del Modelo", expanded=False):
                 st.subheader("Pronóstico y Validación del Modelo")
                 
-                # Train/Test Split
-                h = 4
-                y = df['Total']
-                train, test = y[:-h], y[-h:]
-                
-                # Ajustar modelo en train
-                model_train = ARIMA(train, order=(1,0,1)).fit()
-                
-                # Pronóstico
-                fc = model_train.get_forecast(steps=h)
-                pred = fc.predicted_mean
-                conf = fc.conf_int()
-                
-                # Métricas
-                rmse = np.sqrt(mean_squared_error(test, pred))
-                mae = mean_absolute_error(test, pred)
-                
-                col1, col2, col3, col4 = st.columns(4)
-                with col1:
-                    st.metric("Tamaño Train", len(train))
-                with col2:
-                    st.metric("Tamaño Test", len(test))
-                with col3:
-                    st.metric("RMSE", f"{rmse:.6f}")
-                with col4:
-                    st.metric("MAE", f"{mae:.6f}")
-                
-                # Gráfico de pronóstico
-                st.write("#### Gráfico Train / Test / Forecast")
+                if seccion_calculada("pronostico"):
+                    # Train/Test Split: ajuste sin los últimos h trimestres (cacheado por versión de los datos)
+                    h = 4
+                    huella = modelos.huella_serie(df['Total'])
+                    validacion = validacion_arma(huella, h, df['Total'])
+                    test = np.asarray(validacion['test'])
+                    pred = np.asarray(validacion['pred'])
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Tamaño Train", len(validacion['train']))
+                    with col2:
+                        st.metric("Tamaño Test", len(test))
+                    with col3:
+                        st.metric("RMSE", f"{validacion['rmse']:.6f}")
+                    with col4:
+                        st.metric("MAE", f"{validacion['mae']:.6f}")
+                    
+                    # Gráfico de pronóstico
+                    st.write("#### Gráfico Train / Test / Forecast")
+                    st.plotly_chart(figura_arma(huella, 'pronostico', df['Total']), use_container_width=True)
+                    
+                    # Tabla de comparación
+                    st.write("#### Comparación: Valores Reales vs Pronósticos")
+                    comparison_df = pd.DataFrame({
+                        'Periodo': validacion['test_x'],
+                        'Real': test,
+                        'Pronóstico': pred,
+                        'Error': test - pred,
+                        'Error %': ((test - pred) / test * 100)
+                    })
+                    st.dataframe(comparison_df.style.format({
+                        'Real': '{:.4f}',
+                        'Pronóstico': '{:.4f}',
+                        'Error': '{:.4f}',
+                        'Error %': '{:.2f}%'
+                    }), use_container_width=True)
                 
-                fig_forecast, ax = plt.subplots(figsize=(14, 6))
+                # Abanico: cuantiles de trayectorias simuladas con los residuos del modelo
+                st.write("#### Abanico de Pronóstico (Bootstrap de Residuos)")
+                if seccion_calculada("abanico"):
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        horizonte_abanico = st.slider("Trimestres a pronosticar", 1, abanico.HORIZONTE_MAXIMO, 8,
+                                                      key="horizonte_abanico")
+                    with col2:
+                        niveles_abanico = st.multiselect("Bandas (% central)", abanico.NIVELES_DISPONIBLES,
+                                                         default=list(abanico.NIVELES), key="niveles_abanico")
+                    
+                    huella = modelos.huella_serie(df['Total'])
+                    simulacion = abanico_arma(huella, df['Total'])
+                    bandas = simulacion.bandas(niveles_abanico, horizonte_abanico)
+                    mediana = simulacion.mediana(horizonte_abanico)
+                    conf = registro_modelos().obtener(df['Total'], modelos.ORDEN_ARMA).get_forecast(
+                        steps=horizonte_abanico).conf_int()
+                    
+                    periodos = df['Periodo'].astype(str).to_numpy()
+                    historia = min(len(df), 24)
+                    futuro = abanico.periodos_siguientes(periodos[-1], horizonte_abanico)
+                    fig_abanico = graficos.figura_abanico(
+                        periodos[-historia:], df['Total'].to_numpy()[-historia:], futuro, mediana, bandas,
+                        analitico=(conf.iloc[:, 0].to_numpy(), conf.iloc[:, 1].to_numpy()),
+                        titulo=f"Abanico ARMA(1,1) - {horizonte_abanico} Trimestres"
+                    )
+                    st.plotly_chart(fig_abanico, use_container_width=True)
+                    st.caption(f"{len(simulacion.trayectorias):,} trayectorias con residuos remuestreados "
+                               f"(semilla {simulacion.semilla}); la línea punteada es el IC 95% de conf_int(), "
+                               f"que supone innovaciones normales")
+                    
+                    tabla_abanico = pd.DataFrame({'Periodo': futuro, 'Mediana': mediana})
+                    for nivel in sorted(bandas):
+                        tabla_abanico[f'Inferior {nivel}%'], tabla_abanico[f'Superior {nivel}%'] = bandas[nivel]
+                    st.dataframe(tabla_abanico.set_index('Periodo').style.format('{:.4f}'), use_container_width=True)
                 
-                train.plot(ax=ax, label='Train', color='#43e97b', linewidth=2)
-                test.plot(ax=ax, label='Test (Real)', marker='o', color='#ff6b6b', linewidth=2, markersize=8)
-                pred.plot(ax=ax, label='Forecast', marker='s', color='#00c4ff', linewidth=2, markersize=8)
+                # Backtest con origen móvil: un pronóstico desde cada trimestre de la serie
+                st.write("#### Backtest con Origen Móvil")
+                if seccion_calculada("backtest"):
+                    columnas_bt = [c for c in backtest.SERIES_BACKTEST if c in df.columns]
+                    serie_bt = st.radio("Serie", columnas_bt, horizontal=True, key="serie_backtest")
+                    bt = backtest_arma(modelos.huella_serie(df[serie_bt]), df[serie_bt])
+                    
+                    st.caption(f"Ventana creciente desde {backtest.INICIO_MINIMO} trimestres: {len(bt.origenes)} orígenes, "
+                               f"parámetros re-estimados cada {backtest.REAJUSTE_CADA} ({bt.reajustes} reajustes) "
+                               f"y filtrados con cada trimestre nuevo")
+                    col1, col2 = st.columns([1, 2])
+                    with col1:
+                        st.dataframe(bt.metricas().style.format({'RMSE': '{:.4f}', 'MAE': '{:.4f}'}),
+                                     use_container_width=True)
+                    with col2:
+                        # Error a 1 paso en cada trimestre pronosticado
+                        fig_bt = go.Figure()
+                        fig_bt.add_trace(go.Scatter(
+                            x=df['Periodo'].astype(str).to_numpy()[bt.origenes + 1],
+                            y=bt.errores[:, 0],
+                            mode='lines+markers',
+                            name='Error a 1 paso',
+                            line=dict(color='#00c4ff', width=2)
+                        ))
+                        fig_bt.add_hline(y=0, line_dash="dash", line_color="gray")
+                        fig_bt.update_layout(
+                            title="Error de Pronóstico a 1 Trimestre por Origen",
+                            xaxis_title="Periodo pronosticado",
+                            yaxis_title="Real - Pronóstico",
+                            template="plotly_dark",
+                            height=400,
+                            xaxis=dict(tickangle=-90)
+                        )
+                        st.plotly_chart(fig_bt, use_container_width=True)
+            
+            # ============================================
+            # 10. SELECCIÓN AUTOMÁTICA DE ORDEN (SARIMA)
+            # ============================================
+            with st.expander("🔟 Selección Automática de Orden (SARIMA)", expanded=False):
+                st.subheader("Búsqueda de (p,d,q)(P,D,Q,4) por Criterio de Información")
                 
-                ax.fill_between(conf.index, conf.iloc[:,0], conf.iloc[:,1], alpha=0.3, color='#00c4ff')
+                criterio = st.radio("Criterio", seleccion_orden.CRITERIOS, format_func=str.upper,
+                                    horizontal=True, key="criterio_orden")
+                huella = modelos.huella_serie(df['Total'])
                 
-                ax.set_title('Pronóstico ARMA(1,1) - Últimos 4 Trimestres', fontsize=16, color='white', pad=20)
-                ax.set_xlabel('Periodo', fontsize=12, color='white')
-                ax.set_ylabel('Índice de Vivienda', fontsize=12, color='white')
-                ax.legend(loc='best', fontsize=10)
-                ax.grid(True, alpha=0.3)
-                ax.set_facecolor('#1a1a2e')
-                fig_forecast.patch.set_facecolor('#1a1a2e')
-                ax.tick_params(colors='white')
-                plt.xticks(rotation=45)
-                plt.tight_layout()
+                # La búsqueda ajusta decenas de modelos: siempre se pide explícitamente
+                buscadas = st.session_state.setdefault("ordenes_buscados", set())
+                if (huella, criterio) not in buscadas and st.button("🔎 Buscar el mejor orden", key="buscar_orden"):
+                    buscadas.add((huella, criterio))
                 
-                st.pyplot(fig_forecast)
-                plt.close()
+                if (huella, criterio) in buscadas:
+                    with st.spinner("Ajustando candidatos..."):
+                        seleccion = seleccion_orden_arma(huella, criterio, df['Total'])
+                    columna = criterio.upper()
+                    fila_mejor = seleccion.tabla.iloc[0]
+                    d, D = seleccion.diferencias
+                    # El ARMA(1,1) solo es comparable por AIC/BIC si comparte las diferencias (d = D = 0)
+                    actual = seleccion_orden.texto_candidato(modelos.ORDEN_ARMA + (0, 0, 0))
+                    fila_actual = seleccion.tabla[seleccion.tabla['Orden'] == actual]
+                    
+                    col1, col2, col3, col4 = st.columns(4)
+                    with col1:
+                        st.metric("Mejor Orden", seleccion_orden.texto_candidato(seleccion.mejor))
+                    with col2:
+                        delta = (f"{fila_mejor[columna] - fila_actual[columna].iloc[0]:.2f} vs ARMA(1,1)"
+                                 if len(fila_actual) else None)
+                        st.metric(columna, f"{fila_mejor[columna]:.2f}", delta, delta_color="inverse")
+                    with col3:
+                        st.metric("Candidatos Evaluados", f"{seleccion.evaluados} / {seleccion.rejilla}",
+                                  f"{seleccion.podados} podados", delta_color="off")
+                    with col4:
+                        st.metric("Ajustes Nuevos", seleccion.ajustes,
+                                  f"{seleccion.aciertos} desde la caché", delta_color="off")
+                    st.caption(f"⏱️ {seleccion.segundos:.1f} s · {seleccion.arranques_previos} ajustes "
+                               f"arrancaron desde los parámetros de la versión anterior de los datos")
+                    st.info(f"""
+                    📐 Diferencias elegidas antes de la búsqueda: **d = {d}** (KPSS p = {seleccion.kpss_pvalue:.3f}
+                    tras diferenciar) y **D = {D}** (fuerza estacional STL {seleccion.fuerza_estacional:.3f};
+                    se diferencia si supera {seleccion_orden.UMBRAL_FUERZA_ESTACIONAL}). Cada diferencia cambia la
+                    muestra sobre la que se calcula la verosimilitud, así que el {columna} solo se compara entre
+                    candidatos con las mismas (d, D), y la tabla solo incluye esos
+                    {'' if (d, D) == (0, 0) else '(el ARMA(1,1), sin diferencias, no entra en la comparación)'}.
+                    """)
+                    
+                    st.write("#### Mejores Candidatos")
+                    st.dataframe(seleccion.tabla.head(10).style.format({'AIC': '{:.2f}', 'BIC': '{:.2f}'}),
+                                 use_container_width=True)
+            
+            # ============================================
+            # 11. ANÁLISIS ESTACIONAL (STL Y SARIMA)
+            # ============================================
+            with st.expander("1️⃣1️⃣ Análisis Estacional (STL y SARIMA)", expanded=False):
+                st.subheader("Descomposición STL y Modelo SARIMA vs ARMA(1,1)")
                 
-                # Tabla de comparación
-                st.write("#### Comparación: Valores Reales vs Pronósticos")
-                comparison_df = pd.DataFrame({
-                    'Periodo': test.index,
-                    'Real': test.values,
-                    'Pronóstico': pred.values,
-                    'Error': test.values - pred.values,
-                    'Error %': ((test.values - pred.values) / test.values * 100)
-                })
-                st.dataframe(comparison_df.style.format({
-                    'Real': '{:.4f}',
-                    'Pronóstico': '{:.4f}',
-                    'Error': '{:.4f}',
-                    'Error %': '{:.2f}%'
-                }), use_container_width=True)
+                if seccion_calculada("estacional"):
+                    huella = modelos.huella_serie(df['Total'])
+                    # Órdenes disponibles: el predeterminado y los encontrados en la sección 🔟 para estos datos
+                    ordenes = [estacional.ORDEN_SARIMA]
+                    for huella_buscada, criterio_buscado in sorted(st.session_state.get("ordenes_buscados", ())):
+                        if huella_buscada == huella:
+                            mejor = tuple(seleccion_orden_arma(huella, criterio_buscado, df['Total']).mejor)
+                            if mejor not in ordenes and any(mejor[3:]):
+                                ordenes.append(mejor)
+                    
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        orden_sarima = st.selectbox("Orden SARIMA", ordenes, format_func=estacional.texto_orden,
+                                                    key="orden_sarima")
+                    with st.spinner("Calculando STL y ajustando los modelos..."):
+                        paquete = estacional_arma(huella, orden_sarima, df['Total'])
+                    arma, sarima = paquete['modelos']['arma'], paquete['modelos']['sarima']
+                    with col2:
+                        vista_modelo = st.radio("Modelo", (arma['nombre'], sarima['nombre'], "Ambos"),
+                                                horizontal=True, key="modelo_estacional")
+                    
+                    stl = paquete['stl']
+                    periodos = df['Periodo'].astype(str).to_numpy()
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Fuerza Estacional (STL)", f"{stl['fuerza_estacional']:.3f}")
+                    with col2:
+                        st.metric("Fuerza de Tendencia (STL)", f"{stl['fuerza_tendencia']:.3f}")
+                    with col3:
+                        amplitud = max(stl['perfil']) - min(stl['perfil'])
+                        st.metric("Amplitud Estacional", f"{amplitud:.3f}")
+                    st.caption("Fuerza = 1 − Var(resto) / Var(componente + resto): cerca de 0, el componente "
+                               "no explica nada más allá del ruido; cerca de 1, domina la serie")
+                    clave_figura = ("estacional", huella, tuple(orden_sarima))
+                    st.plotly_chart(cache_figuras().obtener(
+                        clave_figura + ("stl",), lambda: graficos.figura_stl(periodos, df['Total'].to_numpy(), stl)
+                    ), use_container_width=True)
+                    
+                    # Cambiar de modelo no recalcula nada: el paquete está guardado y cada figura se arma una vez
+                    colores = {arma['nombre']: (arma, graficos.COLOR_PRONOSTICO),
+                               sarima['nombre']: (sarima, graficos.COLOR_SARIMA)}
+                    elegidos = list(colores.values()) if vista_modelo == "Ambos" else [colores[vista_modelo]]
+                    futuro = abanico.periodos_siguientes(periodos[-1], estacional.HORIZONTE)
+                    st.plotly_chart(cache_figuras().obtener(
+                        clave_figura + (vista_modelo,), lambda: graficos.figura_modelos_estacionales(
+                            periodos, df['Total'].to_numpy(), futuro, elegidos,
+                            f"Ajuste y Pronóstico a {estacional.HORIZONTE} Trimestres"
+                        )
+                    ), use_container_width=True)
+                    
+                    st.write("#### Comparación de Modelos")
+                    comparacion = pd.DataFrame({
+                        modelo['nombre']: {
+                            'AIC': modelo['aic'],
+                            'BIC': modelo['bic'],
+                            'Log-verosimilitud': modelo['llf'],
+                            'RMSE dentro de muestra': modelo['rmse_dentro'],
+                            'RMSE validación': modelo['validacion']['rmse'],
+                            'MAE validación': modelo['validacion']['mae'],
+                            **{f'Ljung-Box p (rezago {r})': p for r, p in
+                               zip(estacional.REZAGOS_LJUNG_BOX, modelo['ljung_box_pvalue'])},
+                        }
+                        for modelo in (arma, sarima)
+                    })
+                    st.dataframe(comparacion.style.format('{:.4f}'), use_container_width=True)
+                    
+                    mejor_validacion = min((arma, sarima), key=lambda m: m['validacion']['rmse'])
+                    st.info(f"""
+                    💡 Con los últimos {estacional.HORIZONTE_VALIDACION} trimestres fuera del ajuste, el menor RMSE
+                    es el de **{mejor_validacion['nombre']}**. El AIC/BIC de un modelo con diferencia estacional
+                    (D = {orden_sarima[4]}) se calcula sobre la serie diferenciada y no es del todo comparable con el
+                    del ARMA(1,1); los errores dentro de muestra omiten los primeros {paquete['descarte']} trimestres
+                    en ambos modelos.
+                    """)
             
             # ============================================
             # CONCLUSIÓN FINAL
@@ -1507,12 +1719,199 @@ elif st.session_state.vista_actual == "Total y Modelo":
             El modelo es adecuado para el análisis de la serie temporal de vivienda en Colombia.
             """)
     
+        with tab4:
+            st.write("### 🔭 Pronósticos Precalculados por Serie")
+            guardados = pronosticos_guardados()
+            if guardados is None:
+                st.info("Aún no hay pronósticos precalculados. Genéralos (o prográmalos en cron) con "
+                        "`python pronosticos.py --si-cambio`.")
+            else:
+                meta = guardados.metadatos
+                cambiados = pronosticos.desactualizados(
+                    meta, CONFIGURACION.ruta_base,
+                    {nombre: CONFIGURACION.version_archivo(nombre) for nombre in configuracion.ARCHIVOS_REQUERIDOS}
+                )
+                if cambiados:
+                    st.warning(f"⚠️ Desactualizados: {', '.join(cambiados)} cambió después de generarlos "
+                               f"({meta['generado']}). Vuelve a ejecutar `python pronosticos.py`.")
+                else:
+                    st.success(f"✅ Al día con los archivos fuente (generados {meta['generado']})")
+                st.caption(f"ARIMA{tuple(meta['orden'])} ({meta['motor']}), {meta['ajustadas']} de {meta['series']} "
+                           f"series ajustadas, {meta['horizonte']} trimestres, IC {meta['nivel']}%")
+                
+                proximo = guardados.proximo()
+                ajustadas = proximo[proximo['estado'] == 'ok']
+                claves = ajustadas.index if len(ajustadas) else proximo.index
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    archivo_pron = st.selectbox("Archivo", claves.get_level_values(0).unique().tolist(),
+                                                key="pronostico_archivo")
+                claves = claves[claves.get_level_values(0) == archivo_pron]
+                with col2:
+                    tipo_pron = st.selectbox("Tipo", claves.get_level_values(1).unique().tolist(),
+                                             key="pronostico_tipo")
+                claves = claves[claves.get_level_values(1) == tipo_pron]
+                with col3:
+                    area_pron = st.selectbox("Área", claves.get_level_values(2).unique().tolist(),
+                                             key="pronostico_area")
+                
+                filas = guardados.serie(archivo_pron, tipo_pron, area_pron)
+                if filas.empty or filas['estado'].iloc[0] != 'ok':
+                    estado = filas['estado'].iloc[0] if not filas.empty else "sin datos"
+                    st.info(f"Esta serie no tiene pronóstico ({estado})")
+                else:
+                    siguiente = filas.iloc[0]
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric(f"Pronóstico {siguiente['periodo']}", f"{siguiente['pronostico']:.2f}")
+                    with col2:
+                        st.metric(f"Límite inferior {meta['nivel']}%", f"{siguiente['inferior']:.2f}")
+                    with col3:
+                        st.metric(f"Límite superior {meta['nivel']}%", f"{siguiente['superior']:.2f}")
+                    st.dataframe(
+                        filas.set_index('periodo')[['pronostico', 'inferior', 'superior']]
+                        .rename(columns={'pronostico': 'Pronóstico', 'inferior': 'Inferior', 'superior': 'Superior'})
+                        .style.format('{:.4f}'),
+                        use_container_width=True
+                    )
+                
+                st.write("#### Próximo trimestre de todas las series")
+                st.dataframe(
+                    ajustadas[['periodo', 'pronostico', 'inferior', 'superior', 'n']].reset_index()
+                    .rename(columns={'archivo': 'Archivo', 'tipo': 'Tipo', 'area': 'Área', 'periodo': 'Periodo',
+                                     'pronostico': 'Pronóstico', 'inferior': 'Inferior', 'superior': 'Superior',
+                                     'n': 'Observaciones'})
+                    .style.format({'Pronóstico': '{:.4f}', 'Inferior': '{:.4f}', 'Superior': '{:.4f}'}),
+                    use_container_width=True, hide_index=True
+                )
+                cortas = int((proximo['estado'] == 'serie corta').sum())
+                if cortas:
+                    st.caption(f"{cortas} series por área tienen menos de {meta['minimo']} periodos y no se pronostican")
+    
     else:
         st.warning("⚠️ No se pudieron cargar los datos. Asegúrate de que el archivo Excel esté en el directorio correcto.")
 
+@st.fragment
+def vista_ipvn():
+    st.subheader("🏗️ Índice de Precios de la Vivienda Nueva (IPVN)")
+    st.markdown("*Variaciones publicadas por el DANE: total nacional, áreas urbanas y metropolitanas, estratos y obras*")
+
+    tablas = cargar_datos_ipvn()
+    if tablas is None:
+        st.warning("⚠️ No se pudo cargar el libro IPVN. Asegúrate de que el archivo Excel esté en el directorio correcto.")
+        return
+
+    medida = st.radio("Variación", ipvn.MEDIDAS, horizontal=True, key="ipvn_medida")
+
+    tab1, tab2, tab3, tab4 = st.tabs(["📈 Total y destinos", "🌆 Áreas", "🏘️ Estratos", "🏗️ Obras"])
+
+    with tab1:
+        df_total = tablas["total_destinos"]
+        fig = go.Figure()
+        for destino, color in (("Total", "#4ecdc4"), ("Apartamentos", "#ff6b6b"), ("Casas", "#667eea")):
+            columna = f"{medida} {destino}"
+            if columna in df_total.columns:
+                fig.add_trace(go.Scatter(
+                    x=df_total["Periodo"], y=df_total[columna],
+                    mode='lines+markers', name=destino,
+                    line=dict(color=color, width=3), marker=dict(size=5)
+                ))
+        fig.update_layout(
+            title={'text': f"Variación {medida.lower()} del IPVN (%)", 'x': 0.5, 'xanchor': 'center',
+                   'font': {'size': 20, 'color': 'white'}},
+            xaxis_title="Periodo", yaxis_title="Variación (%)",
+            template="plotly_dark", hovermode='x unified', height=550,
+            xaxis=dict(tickangle=-90),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+    with tab2:
+        df_areas = tablas["areas_destino"]
+        anio = int(df_areas["Año"].max())
+        df_areas = df_areas[(df_areas["Medida"] == medida) & (df_areas["Año"] == anio)].dropna(subset=["Variación"])
+        fig = px.bar(
+            df_areas.sort_values("Variación"), x="Variación", y="Área", color="Destino",
+            barmode="group", orientation="h", template="plotly_dark", height=650,
+            color_discrete_map={"Apartamentos": "#ff6b6b", "Casas": "#667eea"},
+            title=f"Variación {medida.lower()} por área - {anio}"
+        )
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption("Las áreas sin barra no tienen resultado publicado (reserva estadística).")
+
+    with tab3:
+        df_estratos = tablas["municipio_estrato"]
+        df_estratos = df_estratos[df_estratos["Medida"] == medida].pivot_table(
+            index="Municipio", columns="Estrato", values="Variación", observed=True, sort=False
+        )
+        st.write(f"### Variación {medida.lower()} por estrato socioeconómico (%)")
+        st.dataframe(df_estratos.style.format("{:.2f}", na_rep="(-)"), use_container_width=True)
+
+    with tab4:
+        df_obras = tablas["total_obras"].dropna(subset=["Obras"])
+        periodo = df_obras["Periodo"].cat.categories[-1]
+        df_obras = df_obras[df_obras["Periodo"] == periodo]
+        fig = px.bar(
+            df_obras, x="Área", y="Obras", color="Destino", template="plotly_dark", height=550,
+            color_discrete_map={"Apartamentos": "#ff6b6b", "Casas": "#667eea"},
+            title=f"Obras que entran en el cálculo - {periodo}"
+        )
+        fig.update_layout(xaxis=dict(tickangle=-45))
+        st.plotly_chart(fig, use_container_width=True)
+
+VISTAS = {
+    "Casas": vista_casas,
+    "Departamento": vista_departamento,
+    "Total y Modelo": vista_total_modelo,
+    "IPVN": vista_ipvn,
+}
+
+vista = VISTAS.get(st.session_state.vista_actual)
+if vista is not None:
+    vista()
 else:
     st.info("👈 Selecciona una opción en el panel izquierdo para comenzar.")
 
+# ------------------------------------------------
+# 🔍 PANEL DE DEBUG (después de la vista, que es la que carga los datos)
+# ------------------------------------------------
+with st.sidebar.expander("🔍 Información de debug", expanded=False):
+    st.markdown(f"**Ruta de datos** ({CONFIGURACION.origen}): `{RUTA_BASE}`")
+    st.markdown("\n".join(archivos_info))
+    
+    st.markdown("**🧠 Memoria de los datos cargados** (`memory_usage(deep=True)`)")
+    memoria_cargas = st.session_state.get("memoria_cargas", {})
+    if memoria_cargas:
+        df_memoria = pd.DataFrame(
+            [(archivo, tabla, antes / 1024, despues / 1024)
+             for archivo, tablas in memoria_cargas.items() for tabla, antes, despues in tablas],
+            columns=["Archivo", "Tabla", "Antes (KiB)", "Después (KiB)"],
+        )
+        df_memoria["Ahorro"] = 1 - df_memoria["Después (KiB)"] / df_memoria["Antes (KiB)"]
+        st.dataframe(
+            df_memoria.style.format({"Antes (KiB)": "{:.1f}", "Después (KiB)": "{:.1f}", "Ahorro": "{:.0%}"})
+            .hide(axis="index"),
+            use_container_width=True,
+        )
+        total_antes, total_despues = df_memoria["Antes (KiB)"].sum(), df_memoria["Después (KiB)"].sum()
+        st.caption(f"Total: {total_antes:.1f} KiB → {total_despues:.1f} KiB por entrada de caché")
+    else:
+        st.caption("Aún no se ha cargado ningún archivo en esta sesión.")
+    
+    st.markdown("**🖼️ Caché de figuras** (rankings por área, todas las sesiones)")
+    stats_figuras = cache_figuras().estadisticas()
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Tasa de aciertos", f"{stats_figuras['tasa_aciertos']:.0%}",
+                  f"{stats_figuras['aciertos']} aciertos / {stats_figuras['fallos']} fallos", delta_color="off")
+    with col2:
+        st.metric("Construcción", f"{stats_figuras['ms_promedio']:.0f} ms",
+                  f"{stats_figuras['ms_construccion']:.0f} ms en total", delta_color="off")
+    st.caption(f"{stats_figuras['entradas']} figuras guardadas")
+    # Serializar todas las figuras cuesta: el tamaño solo se mide cuando se pide
+    if st.button("📏 Medir JSON de las figuras", key="medir_figuras"):
+        st.caption(f"{cache_figuras().bytes_json() / 1024:.1f} KiB de JSON")
+
 
 
 
@@ -0,0 +1,390 @@
+"""
+Estimador rápido de ARMA(1,1) con constante (equivalente a ARIMA(1,0,1)).
+
+Para series trimestrales de ~80 datos casi todo el tiempo de
+statsmodels.ARIMA se va en armar y validar el modelo de espacio de estados,
+no en el cálculo. En un ARMA(1,1) el filtro de Kalman con inicialización
+estacionaria se reduce a dos recursiones escalares:
+
+    F_0 = γ_0 = (1 + 2φθ + θ²) / (1 - φ²)
+    F_t = 1 + θ² (1 - 1/F_{t-1})                (varianza de la innovación / σ²)
+    v_t = x_t - φ x_{t-1} - (θ / F_{t-1}) v_{t-1}   (innovación, x = y - μ)
+
+La primera es una transformación de Möbius con puntos fijos 1 y θ², así que
+F_t tiene forma cerrada; la segunda, reescalada por D_t = F_0 ··· F_{t-1},
+queda con coeficiente constante (s_t = w_t D_t - θ s_{t-1}) y se resuelve
+con un filtro lineal. La verosimilitud exacta (σ² concentrada) se evalúa
+así sin bucles de Python por observación para una serie, o con un solo
+bucle sobre t vectorizado entre muchas series a la vez.
+
+Los parámetros se estiman con Newton amortiguado (Levenberg) sobre
+(μ, φ, θ) sin restricciones (φ = a/√(1+a²), θ = b/√(1+b²), como statsmodels
+para orden 1); las derivadas son diferencias finitas y los 10 puntos que
+pide cada iteración se evalúan juntos, para todas las series del lote.
+
+ResultadoARMA11 expone la parte de ARIMAResults que usa el dashboard:
+params, param_names, arparams, maparams, resid, llf, aic, bic, arroots, maroots,
+model.order, mle_retvals, summary() y get_forecast().
+
+Con los datos incluidos, en 191 de los 195 prefijos de las series
+nacionales (desde 20 datos) ambos llegan al mismo óptimo (|Δllf| < 1e-4) y
+los parámetros difieren menos de 1.5e-3: la verosimilitud es plana cuando θ
+se acerca a ±1. En los otros 4 (Casas con 20, 21, 41 y 42 datos) tiene dos
+máximos y statsmodels se detiene en el menor (hasta 1.09 de llf por debajo);
+arrancado desde los parámetros de arma11 llega al mismo llf, así que la
+diferencia es del optimizador y no de la verosimilitud. tests/test_arma11.py
+fija esas tolerancias.
+
+Uso (valida contra statsmodels y mide ajustes/s sobre todos los prefijos
+crecientes de las series nacionales):
+    python arma11.py --ruta Dashboard_github
+"""
+import argparse
+import sys
+import time
+import warnings
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.signal import lfilter
+from scipy.stats import norm
+
+ORDEN = (1, 0, 1)
+NOMBRES_PARAMETROS = ("const", "ar.L1", "ma.L1", "sigma2")
+
+PASO_DIFERENCIAS = 1e-4
+TOLERANCIA = 1e-10
+MAX_ITERACIONES = 100
+
+
+# ------------------------------------------------
+# 🧮 VEROSIMILITUD
+# ------------------------------------------------
+def _restringir(u):
+    """(μ, a, b) sin restricciones → (μ, φ, θ) con |φ|, |θ| < 1"""
+    return u[..., 0], u[..., 1] / np.sqrt(1 + u[..., 1] ** 2), u[..., 2] / np.sqrt(1 + u[..., 2] ** 2)
+
+
+def _liberar(mu, phi, theta):
+    """Inversa de _restringir"""
+    return np.stack([mu, phi / np.sqrt(1 - phi ** 2), theta / np.sqrt(1 - theta ** 2)], axis=-1)
+
+
+def _varianzas(phi, theta, n):
+    """F_t (t = 0..n-1) en forma cerrada; phi y theta de forma (B,) → (B, n)"""
+    theta2 = (theta ** 2)[:, None]
+    gamma0 = ((1 + 2 * phi * theta + theta ** 2) / (1 - phi ** 2))[:, None]
+    # (F_t - 1) / (F_t - θ²) se multiplica por θ² en cada paso
+    razon = (gamma0 - 1) / (gamma0 - theta2) * theta2 ** np.arange(n)[None, :]
+    return (1 - theta2 * razon) / (1 - razon)
+
+
+def _innovaciones(y, mu, phi, theta):
+    """
+    Innovaciones v_t y varianzas F_t (en unidades de σ²) de cada fila
+
+    Args:
+        y: (B, n); mu, phi, theta: (B,)
+
+    Returns:
+        (v, F), ambos (B, n)
+    """
+    B, n = y.shape
+    x = y - mu[:, None]
+    F = _varianzas(phi, theta, n)
+    D = np.ones((B, n))
+    D[:, 1:] = np.cumprod(F[:, :-1], axis=1)
+
+    w = np.empty_like(x)
+    w[:, 0] = x[:, 0]
+    w[:, 1:] = x[:, 1:] - phi[:, None] * x[:, :-1]
+    q = w * D
+
+    if B == 1:
+        s = lfilter([1.0], [1.0, theta[0]], q[0])[None, :]
+    else:
+        # θ distinto por fila: un bucle sobre t, vectorizado entre filas
+        s = np.empty_like(q)
+        s[:, 0] = q[:, 0]
+        for t in range(1, n):
+            s[:, t] = q[:, t] - theta * s[:, t - 1]
+    return s / D, F
+
+
+def _menos_llf_por_dato(u, y):
+    """-llf/n con σ² concentrada, para cada fila de u (B, 3) y y (B, n)"""
+    mu, phi, theta = _restringir(u)
+    v, F = _innovaciones(y, mu, phi, theta)
+    sigma2 = np.mean(v ** 2 / F, axis=1)
+    return 0.5 * (np.log(2 * np.pi * sigma2) + 1) + 0.5 * np.mean(np.log(F), axis=1)
+
+
+# ------------------------------------------------
+# 🎯 ESTIMACIÓN (Newton amortiguado, en lote)
+# ------------------------------------------------
+def _valores_iniciales(y):
+    """μ = media; φ = ρ2/ρ1 y θ de la ecuación de ρ1 de un ARMA(1,1) (método de momentos)"""
+    mu = y.mean(axis=1)
+    x = y - mu[:, None]
+    c0 = np.mean(x * x, axis=1)
+    rho1 = np.mean(x[:, 1:] * x[:, :-1], axis=1) * y.shape[1] / (y.shape[1] - 1) / c0
+    rho2 = np.mean(x[:, 2:] * x[:, :-2], axis=1) * y.shape[1] / (y.shape[1] - 2) / c0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        phi = np.clip(np.where(np.abs(rho1) > 1e-8, rho2 / rho1, 0.0), -0.9, 0.9)
+        # θ²(ρ1 - φ) + θ(2φρ1 - 1 - φ²) + (ρ1 - φ) = 0; se toma la raíz invertible
+        a = rho1 - phi
+        b = 2 * phi * rho1 - 1 - phi ** 2
+        disc = b ** 2 - 4 * a ** 2
+        theta = np.where((np.abs(a) > 1e-8) & (disc >= 0), (-b - np.sqrt(np.maximum(disc, 0))) / (2 * a), 0.0)
+    theta = np.clip(np.nan_to_num(theta), -0.9, 0.9)
+    return _liberar(mu, phi, theta)
+
+
+def _estimar(y):
+    """
+    Newton amortiguado para todas las filas de y (B, n) a la vez
+
+    Returns:
+        (u óptimo (B, 3), iteraciones (B,), convergió (B,))
+    """
+    B = y.shape[0]
+    u = _valores_iniciales(y)
+    amortiguacion = np.full(B, 1e-3)
+    iteraciones = np.zeros(B, dtype=int)
+    convergio = np.zeros(B, dtype=bool)
+    h = PASO_DIFERENCIAS
+    E = np.eye(3) * h
+    pares = ((0, 1), (0, 2), (1, 2))
+
+    for _ in range(MAX_ITERACIONES):
+        activas = np.flatnonzero(~convergio)
+        if not len(activas):
+            break
+        ua, ya = u[activas], y[activas]
+        m = len(activas)
+
+        # Los 10 puntos de las diferencias finitas de todas las filas activas, en una sola evaluación
+        puntos = [ua] + [ua + E[i] for i in range(3)] + [ua - E[i] for i in range(3)]
+        puntos += [ua + E[i] + E[j] for i, j in pares]
+        valores = _menos_llf_por_dato(np.concatenate(puntos), np.tile(ya, (len(puntos), 1))).reshape(len(puntos), m)
+        f0, mas, menos, cruzados = valores[0], valores[1:4], valores[4:7], valores[7:]
+
+        g = ((mas - menos) / (2 * h)).T
+        H = np.empty((m, 3, 3))
+        for i in range(3):
+            H[:, i, i] = (mas[i] - 2 * f0 + menos[i]) / h ** 2
+        for k, (i, j) in enumerate(pares):
+            H[:, i, j] = H[:, j, i] = (cruzados[k] - mas[i] - mas[j] + f0) / h ** 2
+
+        # Levenberg: H + λI definida positiva
+        minimo = np.linalg.eigvalsh(H)[:, 0]
+        lam = np.maximum(amortiguacion[activas], 1e-8 - minimo)
+        paso = -np.linalg.solve(H + lam[:, None, None] * np.eye(3), g[:, :, None])[:, :, 0]
+
+        f1 = _menos_llf_por_dato(ua + paso, ya)
+        mejora = np.isfinite(f1) & (f1 <= f0)
+        u[activas[mejora]] += paso[mejora]
+        amortiguacion[activas] = np.where(mejora, amortiguacion[activas] / 10, amortiguacion[activas] * 10)
+        iteraciones[activas] += 1
+
+        hecho = (mejora & (f0 - f1 < TOLERANCIA)) | (np.max(np.abs(g), axis=1) < 1e-7)
+        # Sin mejora posible aun con mucha amortiguación: ya está en el óptimo numérico
+        hecho |= amortiguacion[activas] > 1e8
+        convergio[activas[hecho]] = True
+
+    return u, iteraciones, convergio
+
+
+# ------------------------------------------------
+# 📦 RESULTADOS (misma superficie que ARIMAResults)
+# ------------------------------------------------
+@dataclass(frozen=True)
+class ModeloARMA11:
+    order: tuple = ORDEN
+
+
+class PronosticoARMA11:
+    """Equivalente a PredictionResults: predicted_mean y conf_int()"""
+
+    def __init__(self, media, varianza, indice, nombre):
+        self.predicted_mean = pd.Series(media, index=indice, name="predicted_mean")
+        self.var_pred_mean = pd.Series(varianza, index=indice, name="var_pred_mean")
+        self._nombre = nombre
+
+    def conf_int(self, alpha=0.05):
+        z = norm.ppf(1 - alpha / 2)
+        margen = z * np.sqrt(self.var_pred_mean.to_numpy())
+        media = self.predicted_mean.to_numpy()
+        return pd.DataFrame({f"lower {self._nombre}": media - margen, f"upper {self._nombre}": media + margen},
+                            index=self.predicted_mean.index)
+
+
+class ResultadoARMA11:
+    """Ajuste ARMA(1,1) con constante; los atributos siguen los nombres de ARIMAResults"""
+
+    def __init__(self, serie, u, iteraciones, convergio):
+        y = serie.to_numpy(dtype=float)
+        mu, phi, theta = (float(v[0]) for v in _restringir(np.asarray(u, dtype=float)[None, :]))
+        v, F = _innovaciones(y[None, :], np.array([mu]), np.array([phi]), np.array([theta]))
+        v, F = v[0], F[0]
+        n = len(y)
+        sigma2 = float(np.mean(v ** 2 / F))
+
+        self.model = ModeloARMA11()
+        self.nobs = n
+        self.param_names = list(NOMBRES_PARAMETROS)
+        self.params = pd.Series([mu, phi, theta, sigma2], index=self.param_names)
+        self.arparams = np.array([phi])
+        self.maparams = np.array([theta])
+        self.arroots = np.array([1 / phi]) if phi != 0 else np.array([])
+        self.maroots = np.array([-1 / theta]) if theta != 0 else np.array([])
+        self.llf = float(-0.5 * n * (np.log(2 * np.pi * sigma2) + 1) - 0.5 * np.sum(np.log(F)))
+        self.aic = -2 * self.llf + 2 * len(NOMBRES_PARAMETROS)
+        self.bic = -2 * self.llf + np.log(n) * len(NOMBRES_PARAMETROS)
+        self.resid = pd.Series(v, index=serie.index, name=serie.name)
+        self.fittedvalues = pd.Series(y - v, index=serie.index, name=serie.name)
+        self.mle_retvals = {"converged": bool(convergio), "iterations": int(iteraciones)}
+
+        # Estado predicho para t = n (después del último dato) y su varianza
+        x = y - mu
+        self._siguiente = phi * x[-1] + theta * v[-1] / F[-1]
+        self._F_siguiente = 1 + theta ** 2 * (1 - 1 / F[-1])
+        self._indice = serie.index
+        self._nombre = serie.name if serie.name is not None else "y"
+
+    def get_forecast(self, steps=1):
+        """Pronóstico a `steps` pasos con su varianza (como ARIMAResults.get_forecast)"""
+        mu, phi, theta, sigma2 = self.params
+        media = mu + self._siguiente * phi ** np.arange(steps)
+        varianza = np.empty(steps)
+        p00 = self._F_siguiente
+        for paso in range(steps):
+            varianza[paso] = sigma2 * p00
+            p00 = phi ** 2 * p00 + 2 * phi * theta + theta ** 2 + 1
+        if isinstance(self._indice, pd.RangeIndex):
+            inicio = self._indice.stop
+            indice = pd.RangeIndex(inicio, inicio + steps * self._indice.step, self._indice.step)
+        else:
+            indice = pd.RangeIndex(self.nobs, self.nobs + steps)
+        return PronosticoARMA11(media, varianza, indice, self._nombre)
+
+    def forecast(self, steps=1):
+        return self.get_forecast(steps).predicted_mean
+
+    def summary(self):
+        """Resumen en texto (coeficientes y criterios; sin errores estándar)"""
+        lineas = [
+            "ARMA(1,1) con constante — estimador rápido (arma11.py)",
+            f"Observaciones: {self.nobs}    Log-verosimilitud: {self.llf:.3f}",
+            f"AIC: {self.aic:.3f}    BIC: {self.bic:.3f}",
+            f"Convergió: {self.mle_retvals['converged']} ({self.mle_retvals['iterations']} iteraciones)",
+            "",
+            f"{'Parámetro':<10} {'Coeficiente':>12}",
+        ]
+        lineas += [f"{nombre:<10} {valor:12.4f}" for nombre, valor in self.params.items()]
+        return "\n".join(lineas)
+
+
+# ------------------------------------------------
+# 🚀 API
+# ------------------------------------------------
+def _como_serie(serie):
+    serie = serie if isinstance(serie, pd.Series) else pd.Series(np.asarray(serie, dtype=float))
+    if serie.isna().any():
+        raise ValueError("El estimador rápido no admite datos faltantes; use statsmodels ARIMA")
+    if len(serie) < 4:
+        raise ValueError("Se necesitan al menos 4 observaciones")
+    return serie
+
+
+def ajustar(serie):
+    """Ajusta ARMA(1,1) con constante a una serie (pandas Series o arreglo)"""
+    return ajustar_lote([serie])[0]
+
+
+def ajustar_lote(series):
+    """
+    Ajusta ARMA(1,1) con constante a muchas series a la vez
+
+    Las series del mismo largo se estiman juntas (una matriz por largo).
+
+    Returns:
+        lista de ResultadoARMA11, en el orden de `series`
+    """
+    series = [_como_serie(s) for s in series]
+    resultados = [None] * len(series)
+    por_largo = {}
+    for i, serie in enumerate(series):
+        por_largo.setdefault(len(serie), []).append(i)
+
+    for posiciones in por_largo.values():
+        y = np.vstack([series[i].to_numpy(dtype=float) for i in posiciones])
+        u, iteraciones, convergio = _estimar(y)
+        for fila, i in enumerate(posiciones):
+            resultados[i] = ResultadoARMA11(series[i], u[fila], iteraciones[fila], convergio[fila])
+    return resultados
+
+
+# ------------------------------------------------
+# ⏱️ CLI: VALIDACIÓN Y RENDIMIENTO
+# ------------------------------------------------
+def main(argv=None):
+    import configuracion
+    import datos
+
+    parser = argparse.ArgumentParser(description="Compara el ARMA(1,1) rápido con statsmodels ARIMA(1,0,1)")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--minimo", type=int, default=20, help="Largo del prefijo más corto")
+    args = parser.parse_args(argv)
+
+    resultado = datos.preparar_datos_principal(datos.cargar_libro((args.ruta,), configuracion.ARCHIVOS_REQUERIDOS[0]))
+    if not resultado.ok:
+        print(f"❌ {resultado.error.mensaje}")
+        return 1
+    df = resultado.datos
+    series = [df[c].iloc[:k] for c in ("Total", "Casas", "Apartamentos") if c in df.columns
+              for k in range(args.minimo, len(df) + 1)]
+
+    from statsmodels.tsa.arima.model import ARIMA
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        inicio = time.perf_counter()
+        referencia = [ARIMA(serie, order=ORDEN).fit() for serie in series]
+        t_statsmodels = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    individuales = [ajustar(serie) for serie in series]
+    t_individual = time.perf_counter() - inicio
+    inicio = time.perf_counter()
+    rapidos = ajustar_lote(series)
+    t_lote = time.perf_counter() - inicio
+
+    print(f"\n📈 {len(series)} ajustes ARMA(1,1) (prefijos de {args.minimo} a {len(df)} datos)")
+    for nombre, segundos in (("statsmodels ARIMA", t_statsmodels), ("arma11, una a una", t_individual),
+                             ("arma11, en lote", t_lote)):
+        print(f"   {nombre:<20} {segundos:7.3f} s → {len(series) / segundos:8.1f} ajustes/s "
+              f"({t_statsmodels / segundos:5.1f}×)")
+
+    diferencia_llf = np.array([r.llf - s.llf for r, s in zip(rapidos, referencia)])
+    diferencia_params = np.array([np.max(np.abs(r.params.to_numpy() - np.asarray(s.params)))
+                                  for r, s in zip(rapidos, referencia)])
+    iguales = np.abs(diferencia_llf) < 1e-4
+    print(f"\n🔎 llf(arma11) - llf(statsmodels): mín {diferencia_llf.min():.2e}, máx {diferencia_llf.max():.2e}")
+    print(f"   {iguales.sum()} de {len(series)} con el mismo óptimo (|Δllf| < 1e-4); "
+          f"ahí |Δparámetros| máx = {diferencia_params[iguales].max():.2e}")
+    print(f"   {(diferencia_llf >= 1e-4).sum()} con un óptimo mejor que statsmodels, "
+          f"{(diferencia_llf <= -1e-4).sum()} con uno peor")
+    for i in np.flatnonzero(np.abs(diferencia_llf) >= 1e-4):
+        # ¿Otro máximo local de statsmodels? Arrancado desde arma11 debe llegar al mismo llf
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            desde_rapido = ARIMA(series[i], order=ORDEN).fit(start_params=rapidos[i].params.to_numpy())
+        print(f"   · {series[i].name} ({len(series[i])} datos): Δllf {diferencia_llf[i]:+.3f}; statsmodels "
+              f"arrancado desde arma11: Δllf {rapidos[i].llf - desde_rapido.llf:+.1e}")
+    print(f"   Una a una = en lote: {max(abs(a.llf - b.llf) for a, b in zip(individuales, rapidos)):.1e}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Backtest con origen móvil (ventana creciente) del modelo ARIMA.
+
+En vez de un solo corte train/test, se pronostica desde cada origen de la
+serie (a partir de INICIO_MINIMO observaciones) a varios horizontes. No se
+ajusta un modelo por origen:
+
+- Cada REAJUSTE_CADA orígenes se re-estiman los parámetros con los datos
+  hasta ese origen, arrancando desde los parámetros del reajuste anterior.
+- Con esos parámetros fijos, un solo filtro de Kalman sobre la serie entera
+  da el estado predicho a_{t+1|t} de cada origen del bloque (el filtro en t
+  solo usa datos hasta t, así que no hay fuga) y los pronósticos a h pasos
+  salen de propagar esos estados con las matrices del modelo, para todos
+  los orígenes a la vez.
+
+Los pronósticos y errores por origen quedan como arreglos (orígenes ×
+horizonte) y el resultado se guarda en DIRECTORIO_BACKTESTS por versión de
+los datos.
+
+Uso:
+    python backtest.py --ruta Dashboard_github
+    python backtest.py --cada 1   # reajuste en cada origen
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+import warnings
+from dataclasses import dataclass
+from importlib.metadata import version
+
+import numpy as np
+import pandas as pd
+
+import configuracion
+import datos
+from cache_columnar import DIRECTORIO_CACHE, escritura_atomica
+from modelos import ORDEN_ARMA, huella_serie
+
+DIRECTORIO_BACKTESTS = os.path.join(DIRECTORIO_CACHE, "backtests")
+
+HORIZONTES = (1, 2, 4, 8)
+INICIO_MINIMO = 20          # 5 años de datos antes del primer origen
+REAJUSTE_CADA = 4           # re-estimar los parámetros una vez por año
+SERIES_BACKTEST = ("Total", "Casas", "Apartamentos")
+
+
+@dataclass(frozen=True)
+class Backtest:
+    """Pronósticos desde cada origen: fila i = origen origenes[i], columna h-1 = h pasos"""
+    origenes: np.ndarray      # posición de la última observación de entrenamiento
+    pronosticos: np.ndarray   # (orígenes × horizonte máximo)
+    reales: np.ndarray        # NaN donde el horizonte cae fuera de la serie
+    reajustes: int
+    segundos: float
+
+    @property
+    def errores(self):
+        return self.reales - self.pronosticos
+
+    def metricas(self, horizontes=HORIZONTES):
+        """RMSE, MAE y número de orígenes evaluados por horizonte"""
+        filas = []
+        for h in horizontes:
+            if h > self.errores.shape[1]:
+                continue
+            e = self.errores[:, h - 1]
+            e = e[np.isfinite(e)]
+            filas.append({
+                "Horizonte": h,
+                "Orígenes": len(e),
+                "RMSE": float(np.sqrt(np.mean(e ** 2))) if len(e) else np.nan,
+                "MAE": float(np.mean(np.abs(e))) if len(e) else np.nan,
+            })
+        return pd.DataFrame(filas).set_index("Horizonte")
+
+
+# ------------------------------------------------
+# ⚙️ PRONÓSTICOS POR BLOQUE
+# ------------------------------------------------
+def _pronosticos_bloque(modelo_completo, params, origenes, horizonte):
+    """
+    Pronósticos a 1..horizonte pasos desde cada origen con parámetros fijos
+
+    Args:
+        modelo_completo: ARIMA sobre la serie entera
+        origenes: Posiciones de la última observación usada en cada origen
+
+    Returns:
+        arreglo (len(origenes) × horizonte)
+    """
+    filtro = modelo_completo.filter(params).filter_results
+    # Modelo invariante en el tiempo: matrices del primer instante
+    Z = filtro.design[:, :, 0]
+    d = filtro.obs_intercept[:, 0]
+    T = filtro.transition[:, :, 0]
+    c = filtro.state_intercept[:, 0]
+
+    # predicted_state[:, t] es a_{t|t-1}: el estado en t+1 visto desde el origen t
+    estados = filtro.predicted_state[:, np.asarray(origenes) + 1]
+    pronosticos = np.empty((len(origenes), horizonte))
+    for paso in range(horizonte):
+        pronosticos[:, paso] = (d[:, None] + Z @ estados)[0]
+        estados = c[:, None] + T @ estados
+    return pronosticos
+
+
+def ejecutar_backtest(serie, orden=ORDEN_ARMA, horizonte=max(HORIZONTES), inicio=INICIO_MINIMO,
+                      cada=REAJUSTE_CADA):
+    """
+    Backtest con ventana creciente desde cada origen de la serie
+
+    Args:
+        serie: pandas Series
+        horizonte: Pasos pronosticados desde cada origen
+        inicio: Observaciones de entrenamiento del primer origen
+        cada: Orígenes entre re-estimaciones de los parámetros (1 = en cada origen)
+
+    Returns:
+        Backtest
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    comienzo = time.perf_counter()
+    y = serie.to_numpy(dtype=float)
+    n = len(y)
+    if n <= inicio:
+        raise ValueError(f"La serie tiene {n} observaciones; se necesitan más de {inicio}")
+
+    origenes = np.arange(inicio - 1, n - 1)
+    modelo_completo = ARIMA(y, order=orden)
+    pronosticos = np.empty((len(origenes), horizonte))
+    params = None
+    reajustes = 0
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        for desde in range(0, len(origenes), cada):
+            bloque = origenes[desde:desde + cada]
+            # Re-estimación con datos hasta el primer origen del bloque, arrancando de la anterior
+            params = ARIMA(y[:bloque[0] + 1], order=orden).fit(start_params=params).params
+            reajustes += 1
+            pronosticos[desde:desde + len(bloque)] = _pronosticos_bloque(modelo_completo, params, bloque, horizonte)
+
+    # Reales alineados con los pronósticos: y[origen + h], NaN fuera de la serie
+    posiciones = origenes[:, None] + np.arange(1, horizonte + 1)[None, :]
+    reales = np.where(posiciones < n, y[np.minimum(posiciones, n - 1)], np.nan)
+
+    return Backtest(origenes=origenes, pronosticos=pronosticos, reales=reales,
+                    reajustes=reajustes, segundos=time.perf_counter() - comienzo)
+
+
+# ------------------------------------------------
+# 💾 CACHÉ POR VERSIÓN DE LOS DATOS
+# ------------------------------------------------
+def clave_backtest(serie, orden=ORDEN_ARMA, horizonte=max(HORIZONTES), inicio=INICIO_MINIMO, cada=REAJUSTE_CADA):
+    base = f"{huella_serie(serie)}|{tuple(orden)}|{horizonte}|{inicio}|{cada}|{version('statsmodels')}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def _ruta(clave):
+    return os.path.join(DIRECTORIO_BACKTESTS, f"{clave}.npz")
+
+
+def _leer(clave):
+    ruta = _ruta(clave)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with np.load(ruta) as archivo:
+            return Backtest(
+                origenes=archivo["origenes"], pronosticos=archivo["pronosticos"], reales=archivo["reales"],
+                reajustes=int(archivo["reajustes"]), segundos=float(archivo["segundos"]),
+            )
+    except Exception as e:
+        print(f"⚠️ Backtest guardado inválido ({clave}): {e}")
+        return None
+
+
+def _guardar(clave, resultado):
+    def escribir(temporal):
+        # Con un archivo abierto np.savez no agrega la extensión .npz al temporal
+        with open(temporal, "wb") as f:
+            np.savez(f, origenes=resultado.origenes, pronosticos=resultado.pronosticos,
+                     reales=resultado.reales, reajustes=resultado.reajustes, segundos=resultado.segundos)
+
+    try:
+        escritura_atomica(_ruta(clave), escribir)
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar el backtest ({clave}): {e}")
+
+
+def obtener_backtest(serie, orden=ORDEN_ARMA, horizonte=max(HORIZONTES), inicio=INICIO_MINIMO,
+                     cada=REAJUSTE_CADA):
+    """Backtest desde el disco si los datos no cambiaron; si no, lo ejecuta y lo guarda"""
+    clave = clave_backtest(serie, orden, horizonte, inicio, cada)
+    resultado = _leer(clave)
+    if resultado is None:
+        resultado = ejecutar_backtest(serie, orden, horizonte, inicio, cada)
+        _guardar(clave, resultado)
+    return resultado
+
+
+# ------------------------------------------------
+# ⏱️ CLI
+# ------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest con origen móvil del modelo ARIMA")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--cada", type=int, default=REAJUSTE_CADA, help="Orígenes entre re-estimaciones")
+    parser.add_argument("--inicio", type=int, default=INICIO_MINIMO, help="Observaciones del primer origen")
+    args = parser.parse_args(argv)
+
+    archivo_principal = configuracion.ARCHIVOS_REQUERIDOS[0]
+    resultado = datos.preparar_datos_principal(datos.cargar_libro((args.ruta,), archivo_principal))
+    if not resultado.ok:
+        print(f"❌ {resultado.error.mensaje}")
+        return 1
+
+    from statsmodels.tsa.arima.model import ARIMA  # noqa: F401 (la importación no cuenta)
+
+    total = 0.0
+    for columna in SERIES_BACKTEST:
+        if columna not in resultado.datos.columns:
+            continue
+        bt = ejecutar_backtest(resultado.datos[columna], inicio=args.inicio, cada=args.cada)
+        total += bt.segundos
+        print(f"\n📉 {columna}: {len(bt.origenes)} orígenes, {bt.reajustes} reajustes en {bt.segundos:.2f} s")
+        print(bt.metricas().to_string(float_format=lambda v: f"{v:.4f}"))
+    print(f"\n⏱️ Total: {total:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""
+Reporte de tiempos de importación del dashboard (python -X importtime).
+
+Mide en un proceso limpio los módulos que app.py importa al arrancar y, por
+separado, el stack de modelado que solo necesita "Total y Modelo". Falla
+(código 1) si alguna librería pesada aparece en el arranque o si se supera
+el presupuesto de tiempo, para detectar regresiones en CI.
+
+Uso:
+    python benchmark_importaciones.py
+    python benchmark_importaciones.py --presupuesto-ms 1500 --repeticiones 5
+"""
+import argparse
+import ast
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Librerías que no deben cargarse para las vistas Casas y Departamento
+PROHIBIDAS_EN_ARRANQUE = ("statsmodels", "sklearn", "matplotlib", "scipy")
+
+# Módulos que "Total y Modelo" importa bajo demanda
+MODULOS_MODELADO = ("diagnosticos", "statsmodels.tsa.arima.model", "sklearn.metrics")
+
+_LINEA_IMPORTTIME = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def modulos_de_arranque(ruta_app=os.path.join(DIRECTORIO, "app.py")):
+    """Módulos importados en el nivel superior de app.py, en orden"""
+    with open(ruta_app, encoding="utf-8") as f:
+        arbol = ast.parse(f.read())
+    modulos = []
+    for nodo in arbol.body:
+        if isinstance(nodo, ast.Import):
+            modulos += [alias.name for alias in nodo.names]
+        elif isinstance(nodo, ast.ImportFrom) and nodo.module:
+            modulos.append(nodo.module)
+    return modulos
+
+
+def medir(modulos, preimportados=()):
+    """
+    Importa los módulos en un intérprete nuevo con -X importtime
+
+    Returns:
+        (total_ms, dict {paquete raíz: ms acumulados}, set de módulos cargados)
+    """
+    codigo = "".join(f"import {m}\n" for m in preimportados)
+    codigo += "import sys; sys.stderr.write('---MEDICION---\\n')\n"
+    codigo += "".join(f"import {m}\n" for m in modulos)
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", codigo],
+        cwd=DIRECTORIO, capture_output=True, text=True, check=True,
+    )
+    salida = proceso.stderr.split("---MEDICION---\n", 1)[-1]
+
+    total_us = 0
+    por_paquete = {}
+    cargados = set()
+    for linea in salida.splitlines():
+        coincidencia = _LINEA_IMPORTTIME.match(linea)
+        if coincidencia is None:
+            continue
+        propio, acumulado, sangria, modulo = coincidencia.groups()
+        cargados.add(modulo)
+        raiz = modulo.split(".")[0]
+        por_paquete[raiz] = por_paquete.get(raiz, 0) + int(propio)
+        if len(sangria) == 1:  # importación de primer nivel
+            total_us += int(acumulado)
+    return total_us / 1000, {k: v / 1000 for k, v in por_paquete.items()}, cargados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiempos de importación del dashboard")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Mediciones por escenario (se usa la mediana)")
+    parser.add_argument("--presupuesto-ms", type=float, default=None,
+                        help="Falla si el arranque tarda más que esto (mediana)")
+    parser.add_argument("--top", type=int, default=10, help="Paquetes más lentos a listar")
+    args = parser.parse_args(argv)
+
+    arranque = modulos_de_arranque()
+    escenarios = [
+        ("Arranque (Casas / Departamento)", arranque, ()),
+        ("Stack de modelado (primera entrada a Total y Modelo)", MODULOS_MODELADO, arranque),
+    ]
+
+    codigo_salida = 0
+    for nombre, modulos, preimportados in escenarios:
+        mediciones = [medir(modulos, preimportados) for _ in range(args.repeticiones)]
+        total = statistics.median(m[0] for m in mediciones)
+        por_paquete, cargados = mediciones[-1][1], mediciones[-1][2]
+
+        print(f"\n📦 {nombre}: {total:.1f} ms (mediana de {args.repeticiones})")
+        for paquete, ms in sorted(por_paquete.items(), key=lambda p: -p[1])[:args.top]:
+            print(f"   {paquete:<24} {ms:8.1f} ms")
+
+        if preimportados:
+            continue
+
+        pesadas = sorted({m.split(".")[0] for m in cargados} & set(PROHIBIDAS_EN_ARRANQUE))
+        if pesadas:
+            print(f"❌ El arranque importa librerías de modelado: {', '.join(pesadas)}")
+            codigo_salida = 1
+        if args.presupuesto_ms is not None and total > args.presupuesto_ms:
+            print(f"❌ El arranque supera el presupuesto: {total:.1f} ms > {args.presupuesto_ms:.1f} ms")
+            codigo_salida = 1
+
+    return codigo_salida
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,101 @@
+"""
+Pico de memoria (RSS) y tiempo de lectura del libro IPVN.
+
+Compara pd.read_excel(sheet_name=None) contra el parser en streaming de
+ipvn.py (openpyxl read_only) y contra la lectura desde la caché columnar.
+Cada medición corre en un intérprete nuevo, con pandas, openpyxl e ipvn ya
+importados antes de tomar la línea base. Como el pico de RSS del proceso
+suele quedar dominado por las importaciones, en otro proceso se mide además
+el pico de memoria asignada por Python durante la lectura (tracemalloc), que
+no se cronometra porque tracemalloc la hace más lenta.
+
+Uso:
+    python benchmark_ipvn.py
+    python benchmark_ipvn.py --ruta Dashboard_github --repeticiones 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+import ipvn
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+METODOS = {
+    "pd.read_excel (todas las hojas)": "pd.read_excel(ruta, sheet_name=None)",
+    "ipvn.leer_ipvn (streaming)": "ipvn.leer_ipvn(ruta)",
+    "ipvn.leer_ipvn_cacheado (Parquet)": "ipvn.leer_ipvn_cacheado(ruta)",
+}
+
+# ru_maxrss está en KiB en Linux y en bytes en macOS
+_CODIGO = """
+import json, resource, sys, time, tracemalloc
+import openpyxl
+import pandas as pd
+import ipvn
+ruta, trazar = sys.argv[1], sys.argv[2] == "1"
+if trazar:
+    tracemalloc.start()
+    resultado = {expresion}
+    print(json.dumps({{"python_kib": tracemalloc.get_traced_memory()[1] / 1024}}))
+    sys.exit(0)
+escala = 1 if sys.platform != "darwin" else 1024
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / escala
+inicio = time.perf_counter()
+resultado = {expresion}
+ms = (time.perf_counter() - inicio) * 1000
+pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / escala
+print(json.dumps({{"ms": ms, "base_kib": base, "pico_kib": pico}}))
+"""
+
+
+def medir(expresion, ruta_abs, trazar=False):
+    """
+    Ejecuta una lectura en un proceso nuevo
+
+    Returns:
+        {ms, base_kib, pico_kib}, o {python_kib} si `trazar`
+    """
+    proceso = subprocess.run(
+        [sys.executable, "-c", _CODIGO.format(expresion=expresion), ruta_abs, "1" if trazar else "0"],
+        cwd=DIRECTORIO, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memoria y tiempo de lectura del libro IPVN")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con el archivo IPVN")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Mediciones por método (se usa la mediana)")
+    args = parser.parse_args(argv)
+
+    if sys.platform.startswith("win"):
+        print("❌ El pico de RSS se mide con el módulo resource, que no existe en Windows")
+        return 1
+
+    ruta_abs = os.path.abspath(os.path.join(args.ruta, ipvn.ARCHIVO_IPVN))
+    if not os.path.exists(ruta_abs):
+        print(f"❌ No se encontró {ruta_abs}")
+        return 1
+
+    # Deja lista la caché columnar para medir el camino en caliente
+    ipvn.leer_ipvn_cacheado(ruta_abs)
+
+    print(f"\n📗 {ipvn.ARCHIVO_IPVN} ({os.path.getsize(ruta_abs) / 1024:.0f} KiB), "
+          f"mediana de {args.repeticiones} procesos")
+    print(f"   {'Método':<36} {'Tiempo':>10} {'Pico RSS':>12} {'Δ RSS':>10} {'Pico Python':>13}")
+    for nombre, expresion in METODOS.items():
+        mediciones = [medir(expresion, ruta_abs) for _ in range(args.repeticiones)]
+        ms = statistics.median(m["ms"] for m in mediciones)
+        pico = statistics.median(m["pico_kib"] for m in mediciones) / 1024
+        delta = statistics.median(m["pico_kib"] - m["base_kib"] for m in mediciones) / 1024
+        python = medir(expresion, ruta_abs, trazar=True)["python_kib"] / 1024
+        print(f"   {nombre:<36} {ms:8.1f} ms {pico:8.1f} MiB {delta:6.1f} MiB {python:9.2f} MiB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
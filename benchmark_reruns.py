@@ -0,0 +1,68 @@
+"""
+Latencia de reruns del dashboard medida con streamlit.testing (AppTest).
+
+Simula una sesión: carga inicial, rerun sin cambios, cambio de vista con los
+botones del menú y una interacción dentro de "Total y Modelo". Cada paso se
+repite y se reporta la mediana, así se puede comparar antes/después de un
+cambio (por ejemplo, ejecutando el script contra otra copia de app.py).
+
+Uso:
+    python benchmark_reruns.py
+    python benchmark_reruns.py --app /otra/copia/app.py --repeticiones 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+
+def _cronometrar(accion):
+    inicio = time.perf_counter()
+    at = accion()
+    transcurrido = (time.perf_counter() - inicio) * 1000
+    if at.exception:
+        raise RuntimeError(at.exception[0].message)
+    return transcurrido
+
+
+def medir_sesion(ruta_app, timeout):
+    """Ejecuta una sesión completa y retorna {paso: ms}"""
+    at = AppTest.from_file(ruta_app, default_timeout=timeout)
+    tiempos = {}
+    tiempos["Carga inicial (Casas)"] = _cronometrar(at.run)
+    tiempos["Rerun sin cambios"] = _cronometrar(at.run)
+    tiempos["Cambio a Departamento"] = _cronometrar(lambda: at.button(key="btn_Departamento").click().run())
+    tiempos["Cambio a Total y Modelo"] = _cronometrar(lambda: at.button(key="btn_Total y Modelo").click().run())
+    tiempos["Rerun en Total y Modelo"] = _cronometrar(at.run)
+    tiempos["Cambio a Casas"] = _cronometrar(lambda: at.button(key="btn_Casas").click().run())
+    return tiempos
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Latencia de reruns del dashboard")
+    parser.add_argument("--app", default=os.path.join(DIRECTORIO, "app.py"), help="Script de Streamlit a medir")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Sesiones a simular (se usa la mediana)")
+    parser.add_argument("--timeout", type=float, default=300, help="Segundos máximos por rerun")
+    args = parser.parse_args(argv)
+
+    # El script se ejecuta con su directorio como cwd, igual que `streamlit run`
+    os.chdir(os.path.dirname(os.path.abspath(args.app)))
+
+    # La primera sesión llena las cachés del proceso; no se cuenta
+    medir_sesion(args.app, args.timeout)
+    sesiones = [medir_sesion(args.app, args.timeout) for _ in range(args.repeticiones)]
+
+    print(f"\n⏱️ Latencia de reruns ({args.repeticiones} sesiones, mediana)")
+    for paso in sesiones[0]:
+        valores = [s[paso] for s in sesiones]
+        print(f"   {paso:<28} {statistics.median(valores):8.1f} ms   (min {min(valores):.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Caché columnar en disco (Parquet) delante de las lecturas de Excel.
+
+Cada hoja leída con openpyxl se guarda como Parquet en DIRECTORIO_CACHE, con
+una clave formada por la ruta absoluta, el mtime, el tamaño del archivo y el
+nombre de la hoja. Mientras el Excel no cambie, las siguientes cargas (en
+este proceso o en cualquier otro worker) leen el Parquet y no tocan openpyxl.
+
+Uso por línea de comandos (pre-calentar en el despliegue):
+    python cache_columnar.py --ruta Dashboard_github
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow  # motor de Parquet
+    PARQUET_DISPONIBLE = True
+except ImportError:
+    pyarrow = None
+    PARQUET_DISPONIBLE = False
+
+DIRECTORIO_CACHE = os.environ.get(
+    "VIVIENDA_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache_datos"),
+)
+
+# mkstemp crea los temporales con permisos 0600; al renombrarlos se les dan los de la umask,
+# leída una vez al importar (os.umask no se puede consultar sin cambiarla)
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+# ------------------------------------------------
+# 🔑 CLAVES DE CACHÉ
+# ------------------------------------------------
+def huella_archivo(ruta_abs):
+    """Retorna (ruta, mtime_ns, tamaño) del archivo fuente"""
+    info = os.stat(ruta_abs)
+    return (os.path.abspath(ruta_abs), info.st_mtime_ns, info.st_size)
+
+
+def clave_cache(ruta_abs, hoja=None):
+    """Clave estable a partir de la huella del archivo y la hoja resuelta"""
+    ruta, mtime, tamano = huella_archivo(ruta_abs)
+    base = f"{ruta}|{mtime}|{tamano}|{hoja if hoja is not None else ''}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def _rutas_entrada(clave, formato="parquet"):
+    """Rutas del archivo de datos y del JSON de metadatos de una entrada"""
+    base = os.path.join(DIRECTORIO_CACHE, clave)
+    extension = ".pkl" if formato == "pickle" else ".parquet"
+    return base + extension, base + ".json"
+
+
+def escritura_atomica(ruta_destino, escribir):
+    """
+    Escribe en un temporal y lo renombra, para que otros workers nunca lean a medias
+
+    El temporal es único por escritura (mkstemp), no por proceso: el hilo de
+    precalentamiento y las sesiones de Streamlit escriben en el mismo destino
+    desde un solo proceso.
+
+    Args:
+        escribir: Función que recibe la ruta del temporal y escribe el contenido en ella
+    """
+    directorio = os.path.dirname(ruta_destino)
+    os.makedirs(directorio, exist_ok=True)
+    descriptor, temporal = tempfile.mkstemp(dir=directorio, prefix=f"{os.path.basename(ruta_destino)}.",
+                                            suffix=".tmp")
+    os.close(descriptor)
+    try:
+        escribir(temporal)
+        os.chmod(temporal, 0o666 & ~_UMASK)
+        os.replace(temporal, ruta_destino)
+    finally:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+
+
+# ------------------------------------------------
+# 📋 HOJAS DISPONIBLES
+# ------------------------------------------------
+def _hojas_guardadas(ruta_abs):
+    """Nombres de hojas guardados para la versión actual del archivo, o None"""
+    _, ruta_meta = _rutas_entrada(clave_cache(ruta_abs, hoja="__hojas__"))
+    if not os.path.exists(ruta_meta):
+        return None
+    try:
+        with open(ruta_meta, encoding="utf-8") as f:
+            return json.load(f)["hojas"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _guardar_hojas(ruta_abs, hojas):
+    _, ruta_meta = _rutas_entrada(clave_cache(ruta_abs, hoja="__hojas__"))
+
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"origen": os.path.abspath(ruta_abs), "hojas": hojas}, f, ensure_ascii=False)
+
+    try:
+        escritura_atomica(ruta_meta, escribir)
+    except OSError as e:
+        print(f"⚠️ No se pudo escribir la caché de hojas: {e}")
+
+
+def listar_hojas_cacheado(ruta_abs):
+    """Lista las hojas del libro usando la caché si el archivo no ha cambiado"""
+    hojas = _hojas_guardadas(ruta_abs)
+    if hojas is None:
+        hojas = pd.ExcelFile(ruta_abs).sheet_names
+        _guardar_hojas(ruta_abs, hojas)
+    return hojas
+
+
+# ------------------------------------------------
+# 📥 LECTURA DE HOJAS
+# ------------------------------------------------
+def _guardar_hoja(df, clave, ruta_abs, hoja):
+    """
+    Guarda una hoja en Parquet; los nombres de columna originales van en el JSON.
+    Las hojas con columnas de tipos mezclados (celdas '(-)' entre números, notas
+    al pie) no son representables en Arrow y se guardan en pickle.
+    """
+    ruta_parquet, ruta_meta = _rutas_entrada(clave)
+    ruta_pickle, _ = _rutas_entrada(clave, "pickle")
+
+    columnas = [c if isinstance(c, (str, int, float)) else str(c) for c in df.columns]
+    df_disco = df.copy()
+    df_disco.columns = [str(c) for c in df.columns]
+
+    try:
+        escritura_atomica(ruta_parquet, lambda temporal: df_disco.to_parquet(temporal, index=False))
+        formato = "parquet"
+    except (TypeError, ValueError, pyarrow.ArrowException):
+        escritura_atomica(ruta_pickle, lambda temporal: df_disco.to_pickle(temporal))
+        formato = "pickle"
+
+    def escribir_meta(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"origen": os.path.abspath(ruta_abs), "hoja": hoja, "columnas": columnas,
+                       "formato": formato}, f, ensure_ascii=False)
+
+    escritura_atomica(ruta_meta, escribir_meta)
+
+
+def _leer_hoja_guardada(clave):
+    """Lee una hoja de la caché o retorna None si no existe o está corrupta"""
+    _, ruta_meta = _rutas_entrada(clave)
+    if not os.path.exists(ruta_meta):
+        return None
+    try:
+        with open(ruta_meta, encoding="utf-8") as f:
+            meta = json.load(f)
+        formato = meta.get("formato", "parquet")
+        ruta_datos, _ = _rutas_entrada(clave, formato)
+        if formato == "pickle":
+            df = pd.read_pickle(ruta_datos)
+        else:
+            df = pd.read_parquet(ruta_datos)
+        df.columns = meta["columnas"]
+        return df
+    except Exception as e:
+        print(f"⚠️ Entrada de caché inválida ({clave}): {e}")
+        return None
+
+
+def leer_excel_cacheado(ruta_abs, hoja):
+    """
+    Lee una hoja de un Excel pasando por la caché columnar
+
+    Args:
+        ruta_abs: Ruta absoluta del archivo Excel
+        hoja: Nombre exacto (ya resuelto) de la hoja
+
+    Returns:
+        DataFrame con el contenido de la hoja
+    """
+    if not PARQUET_DISPONIBLE:
+        return pd.read_excel(ruta_abs, sheet_name=hoja)
+
+    clave = clave_cache(ruta_abs, hoja)
+    df = _leer_hoja_guardada(clave)
+    if df is not None:
+        return df
+
+    df = pd.read_excel(ruta_abs, sheet_name=hoja)
+    try:
+        _guardar_hoja(df, clave, ruta_abs, hoja)
+    except Exception as e:
+        print(f"⚠️ No se pudo guardar '{hoja}' en la caché columnar: {e}")
+    return df
+
+
+def leer_libro_cacheado(ruta_abs):
+    """
+    Lee todas las hojas de un libro (equivalente a sheet_name=None)
+
+    El archivo se abre como mucho una vez: las hojas presentes en la caché se
+    leen de ahí y las que falten se parsean del mismo pd.ExcelFile.
+
+    Returns:
+        dict {nombre de hoja: DataFrame} en el orden del libro
+    """
+    xls = None
+    hojas = _hojas_guardadas(ruta_abs)
+    if hojas is None:
+        xls = pd.ExcelFile(ruta_abs)
+        hojas = xls.sheet_names
+        _guardar_hojas(ruta_abs, hojas)
+
+    libro = {}
+    for hoja in hojas:
+        clave = clave_cache(ruta_abs, hoja)
+        df = _leer_hoja_guardada(clave) if PARQUET_DISPONIBLE else None
+        if df is None:
+            if xls is None:
+                xls = pd.ExcelFile(ruta_abs)
+            df = xls.parse(hoja)
+            if PARQUET_DISPONIBLE:
+                try:
+                    _guardar_hoja(df, clave, ruta_abs, hoja)
+                except Exception as e:
+                    print(f"⚠️ No se pudo guardar '{hoja}' en la caché columnar: {e}")
+        libro[hoja] = df
+    return libro
+
+
+def leer_tablas_cacheadas(ruta_abs, nombres, construir):
+    """
+    Lee tablas derivadas de un libro (no sus hojas tal cual) pasando por la caché
+
+    Args:
+        ruta_abs: Ruta absoluta del archivo Excel
+        nombres: Nombres de las tablas que produce `construir`
+        construir: Función ruta_abs -> dict {tabla: DataFrame}; solo se llama
+            si falta alguna tabla para la versión actual del archivo
+
+    Returns:
+        dict {tabla: DataFrame} en el orden de `nombres`
+    """
+    if not PARQUET_DISPONIBLE:
+        return construir(ruta_abs)
+
+    claves = {nombre: clave_cache(ruta_abs, f"__tabla__{nombre}") for nombre in nombres}
+    tablas = {nombre: _leer_hoja_guardada(clave) for nombre, clave in claves.items()}
+    if all(df is not None for df in tablas.values()):
+        return tablas
+
+    tablas = construir(ruta_abs)
+    for nombre, clave in claves.items():
+        try:
+            _guardar_hoja(tablas[nombre], clave, ruta_abs, nombre)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la tabla '{nombre}' en la caché columnar: {e}")
+    return {nombre: tablas[nombre] for nombre in nombres}
+
+
+# ------------------------------------------------
+# 🔥 PRE-CALENTAMIENTO (CLI)
+# ------------------------------------------------
+def precalentar(directorio):
+    """Carga todas las hojas de todos los .xlsx del directorio en la caché"""
+    if not PARQUET_DISPONIBLE:
+        print("❌ pyarrow no está instalado: la caché columnar está desactivada")
+        return 1
+
+    archivos = sorted(f for f in os.listdir(directorio) if f.endswith(".xlsx") and not f.startswith("~$"))
+    if not archivos:
+        print(f"⚠️ No hay archivos .xlsx en {directorio}")
+        return 1
+
+    for archivo in archivos:
+        ruta_abs = os.path.abspath(os.path.join(directorio, archivo))
+        for hoja, df in leer_libro_cacheado(ruta_abs).items():
+            print(f"✅ {archivo} → '{hoja}' ({len(df)} filas)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-calienta la caché columnar de los Excel del dashboard")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--limpiar", action="store_true", help="Borra la caché antes de regenerarla")
+    args = parser.parse_args(argv)
+
+    if args.limpiar and os.path.isdir(DIRECTORIO_CACHE):
+        shutil.rmtree(DIRECTORIO_CACHE)
+        print(f"🧹 Caché eliminada: {DIRECTORIO_CACHE}")
+
+    return precalentar(args.ruta)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Configuración de rutas de datos del dashboard.
+
+La ruta de los Excel se resuelve una vez por proceso, en este orden:
+    1. Variable de entorno VIVIENDA_RUTA_DATOS
+    2. Archivo de configuración JSON (VIVIENDA_CONFIG, por defecto
+       vivienda_config.json junto a este módulo) con {"ruta_datos": "..."}
+    3. Sondeo de las ubicaciones conocidas (local de Windows, Dashboard_github, .)
+
+El resultado es un objeto Configuracion inmutable. GestorConfiguracion lo
+mantiene al día desde un hilo en segundo plano: si aparecen, cambian o
+desaparecen archivos, resuelve de nuevo y avisa a los suscriptores.
+"""
+import json
+import os
+import threading
+from dataclasses import dataclass
+
+DIRECTORIO_APP = os.path.dirname(os.path.abspath(__file__))
+
+VARIABLE_RUTA = "VIVIENDA_RUTA_DATOS"
+VARIABLE_CONFIG = "VIVIENDA_CONFIG"
+ARCHIVO_CONFIG_POR_DEFECTO = os.path.join(DIRECTORIO_APP, "vivienda_config.json")
+
+# Ruta local (Windows) - carpeta original de desarrollo
+RUTA_LOCAL = r"C:\Users\Usuario\Desktop\Clases\6 semestre\Econometria II\Dashboard"
+
+ARCHIVOS_REQUERIDOS = (
+    "Datos vivienda filtrado.xlsx",
+    "Indice Vivienda Departamentos.xlsx",
+    "Indice Vivienda Obras.xlsx",
+)
+
+ORIGEN_ENTORNO = "entorno"
+ORIGEN_ARCHIVO = "archivo"
+ORIGEN_LOCAL = "local"
+ORIGEN_SONDEO = "sondeo"
+ORIGEN_DEFECTO = "defecto"
+
+
+@dataclass(frozen=True)
+class Configuracion:
+    """Ubicación de los datos y estado de sus archivos en un momento dado"""
+    ruta_base: str
+    origen: str
+    archivos: tuple = ()        # ((nombre, existe), ...) de ARCHIVOS_REQUERIDOS
+    archivos_excel: tuple = ()  # .xlsx presentes en ruta_base
+    huella: tuple = ()          # ((nombre, mtime_ns, tamaño), ...) de los .xlsx
+
+    @property
+    def encontrados(self):
+        return sum(1 for _, existe in self.archivos if existe)
+
+    def version_archivo(self, nombre):
+        """(mtime_ns, tamaño) del archivo en esta foto, o None si no estaba"""
+        for archivo, mtime, tamano in self.huella:
+            if archivo == nombre:
+                return (mtime, tamano)
+        return None
+
+
+def archivos_cambiados(anterior, nueva):
+    """Nombres de los .xlsx que aparecieron, cambiaron o desaparecieron entre dos fotos"""
+    nombres = {n for n, _, _ in anterior.huella} | {n for n, _, _ in nueva.huella}
+    if anterior.ruta_base != nueva.ruta_base:
+        return sorted(nombres)
+    return sorted(n for n in nombres if anterior.version_archivo(n) != nueva.version_archivo(n))
+
+
+# ------------------------------------------------
+# 🔎 RESOLUCIÓN
+# ------------------------------------------------
+def _ruta_desde_archivo(ruta_config):
+    """Lee 'ruta_datos' del JSON; las rutas relativas son relativas al archivo"""
+    if not os.path.exists(ruta_config):
+        return None
+    try:
+        with open(ruta_config, encoding="utf-8") as f:
+            ruta = json.load(f).get("ruta_datos")
+    except (OSError, ValueError, AttributeError) as e:
+        print(f"⚠️ Configuración inválida en {ruta_config}: {e}")
+        return None
+    if not ruta:
+        return None
+    return os.path.join(os.path.dirname(os.path.abspath(ruta_config)), ruta)
+
+
+def _sondear_ruta():
+    """Prueba las ubicaciones conocidas como lo hacía el dashboard originalmente"""
+    if os.path.exists(RUTA_LOCAL):
+        return RUTA_LOCAL, ORIGEN_LOCAL
+
+    posibles_rutas = [
+        "Dashboard_github",
+        os.path.join(os.getcwd(), "Dashboard_github"),
+        ".",
+    ]
+    for ruta in posibles_rutas:
+        if os.path.exists(ruta):
+            archivos_encontrados = sum(1 for archivo in ARCHIVOS_REQUERIDOS
+                                       if os.path.exists(os.path.join(ruta, archivo)))
+            if archivos_encontrados >= 2:
+                return ruta, ORIGEN_SONDEO
+
+    return "Dashboard_github", ORIGEN_DEFECTO
+
+
+def _estado_archivos(ruta_base):
+    archivos = tuple((nombre, os.path.exists(os.path.join(ruta_base, nombre))) for nombre in ARCHIVOS_REQUERIDOS)
+
+    huella = []
+    try:
+        nombres = sorted(os.listdir(ruta_base))
+    except OSError:
+        nombres = []
+    for nombre in nombres:
+        if not nombre.endswith(".xlsx") or nombre.startswith("~$"):
+            continue
+        try:
+            info = os.stat(os.path.join(ruta_base, nombre))
+        except OSError:
+            continue
+        huella.append((nombre, info.st_mtime_ns, info.st_size))
+
+    return archivos, tuple(n for n, _, _ in huella), tuple(huella)
+
+
+def resolver_configuracion():
+    """Resuelve la ruta de datos y toma una foto del estado de sus archivos"""
+    ruta_base = os.environ.get(VARIABLE_RUTA)
+    origen = ORIGEN_ENTORNO
+    if not ruta_base:
+        ruta_base = _ruta_desde_archivo(os.environ.get(VARIABLE_CONFIG, ARCHIVO_CONFIG_POR_DEFECTO))
+        origen = ORIGEN_ARCHIVO
+    if not ruta_base:
+        ruta_base, origen = _sondear_ruta()
+
+    archivos, archivos_excel, huella = _estado_archivos(ruta_base)
+    return Configuracion(ruta_base=ruta_base, origen=origen, archivos=archivos,
+                         archivos_excel=archivos_excel, huella=huella)
+
+
+def describir(config):
+    """Línea de log equivalente a la que imprimía el sondeo original"""
+    if config.origen == ORIGEN_DEFECTO:
+        return f"⚠️ Usando ruta por defecto: {config.ruta_base}"
+    return (f"✅ Ruta de datos ({config.origen}): {config.ruta_base} "
+            f"- archivos encontrados: {config.encontrados}/{len(ARCHIVOS_REQUERIDOS)}")
+
+
+# ------------------------------------------------
+# 👀 VIGILANCIA
+# ------------------------------------------------
+class GestorConfiguracion:
+    """
+    Mantiene la Configuracion vigente del proceso
+
+    `actual()` solo lee un atributo. Un hilo demonio vuelve a resolver cada
+    `intervalo` segundos, fuera del camino de las peticiones, y si el
+    resultado cambió lo reemplaza y llama a los suscriptores con
+    (anterior, nueva).
+    """
+
+    def __init__(self, intervalo=5.0, vigilar=True):
+        self.intervalo = intervalo
+        self._config = resolver_configuracion()
+        self._suscriptores = []
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        print(describir(self._config))
+
+        self._hilo = None
+        if vigilar:
+            self._hilo = threading.Thread(target=self._vigilar, name="vigilante-configuracion", daemon=True)
+            self._hilo.start()
+
+    def actual(self):
+        return self._config
+
+    def suscribir(self, funcion):
+        """Registra funcion(anterior, nueva), llamada cuando cambia la configuración"""
+        with self._lock:
+            self._suscriptores.append(funcion)
+
+    def revisar(self):
+        """Vuelve a resolver; retorna True si la configuración cambió"""
+        nueva = resolver_configuracion()
+        with self._lock:
+            anterior = self._config
+            if nueva == anterior:
+                return False
+            self._config = nueva
+            suscriptores = list(self._suscriptores)
+
+        print(f"🔄 Cambió la configuración de datos. {describir(nueva)}")
+        for funcion in suscriptores:
+            try:
+                funcion(anterior, nueva)
+            except Exception as e:
+                print(f"⚠️ Error al notificar el cambio de configuración: {e}")
+        return True
+
+    def _vigilar(self):
+        while not self._detener.wait(self.intervalo):
+            try:
+                self.revisar()
+            except Exception as e:
+                print(f"⚠️ Error al vigilar los archivos de datos: {e}")
+
+    def detener(self):
+        self._detener.set()
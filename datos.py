@@ -0,0 +1,411 @@
+"""
+Capa de acceso a datos del dashboard.
+
+Las funciones de este módulo no dibujan nada en Streamlit: devuelven un
+ResultadoCarga con los datos o con un ErrorCarga estructurado (qué falló,
+qué rutas se probaron, qué hojas había). La interfaz decide cómo mostrarlo.
+"""
+import os
+import re
+import threading
+import time
+import traceback
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+
+import ipvn
+import memoria_compartida
+from almacen import AlmacenIndices
+from cache_columnar import leer_libro_cacheado
+
+
+# ------------------------------------------------
+# 📦 RESULTADOS TIPADOS
+# ------------------------------------------------
+ARCHIVO_NO_ENCONTRADO = "archivo_no_encontrado"
+HOJA_NO_ENCONTRADA = "hoja_no_encontrada"
+LIBRO_VACIO = "libro_vacio"
+ERROR_LECTURA = "error_lectura"
+
+
+@dataclass(frozen=True)
+class ErrorCarga:
+    """Descripción de un fallo de carga, lista para mostrarse en la interfaz"""
+    tipo: str
+    archivo: str
+    mensaje: str
+    rutas_intentadas: tuple = ()
+    archivos_en_directorio: tuple = ()
+    hojas_disponibles: tuple = ()
+    detalle: str = ""
+
+
+@dataclass(frozen=True)
+class ResultadoCarga:
+    """Datos cargados (DataFrame o dict de hojas) o el error que lo impidió"""
+    archivo: str
+    datos: object = None
+    error: ErrorCarga = None
+    hoja: str = None
+    hoja_buscada: str = None
+    ruta: str = None
+    memoria: tuple = ()  # ((tabla, bytes antes, bytes después de compactar), ...)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class ErrorDeCarga(Exception):
+    """Transporta un ResultadoCarga fallido fuera de una función cacheada"""
+
+    def __init__(self, resultado):
+        super().__init__(resultado.error.mensaje)
+        self.resultado = resultado
+
+
+def exigir_exito(resultado):
+    """Retorna el resultado si es correcto y lanza ErrorDeCarga si no"""
+    if not resultado.ok:
+        raise ErrorDeCarga(resultado)
+    return resultado
+
+
+# ------------------------------------------------
+# ⏳ CACHÉ NEGATIVA (ERRORES CON TTL)
+# ------------------------------------------------
+class CacheNegativa:
+    """
+    Recuerda resultados fallidos durante `ttl` segundos
+
+    Evita volver a sondear el disco (os.path.exists, os.listdir) en cada rerun
+    mientras un archivo sigue faltando, sin dejar el error cacheado para siempre.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._entradas = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            instante, resultado = entrada
+            if time.monotonic() - instante > self.ttl:
+                del self._entradas[clave]
+                return None
+            return resultado
+
+    def guardar(self, clave, resultado):
+        with self._lock:
+            self._entradas[clave] = (time.monotonic(), resultado)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+
+
+# ------------------------------------------------
+# 🧠 COMPACTACIÓN DE TIPOS
+# ------------------------------------------------
+# Una columna de texto pasa a categórica si tiene a lo sumo esta fracción de valores distintos
+FRACCION_CATEGORICA = 0.5
+
+
+def memoria_profunda(df):
+    """Bytes de un DataFrame según memory_usage(deep=True), incluido el índice"""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def compactar_tipos(df, flotantes=True):
+    """
+    Retorna una copia con tipos más pequeños
+
+    Los enteros se reducen al menor tipo que los contiene, los flotantes pasan
+    a float32 (si `flotantes`) y el texto con pocos valores distintos a
+    categórica. Las columnas que ya son categóricas o de extensión no se tocan.
+
+    Args:
+        df: DataFrame a compactar
+        flotantes: False para conservar float64 (series que alimentan modelos)
+    """
+    columnas = {}
+    for i, columna in enumerate(df.columns):
+        serie = df.iloc[:, i]
+        if isinstance(serie.dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(serie):
+            pass
+        elif pd.api.types.is_integer_dtype(serie) and isinstance(serie.dtype, np.dtype):
+            serie = pd.to_numeric(serie, downcast="integer")
+        elif pd.api.types.is_float_dtype(serie) and isinstance(serie.dtype, np.dtype):
+            if flotantes:
+                serie = serie.astype(np.float32)
+        elif pd.api.types.is_string_dtype(serie) or serie.dtype == object:
+            if len(serie) and serie.nunique(dropna=True) <= FRACCION_CATEGORICA * len(serie):
+                serie = serie.astype("category")
+        columnas[i] = serie
+    compacto = pd.concat(columnas, axis=1)
+    compacto.columns = df.columns
+    return compacto
+
+
+# ------------------------------------------------
+# 🔎 RESOLUCIÓN DE HOJAS
+# ------------------------------------------------
+def limpiar_nombre(nombre):
+    """Quita caracteres de control y espacios sobrantes de un nombre de hoja"""
+    nombre_limpio = re.sub(r'[\t\r\n\x00-\x1F\x7F-\x9F]', '', nombre)
+    return nombre_limpio.strip()
+
+
+def resolver_hoja(nombre_hoja, hojas_disponibles):
+    """
+    Busca la hoja pedida entre las disponibles tolerando caracteres especiales
+
+    Returns:
+        Nombre real de la hoja o None si no hay coincidencia
+    """
+    # 1. Coincidencia exacta
+    if nombre_hoja in hojas_disponibles:
+        return nombre_hoja
+
+    # 2. Buscar por nombre limpio
+    nombre_buscado_limpio = limpiar_nombre(nombre_hoja).lower()
+    for hoja in hojas_disponibles:
+        if limpiar_nombre(hoja).lower() == nombre_buscado_limpio:
+            return hoja
+
+    # 3. Buscar si está contenido
+    for hoja in hojas_disponibles:
+        if nombre_hoja.lower() in hoja.lower() or hoja.lower().startswith(nombre_hoja.lower()):
+            return hoja
+
+    return None
+
+
+# ------------------------------------------------
+# 📥 CARGA
+# ------------------------------------------------
+def _listar_directorio(directorio):
+    try:
+        return tuple(sorted(os.listdir(directorio)))
+    except OSError:
+        return ()
+
+
+def _leer_libro(ruta_abs):
+    """Lee el libro desde memoria compartida si está activa, si no desde la caché columnar"""
+    if memoria_compartida.activa():
+        return memoria_compartida.libro_compartido(ruta_abs, leer_libro_cacheado)
+    return leer_libro_cacheado(ruta_abs)
+
+
+def cargar_libro(directorios, nombre_archivo, lector=None):
+    """
+    Carga todas las hojas de un libro buscando el archivo en varios directorios
+
+    Args:
+        directorios: Secuencia de directorios candidatos, en orden de preferencia
+        nombre_archivo: Nombre del archivo Excel
+        lector: Función ruta_abs -> dict {nombre: DataFrame} que reemplaza la
+            lectura hoja por hoja (por defecto, caché columnar o memoria compartida)
+
+    Returns:
+        ResultadoCarga con un dict {hoja: DataFrame} en `datos`
+    """
+    if isinstance(directorios, str):
+        directorios = (directorios,)
+
+    rutas_intentadas = tuple(os.path.abspath(os.path.join(d, nombre_archivo)) for d in directorios)
+    ruta_abs = next((r for r in rutas_intentadas if os.path.exists(r)), None)
+
+    if ruta_abs is None:
+        return ResultadoCarga(
+            archivo=nombre_archivo,
+            error=ErrorCarga(
+                tipo=ARCHIVO_NO_ENCONTRADO,
+                archivo=nombre_archivo,
+                mensaje=f"No se encontró el archivo: {nombre_archivo}",
+                rutas_intentadas=rutas_intentadas,
+                archivos_en_directorio=_listar_directorio(directorios[0]) if directorios else (),
+            ),
+        )
+
+    try:
+        libro = _leer_libro(ruta_abs) if lector is None else lector(ruta_abs)
+    except Exception as e:
+        return ResultadoCarga(
+            archivo=nombre_archivo,
+            ruta=ruta_abs,
+            error=ErrorCarga(
+                tipo=ERROR_LECTURA,
+                archivo=nombre_archivo,
+                mensaje=f"Error al leer {nombre_archivo}: {e}",
+                rutas_intentadas=rutas_intentadas,
+                detalle=traceback.format_exc(),
+            ),
+        )
+
+    if not libro:
+        return ResultadoCarga(
+            archivo=nombre_archivo,
+            ruta=ruta_abs,
+            error=ErrorCarga(
+                tipo=LIBRO_VACIO,
+                archivo=nombre_archivo,
+                mensaje=f"No se pudieron leer las hojas del archivo: {nombre_archivo}",
+                rutas_intentadas=rutas_intentadas,
+            ),
+        )
+
+    return ResultadoCarga(archivo=nombre_archivo, datos=libro, ruta=ruta_abs)
+
+
+def cargar_ipvn(directorios):
+    """
+    Carga el libro IPVN ya convertido en tablas tipadas (ver ipvn.py)
+
+    Las tablas son pequeñas y no pasan por memoria compartida, que guardaría
+    sus columnas categóricas como object. Las variaciones solo se grafican,
+    así que se guardan en float32.
+
+    Returns:
+        ResultadoCarga con un dict {tabla: DataFrame} en `datos`
+    """
+    resultado = cargar_libro(directorios, ipvn.ARCHIVO_IPVN, lector=ipvn.leer_ipvn_cacheado)
+    if not resultado.ok:
+        return resultado
+
+    tablas, memoria = {}, []
+    for nombre, df in resultado.datos.items():
+        tablas[nombre] = compactar_tipos(df)
+        memoria.append((nombre, memoria_profunda(df), memoria_profunda(tablas[nombre])))
+    return replace(resultado, datos=tablas, memoria=tuple(memoria))
+
+
+def extraer_hoja(resultado_libro, nombre_hoja):
+    """
+    Toma una hoja de un libro ya cargado usando la búsqueda tolerante de nombres
+
+    Returns:
+        ResultadoCarga con el DataFrame de la hoja en `datos`
+    """
+    if not resultado_libro.ok:
+        return resultado_libro
+
+    hojas_disponibles = tuple(resultado_libro.datos.keys())
+    hoja_encontrada = resolver_hoja(nombre_hoja, hojas_disponibles)
+
+    if hoja_encontrada is None:
+        return ResultadoCarga(
+            archivo=resultado_libro.archivo,
+            ruta=resultado_libro.ruta,
+            hoja_buscada=nombre_hoja,
+            error=ErrorCarga(
+                tipo=HOJA_NO_ENCONTRADA,
+                archivo=resultado_libro.archivo,
+                mensaje=f"No se encontró la hoja '{nombre_hoja}' en {resultado_libro.archivo}",
+                hojas_disponibles=hojas_disponibles,
+            ),
+        )
+
+    return ResultadoCarga(
+        archivo=resultado_libro.archivo,
+        datos=resultado_libro.datos[hoja_encontrada],
+        ruta=resultado_libro.ruta,
+        hoja=hoja_encontrada,
+        hoja_buscada=nombre_hoja,
+    )
+
+
+def preparar_datos_principal(resultado_libro):
+    """
+    Toma la primera hoja del archivo principal y agrega la columna Periodo
+
+    Periodo es una categórica ordenada cronológicamente con las mismas
+    etiquetas de siempre ('2004-I'). Las series numéricas se quedan en
+    float64: son las que se ajustan con ARIMA y su huella identifica los
+    modelos y diagnósticos guardados.
+
+    Returns:
+        ResultadoCarga con el DataFrame principal en `datos`
+    """
+    if not resultado_libro.ok:
+        return resultado_libro
+
+    try:
+        hoja, df = next(iter(resultado_libro.datos.items()))
+        df = df.copy()
+        etiquetas = df["Año"].astype(str) + "-" + df["Trimestre"].astype(str)
+        df["Periodo"] = etiquetas
+        antes = memoria_profunda(df)
+
+        df = compactar_tipos(df.drop(columns="Periodo"), flotantes=False)
+        df["Periodo"] = pd.Categorical(etiquetas, categories=pd.unique(etiquetas), ordered=True)
+    except Exception as e:
+        return ResultadoCarga(
+            archivo=resultado_libro.archivo,
+            ruta=resultado_libro.ruta,
+            error=ErrorCarga(
+                tipo=ERROR_LECTURA,
+                archivo=resultado_libro.archivo,
+                mensaje=f"Error al procesar {resultado_libro.archivo}: {e}",
+                detalle=traceback.format_exc(),
+            ),
+        )
+
+    return ResultadoCarga(archivo=resultado_libro.archivo, datos=df, ruta=resultado_libro.ruta, hoja=hoja,
+                          memoria=((hoja, antes, memoria_profunda(df)),))
+
+
+def rebanada_periodos(df, desde=None, hasta=None):
+    """
+    Filas del DataFrame principal entre dos periodos, ambos incluidos
+
+    Las etiquetas se ubican en las categorías de Periodo (índice hash) y,
+    como hay una fila por periodo en orden cronológico, la rebanada es un
+    iloc por posición: no se compara ni se filtra la columna.
+
+    Args:
+        desde, hasta: Etiquetas de Periodo ('2004-I '); None = extremo de la serie
+    """
+    categorias = df["Periodo"].cat.categories
+    inicio = 0 if desde is None else categorias.get_loc(desde)
+    fin = len(categorias) if hasta is None else categorias.get_loc(hasta) + 1
+    if len(categorias) == len(df):
+        return df.iloc[inicio:fin]
+    # Periodos repetidos: se cae a comparar los códigos
+    codigos = df["Periodo"].cat.codes
+    return df[(codigos >= inicio) & (codigos < fin)]
+
+
+def preparar_almacen(resultado_libro):
+    """
+    Convierte las hojas anchas de un libro (Departamentos, Obras) en su almacén largo
+
+    Returns:
+        ResultadoCarga con un AlmacenIndices en `datos`
+    """
+    if not resultado_libro.ok:
+        return resultado_libro
+
+    try:
+        almacen = AlmacenIndices.desde_libro(resultado_libro.datos)
+    except Exception as e:
+        return ResultadoCarga(
+            archivo=resultado_libro.archivo,
+            ruta=resultado_libro.ruta,
+            error=ErrorCarga(
+                tipo=ERROR_LECTURA,
+                archivo=resultado_libro.archivo,
+                mensaje=f"Error al procesar {resultado_libro.archivo}: {e}",
+                detalle=traceback.format_exc(),
+            ),
+        )
+
+    antes = sum(memoria_profunda(df) for df in resultado_libro.datos.values())
+    return ResultadoCarga(archivo=resultado_libro.archivo, datos=almacen, ruta=resultado_libro.ruta,
+                          memoria=(("almacén largo", antes, almacen.memoria()),))
@@ -0,0 +1,243 @@
+"""
+Motor de diagnósticos del modelo ARMA.
+
+Calcula en una sola pasada todas las pruebas de la pestaña "Modelo ARMA"
+(ADF, Ljung-Box, ACF/PACF, Jarque-Bera, ARCH-LM, raíces AR/MA, QQ-plot) y
+las guarda como un paquete JSON versionado, identificado por la huella de
+la serie. Los expanders solo dibujan los números guardados.
+
+El paquete se puede generar fuera del dashboard (por ejemplo, en un job
+nocturno):
+    python diagnosticos.py --ruta Dashboard_github
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+
+import numpy as np
+from scipy import stats
+from statsmodels.stats.diagnostic import acorr_ljungbox, het_arch
+from statsmodels.stats.stattools import jarque_bera
+from statsmodels.tsa.stattools import acf, adfuller, pacf
+
+from cache_columnar import DIRECTORIO_CACHE, escritura_atomica
+from modelos import ORDEN_ARMA, huella_serie
+
+# Se incrementa cuando cambia el contenido del paquete; invalida los guardados
+VERSION_DIAGNOSTICOS = 1
+
+DIRECTORIO_DIAGNOSTICOS = os.path.join(DIRECTORIO_CACHE, "diagnosticos")
+
+REZAGOS_LJUNG_BOX = [4, 8, 12, 16, 20]
+REZAGOS_ESTACIONALES = [4, 8, 12, 16, 20]
+REZAGOS_ACF = 24
+REZAGOS_ACF_RESIDUOS = 20
+REZAGOS_ARCH = 4
+UMBRAL_ESTACIONAL = 0.3
+ALFA = 0.05
+
+
+# ------------------------------------------------
+# 🧮 CÁLCULO
+# ------------------------------------------------
+def _lista(valores):
+    return [float(v) for v in np.asarray(valores, dtype=float)]
+
+
+def _correlograma(valores, intervalo):
+    """Valores y banda de confianza centrada en cero, como la sombrea plot_acf"""
+    return {
+        "valores": _lista(valores),
+        "banda_inf": _lista(intervalo[:, 0] - valores),
+        "banda_sup": _lista(intervalo[:, 1] - valores),
+    }
+
+
+def _raices(raices):
+    raices = np.asarray(raices)
+    return {"real": _lista(raices.real), "imag": _lista(raices.imag), "modulo": _lista(np.abs(raices))}
+
+
+def calcular_diagnosticos(serie, res):
+    """
+    Calcula todos los diagnósticos de la serie y de su ajuste ARMA
+
+    Args:
+        serie: Serie original (pandas Series)
+        res: ARIMAResults ajustado sobre la serie completa
+
+    Returns:
+        dict serializable en JSON con todos los resultados
+    """
+    huella = huella_serie(serie)
+    serie = serie.dropna()
+    resid = res.resid.dropna()
+
+    adf = adfuller(serie)
+
+    acf_serie, intervalo_acf = acf(serie, nlags=REZAGOS_ACF, alpha=ALFA)
+    pacf_serie, intervalo_pacf = pacf(serie, nlags=REZAGOS_ACF, alpha=ALFA, method="ywm")
+    acf_resid, intervalo_acf_resid = acf(resid, nlags=REZAGOS_ACF_RESIDUOS, alpha=ALFA)
+
+    lb = acorr_ljungbox(resid, lags=REZAGOS_LJUNG_BOX, return_df=True)
+    jb_stat, jb_p, jb_sesgo, jb_curtosis = jarque_bera(resid)
+    arch = het_arch(resid, nlags=REZAGOS_ARCH)
+
+    muestra = np.sort(resid.to_numpy())
+    n = len(muestra)
+    teoricos = stats.norm.ppf(np.arange(1, n + 1) / (n + 1))
+
+    return {
+        "version": VERSION_DIAGNOSTICOS,
+        "huella": huella,
+        "orden": list(res.model.order),
+        "adf": {
+            "estadistico": float(adf[0]),
+            "pvalue": float(adf[1]),
+            "rezagos": int(adf[2]),
+            "observaciones": int(adf[3]),
+            "criticos": {k: float(v) for k, v in adf[4].items()},
+        },
+        "modelo": {
+            "resumen": str(res.summary()),
+            "ar": _lista(res.arparams),
+            "ma": _lista(res.maparams),
+            "const": float(res.params["const"]),
+            "aic": float(res.aic),
+            "bic": float(res.bic),
+            "llf": float(res.llf),
+            "raices_ar": _raices(res.arroots),
+            "raices_ma": _raices(res.maroots),
+        },
+        "residuos": {
+            "media": float(resid.mean()),
+            "std": float(resid.std()),
+            "sesgo": float(resid.skew()),
+            "curtosis": float(resid.kurtosis()),
+        },
+        "ljung_box": {
+            "rezagos": [int(r) for r in lb.index],
+            "lb_stat": _lista(lb["lb_stat"]),
+            "lb_pvalue": _lista(lb["lb_pvalue"]),
+        },
+        "acf": _correlograma(acf_serie, intervalo_acf),
+        "pacf": _correlograma(pacf_serie, intervalo_pacf),
+        "acf_residuos": _correlograma(acf_resid, intervalo_acf_resid),
+        "estacionalidad": {
+            "rezagos": REZAGOS_ESTACIONALES,
+            "picos": [lag for lag in REZAGOS_ESTACIONALES if abs(acf_serie[lag]) > UMBRAL_ESTACIONAL],
+        },
+        "jarque_bera": {
+            "estadistico": float(jb_stat),
+            "pvalue": float(jb_p),
+            "sesgo": float(jb_sesgo),
+            "curtosis": float(jb_curtosis),
+        },
+        "arch": {
+            "lm": float(arch[0]),
+            "lm_pvalue": float(arch[1]),
+            "f": float(arch[2]),
+            "f_pvalue": float(arch[3]),
+        },
+        "qq": {
+            "teoricos": _lista(teoricos),
+            "muestra": _lista(muestra),
+            "pendiente": float(np.std(muestra)),
+            "intercepto": float(np.mean(muestra)),
+        },
+    }
+
+
+# ------------------------------------------------
+# 💾 PAQUETES EN DISCO
+# ------------------------------------------------
+def clave_diagnosticos(serie, orden=ORDEN_ARMA):
+    base = f"{huella_serie(serie)}|{tuple(orden)}|{VERSION_DIAGNOSTICOS}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def _ruta(clave):
+    return os.path.join(DIRECTORIO_DIAGNOSTICOS, f"{clave}.json")
+
+
+def leer_diagnosticos(clave):
+    """Paquete guardado o None si no existe, está corrupto o es de otra versión"""
+    ruta = _ruta(clave)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            paquete = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Paquete de diagnósticos inválido ({clave}): {e}")
+        return None
+    if paquete.get("version") != VERSION_DIAGNOSTICOS:
+        return None
+    return paquete
+
+
+def guardar_diagnosticos(clave, paquete):
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(paquete, f, ensure_ascii=False)
+
+    try:
+        escritura_atomica(_ruta(clave), escribir)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el paquete de diagnósticos ({clave}): {e}")
+
+
+def obtener_diagnosticos(serie, obtener_modelo, orden=ORDEN_ARMA):
+    """
+    Retorna el paquete de diagnósticos de la serie, calculándolo solo si no existe
+
+    Args:
+        serie: Serie original
+        obtener_modelo: Función sin argumentos que retorna el ajuste ARMA;
+            solo se llama si hay que calcular el paquete
+        orden: Orden del modelo diagnosticado
+    """
+    clave = clave_diagnosticos(serie, orden)
+    paquete = leer_diagnosticos(clave)
+    if paquete is None:
+        paquete = calcular_diagnosticos(serie, obtener_modelo())
+        guardar_diagnosticos(clave, paquete)
+    return paquete
+
+
+# ------------------------------------------------
+# 🌙 GENERACIÓN FUERA DEL DASHBOARD (CLI)
+# ------------------------------------------------
+def main(argv=None):
+    import configuracion
+    import datos
+    from modelos import RegistroModelos
+
+    parser = argparse.ArgumentParser(description="Genera el paquete de diagnósticos ARMA del dashboard")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--archivo", default=configuracion.ARCHIVOS_REQUERIDOS[0], help="Archivo principal")
+    parser.add_argument("--columna", action="append", help="Serie a diagnosticar (por defecto Total)")
+    args = parser.parse_args(argv)
+
+    resultado = datos.preparar_datos_principal(datos.cargar_libro((args.ruta,), args.archivo))
+    if not resultado.ok:
+        print(f"❌ {resultado.error.mensaje}")
+        return 1
+    columnas = args.columna or ["Total"]
+    faltantes = [columna for columna in columnas if columna not in resultado.datos.columns]
+    if faltantes:
+        print(f"❌ La columna '{faltantes[0]}' no existe en {args.archivo}")
+        return 1
+
+    registro = RegistroModelos()
+    for columna in columnas:
+        serie = resultado.datos[columna]
+        paquete = obtener_diagnosticos(serie, lambda: registro.obtener(serie, ORDEN_ARMA))
+        print(f"✅ {columna}: paquete {paquete['huella'][:12]} (ADF p={paquete['adf']['pvalue']:.4f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""
+Análisis estacional: descomposición STL y SARIMA frente al ARMA(1,1).
+
+La sección 5 detecta picos de la ACF en los rezagos 4, 8, 12...; aquí se
+mide esa estacionalidad y se prueba un modelo que la incluya:
+
+- STL (robusta, periodo 4) separa tendencia, componente estacional y resto,
+  y da la fuerza de cada componente (Wang, Smith y Hyndman: 1 - Var(R) /
+  Var(componente + R), acotada en 0).
+- Se ajusta un SARIMA (p,d,q)(P,D,Q,4) y se compara con el ARMA(1,1) de
+  referencia: AIC/BIC, error dentro de muestra, Ljung-Box de los residuos,
+  validación sobre los últimos trimestres y pronóstico con su intervalo.
+
+Todo queda en un paquete JSON por huella de la serie y orden SARIMA en
+DIRECTORIO_ESTACIONAL, como el de diagnosticos.py: el dashboard solo dibuja
+los números guardados y cambiar de modelo en la vista no recalcula nada.
+statsmodels se importa al calcular.
+
+    python estacional.py --ruta Dashboard_github
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+
+from cache_columnar import DIRECTORIO_CACHE, escritura_atomica
+from modelos import ORDEN_ARMA, huella_serie
+
+# Se incrementa cuando cambia el contenido del paquete; invalida los guardados
+VERSION_ESTACIONAL = 1
+
+DIRECTORIO_ESTACIONAL = os.path.join(DIRECTORIO_CACHE, "estacional")
+
+PERIODO = 4
+# (p, d, q, P, D, Q), como los candidatos de seleccion_orden; el de menor AIC con d = 0 y D = 1
+ORDEN_SARIMA = (1, 0, 0, 0, 1, 1)
+HORIZONTE = 8
+HORIZONTE_VALIDACION = 4
+REZAGOS_LJUNG_BOX = [4, 8]
+ALFA = 0.05
+
+
+def texto_orden(orden):
+    """'SARIMA(1,0,0)(0,1,1,4)' o 'ARMA(1,1)' para un orden (p, d, q[, P, D, Q])"""
+    p, d, q, P, D, Q = tuple(orden) + (0,) * (6 - len(orden))
+    if (P, D, Q) == (0, 0, 0):
+        return f"ARMA({p},{q})" if d == 0 else f"ARIMA({p},{d},{q})"
+    return f"SARIMA({p},{d},{q})({P},{D},{Q},{PERIODO})"
+
+
+# ------------------------------------------------
+# 🧮 CÁLCULO
+# ------------------------------------------------
+def _lista(valores):
+    """Lista de floats con None en lugar de NaN (JSON válido)"""
+    return [None if not np.isfinite(v) else float(v) for v in np.asarray(valores, dtype=float)]
+
+
+def _fuerza(componente, resto):
+    return float(max(0.0, 1 - np.var(resto) / np.var(componente + resto)))
+
+
+def calcular_stl(valores):
+    """Componentes STL y fuerza de tendencia y estacionalidad"""
+    from statsmodels.tsa.seasonal import STL
+
+    stl = STL(valores, period=PERIODO, robust=True).fit()
+    tendencia, estacional, resto = (np.asarray(c, dtype=float) for c in (stl.trend, stl.seasonal, stl.resid))
+    return {
+        "tendencia": _lista(tendencia),
+        "estacional": _lista(estacional),
+        "residuo": _lista(resto),
+        "fuerza_tendencia": _fuerza(tendencia, resto),
+        "fuerza_estacional": _fuerza(estacional, resto),
+        # Efecto estacional medio de cada posición dentro del año (posición 0 = la del primer dato)
+        "perfil": [float(np.mean(estacional[i::PERIODO])) for i in range(PERIODO)],
+    }
+
+
+def _ajustar(valores, orden):
+    from statsmodels.tsa.arima.model import ARIMA
+
+    p, d, q, P, D, Q = tuple(orden) + (0,) * (6 - len(orden))
+    estacional = (P, D, Q, PERIODO) if (P, D, Q) != (0, 0, 0) else (0, 0, 0, 0)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return ARIMA(valores, order=(p, d, q), seasonal_order=estacional).fit()
+
+
+def _resumen_modelo(orden, res, res_train, valores, descarte):
+    """Métricas, ajustados y pronósticos de un modelo (completo y sin los últimos trimestres)"""
+    from statsmodels.stats.diagnostic import acorr_ljungbox
+
+    resid = np.asarray(res.resid, dtype=float)[descarte:]
+    lb = acorr_ljungbox(resid, lags=REZAGOS_LJUNG_BOX, return_df=True)
+    ajustados = np.asarray(res.fittedvalues, dtype=float).copy()
+    ajustados[:descarte] = np.nan
+
+    fc = res.get_forecast(steps=HORIZONTE)
+    conf = np.asarray(fc.conf_int(alpha=ALFA), dtype=float)
+    fc_val = res_train.get_forecast(steps=HORIZONTE_VALIDACION)
+    conf_val = np.asarray(fc_val.conf_int(alpha=ALFA), dtype=float)
+    pred_val = np.asarray(fc_val.predicted_mean, dtype=float)
+    error_val = valores[-HORIZONTE_VALIDACION:] - pred_val
+
+    return {
+        "orden": list(orden),
+        "nombre": texto_orden(orden),
+        "aic": float(res.aic),
+        "bic": float(res.bic),
+        "llf": float(res.llf),
+        "rmse_dentro": float(np.sqrt(np.mean(resid ** 2))),
+        "ljung_box_pvalue": _lista(lb["lb_pvalue"]),
+        "ajustados": _lista(ajustados),
+        "pronostico": {
+            "media": _lista(fc.predicted_mean),
+            "inferior": _lista(conf[:, 0]),
+            "superior": _lista(conf[:, 1]),
+        },
+        "validacion": {
+            "pred": _lista(pred_val),
+            "inferior": _lista(conf_val[:, 0]),
+            "superior": _lista(conf_val[:, 1]),
+            "rmse": float(np.sqrt(np.mean(error_val ** 2))),
+            "mae": float(np.mean(np.abs(error_val))),
+        },
+    }
+
+
+def calcular_estacional(serie, orden=ORDEN_SARIMA):
+    """
+    STL de la serie y comparación SARIMA(orden) vs ARMA(1,1)
+
+    Returns:
+        dict serializable en JSON
+    """
+    valores = serie.dropna().to_numpy(dtype=float)
+    # Los primeros d + D·s residuos del SARIMA salen de la inicialización difusa:
+    # se descartan en ambos modelos para compararlos sobre los mismos trimestres
+    descarte = orden[1] + orden[4] * PERIODO
+    train = valores[:-HORIZONTE_VALIDACION]
+
+    modelos_paquete = {}
+    for clave, orden_modelo in (("arma", ORDEN_ARMA), ("sarima", tuple(orden))):
+        res = _ajustar(valores, orden_modelo)
+        res_train = _ajustar(train, orden_modelo)
+        modelos_paquete[clave] = _resumen_modelo(orden_modelo, res, res_train, valores, descarte)
+
+    return {
+        "version": VERSION_ESTACIONAL,
+        "huella": huella_serie(serie),
+        "periodo": PERIODO,
+        "descarte": descarte,
+        "stl": calcular_stl(valores),
+        "modelos": modelos_paquete,
+    }
+
+
+# ------------------------------------------------
+# 💾 PAQUETES EN DISCO
+# ------------------------------------------------
+def clave_estacional(serie, orden=ORDEN_SARIMA):
+    base = f"{huella_serie(serie)}|{tuple(orden)}|{tuple(ORDEN_ARMA)}|{VERSION_ESTACIONAL}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def _ruta(clave):
+    return os.path.join(DIRECTORIO_ESTACIONAL, f"{clave}.json")
+
+
+def leer_estacional(clave):
+    """Paquete guardado o None si no existe, está corrupto o es de otra versión"""
+    ruta = _ruta(clave)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            paquete = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Paquete estacional inválido ({clave}): {e}")
+        return None
+    if paquete.get("version") != VERSION_ESTACIONAL:
+        return None
+    return paquete
+
+
+def guardar_estacional(clave, paquete):
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(paquete, f, ensure_ascii=False)
+
+    try:
+        escritura_atomica(_ruta(clave), escribir)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar el paquete estacional ({clave}): {e}")
+
+
+def obtener_estacional(serie, orden=ORDEN_SARIMA):
+    """Paquete estacional de la serie, calculado solo si no está en disco"""
+    clave = clave_estacional(serie, orden)
+    paquete = leer_estacional(clave)
+    if paquete is None:
+        paquete = calcular_estacional(serie, orden)
+        guardar_estacional(clave, paquete)
+    return paquete
+
+
+# ------------------------------------------------
+# 🌙 GENERACIÓN FUERA DEL DASHBOARD (CLI)
+# ------------------------------------------------
+def main(argv=None):
+    import time
+
+    import configuracion
+    import datos
+
+    parser = argparse.ArgumentParser(description="Genera el paquete estacional (STL y SARIMA) del dashboard")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--archivo", default=configuracion.ARCHIVOS_REQUERIDOS[0], help="Archivo principal")
+    parser.add_argument("--columna", action="append", help="Serie a analizar (por defecto Total)")
+    args = parser.parse_args(argv)
+
+    resultado = datos.preparar_datos_principal(datos.cargar_libro((args.ruta,), args.archivo))
+    if not resultado.ok:
+        print(f"❌ {resultado.error.mensaje}")
+        return 1
+    columnas = args.columna or ["Total"]
+    faltantes = [columna for columna in columnas if columna not in resultado.datos.columns]
+    if faltantes:
+        print(f"❌ La columna '{faltantes[0]}' no existe en {args.archivo}")
+        return 1
+
+    for columna in columnas:
+        inicio = time.perf_counter()
+        paquete = obtener_estacional(resultado.datos[columna])
+        arma, sarima = paquete["modelos"]["arma"], paquete["modelos"]["sarima"]
+        print(f"✅ {columna} ({time.perf_counter() - inicio:.2f} s): fuerza estacional "
+              f"{paquete['stl']['fuerza_estacional']:.3f}; AIC {arma['nombre']} {arma['aic']:.2f} vs "
+              f"{sarima['nombre']} {sarima['aic']:.2f}; RMSE validación "
+              f"{arma['validacion']['rmse']:.4f} vs {sarima['validacion']['rmse']:.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
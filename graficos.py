@@ -0,0 +1,487 @@
+"""
+Figuras Plotly de los diagnósticos del modelo ARMA y de los rankings por área.
+
+Se construyen a partir de arreglos ya calculados (paquete de diagnósticos y
+pronóstico de validación), sin pasar por matplotlib: el navegador dibuja
+vectores y el servidor no rasteriza nada ni toca el estado global de pyplot.
+
+Las barras y tortas de los rankings pasan por CacheFiguras: construir una
+figura con Plotly Express (validación, plantilla, escala de color) cuesta
+decenas de ms y solo depende de la versión de los datos, el tipo de
+vivienda, el periodo y la clase de gráfico.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import plotly.express as px
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+COLOR_SERIE = "#43e97b"
+COLOR_PRONOSTICO = "#00c4ff"
+COLOR_REAL = "#ff6b6b"
+COLOR_SARIMA = "#f9d423"
+REZAGOS_ESTACIONALES_GRAFICO = (4, 8, 12, 16, 20, 24)
+
+
+def _rgba(color_hex, alfa):
+    r, g, b = (int(color_hex[i:i + 2], 16) for i in (1, 3, 5))
+    return f"rgba({r},{g},{b},{alfa})"
+
+
+def figura_correlograma(correlograma, titulo, titulo_x, titulo_y, rezagos_marcados=(), altura=400,
+                        color=COLOR_PRONOSTICO):
+    """
+    ACF/PACF con la banda de confianza centrada en cero (como plot_acf)
+
+    Args:
+        correlograma: dict con 'valores', 'banda_inf' y 'banda_sup' del paquete
+        rezagos_marcados: Rezagos que se marcan con una línea vertical roja
+    """
+    valores = correlograma["valores"]
+    rezagos = list(range(len(valores)))
+
+    # Tallos de cada rezago en una sola traza (segmentos separados por None)
+    x_tallos, y_tallos = [], []
+    for rezago, valor in zip(rezagos, valores):
+        x_tallos += [rezago, rezago, None]
+        y_tallos += [0, valor, None]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=rezagos + rezagos[::-1],
+        y=list(correlograma["banda_sup"]) + list(correlograma["banda_inf"])[::-1],
+        fill="toself",
+        fillcolor=_rgba(color, 0.2),
+        line=dict(width=0),
+        hoverinfo="skip",
+        name="IC 95%"
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_tallos,
+        y=y_tallos,
+        mode="lines",
+        line=dict(color=color, width=2),
+        hoverinfo="skip",
+        showlegend=False
+    ))
+    fig.add_trace(go.Scatter(
+        x=rezagos,
+        y=valores,
+        mode="markers",
+        marker=dict(color=color, size=8),
+        name=titulo_y,
+        hovertemplate="Rezago %{x}<br>%{y:.4f}<extra></extra>"
+    ))
+    fig.add_hline(y=0, line=dict(color="white", width=1))
+    for rezago in rezagos_marcados:
+        fig.add_vline(x=rezago, line=dict(color=COLOR_REAL, dash="dash", width=1), opacity=0.5)
+
+    fig.update_layout(
+        title=titulo,
+        xaxis_title=titulo_x,
+        yaxis_title=titulo_y,
+        template="plotly_dark",
+        height=altura,
+        showlegend=False
+    )
+    return fig
+
+
+def figura_qq(qq, altura=500):
+    """QQ-plot de los residuos contra la normal, con la recta estandarizada (line='s')"""
+    teoricos = qq["teoricos"]
+    recta = [qq["pendiente"] * x + qq["intercepto"] for x in teoricos]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=teoricos,
+        y=qq["muestra"],
+        mode="markers",
+        marker=dict(color=COLOR_SERIE, size=7),
+        name="Residuos"
+    ))
+    fig.add_trace(go.Scatter(
+        x=teoricos,
+        y=recta,
+        mode="lines",
+        line=dict(color=COLOR_REAL, width=2),
+        name="Normal"
+    ))
+    fig.update_layout(
+        title="QQ-plot de los residuos",
+        xaxis_title="Cuantiles teóricos",
+        yaxis_title="Cuantiles de la muestra",
+        template="plotly_dark",
+        height=altura,
+        showlegend=False
+    )
+    return fig
+
+
+def figura_pronostico(validacion, titulo, altura=500):
+    """
+    Train / Test / Forecast con la banda de confianza del pronóstico
+
+    Args:
+        validacion: dict de modelos.pronostico_validacion
+    """
+    x_test = validacion["test_x"]
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=x_test + x_test[::-1],
+        y=validacion["sup"] + validacion["inf"][::-1],
+        fill="toself",
+        fillcolor=_rgba(COLOR_PRONOSTICO, 0.3),
+        line=dict(width=0),
+        hoverinfo="skip",
+        name="IC 95%"
+    ))
+    fig.add_trace(go.Scatter(
+        x=validacion["train_x"],
+        y=validacion["train"],
+        mode="lines",
+        line=dict(color=COLOR_SERIE, width=2),
+        name="Train"
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_test,
+        y=validacion["test"],
+        mode="lines+markers",
+        line=dict(color=COLOR_REAL, width=2),
+        marker=dict(size=8),
+        name="Test (Real)"
+    ))
+    fig.add_trace(go.Scatter(
+        x=x_test,
+        y=validacion["pred"],
+        mode="lines+markers",
+        line=dict(color=COLOR_PRONOSTICO, width=2),
+        marker=dict(size=8, symbol="square"),
+        name="Forecast"
+    ))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Periodo",
+        yaxis_title="Índice de Vivienda",
+        template="plotly_dark",
+        hovermode="x unified",
+        height=altura,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    return fig
+
+
+def figura_abanico(historia_x, historia_y, futuro_x, mediana, bandas, analitico=None, titulo="", altura=500):
+    """
+    Abanico de pronóstico: bandas centrales anidadas alrededor de la mediana
+
+    Args:
+        bandas: dict {nivel (%): (inferior, superior)} de abanico.Simulacion.bandas
+        analitico: (inferior, superior) del IC 95 % de conf_int(), o None
+    """
+    futuro_x = list(futuro_x)
+    # La mediana y las bandas arrancan en la última observación para que el abanico no quede suelto
+    x_union = [historia_x[-1]] + futuro_x
+    y_ultimo = float(historia_y[-1])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=list(historia_x),
+        y=list(historia_y),
+        mode="lines",
+        line=dict(color=COLOR_SERIE, width=2),
+        name="Observado"
+    ))
+    niveles = sorted(bandas, reverse=True)
+    for i, nivel in enumerate(niveles):
+        inferior, superior = bandas[nivel]
+        fig.add_trace(go.Scatter(
+            x=x_union + x_union[::-1],
+            y=[y_ultimo] + list(superior) + list(inferior)[::-1] + [y_ultimo],
+            fill="toself",
+            fillcolor=_rgba(COLOR_PRONOSTICO, 0.15 + 0.5 * (i + 1) / len(niveles)),
+            line=dict(width=0),
+            hoverinfo="skip",
+            name=f"{nivel}%"
+        ))
+    fig.add_trace(go.Scatter(
+        x=x_union,
+        y=[y_ultimo] + list(mediana),
+        mode="lines+markers",
+        line=dict(color=COLOR_PRONOSTICO, width=2),
+        marker=dict(size=6),
+        name="Mediana"
+    ))
+    if analitico is not None:
+        for limite, nombre in zip(analitico, ("IC 95% analítico", None)):
+            fig.add_trace(go.Scatter(
+                x=futuro_x,
+                y=list(limite),
+                mode="lines",
+                line=dict(color=COLOR_REAL, width=1, dash="dash"),
+                name=nombre or "IC 95% analítico",
+                showlegend=nombre is not None
+            ))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Periodo",
+        yaxis_title="Índice de Vivienda",
+        template="plotly_dark",
+        hovermode="x unified",
+        height=altura,
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    return fig
+
+
+def figura_stl(x, observado, stl, altura=800):
+    """
+    Descomposición STL en cuatro paneles: serie, tendencia, estacional y resto
+
+    Args:
+        stl: dict 'stl' del paquete de estacional.py
+    """
+    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                        subplot_titles=("Serie", "Tendencia", "Estacional", "Resto"))
+    paneles = (
+        (observado, COLOR_SERIE, "lines"),
+        (stl["tendencia"], COLOR_PRONOSTICO, "lines"),
+        (stl["estacional"], COLOR_SARIMA, "lines"),
+        (stl["residuo"], COLOR_REAL, "markers"),
+    )
+    for fila, (valores, color, modo) in enumerate(paneles, start=1):
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=list(valores),
+            mode=modo,
+            line=dict(color=color, width=2),
+            marker=dict(size=4, color=color),
+            showlegend=False
+        ), row=fila, col=1)
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", row=4, col=1)
+    fig.update_layout(
+        title="Descomposición STL (periodo 4 trimestres)",
+        template="plotly_dark",
+        height=altura,
+        hovermode="x unified"
+    )
+    fig.update_xaxes(tickangle=-90, row=4, col=1)
+    return fig
+
+
+def figura_modelos_estacionales(x, observado, futuro_x, modelos, titulo, altura=550):
+    """
+    Serie observada con los ajustados y el pronóstico (e intervalo) de cada modelo
+
+    Args:
+        modelos: lista de (dict del modelo del paquete de estacional.py, color)
+    """
+    futuro_x = list(futuro_x)
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=x,
+        y=list(observado),
+        mode="lines",
+        line=dict(color=COLOR_SERIE, width=2),
+        name="Observado"
+    ))
+    for modelo, color in modelos:
+        pronostico = modelo["pronostico"]
+        fig.add_trace(go.Scatter(
+            x=futuro_x + futuro_x[::-1],
+            y=pronostico["superior"] + pronostico["inferior"][::-1],
+            fill="toself",
+            fillcolor=_rgba(color, 0.2),
+            line=dict(width=0),
+            hoverinfo="skip",
+            name=f"IC 95% {modelo['nombre']}"
+        ))
+        fig.add_trace(go.Scatter(
+            x=x,
+            y=modelo["ajustados"],
+            mode="lines",
+            line=dict(color=color, width=1, dash="dot"),
+            name=f"Ajustado {modelo['nombre']}"
+        ))
+        fig.add_trace(go.Scatter(
+            x=futuro_x,
+            y=pronostico["media"],
+            mode="lines+markers",
+            line=dict(color=color, width=2),
+            marker=dict(size=6),
+            name=f"Pronóstico {modelo['nombre']}"
+        ))
+    fig.update_layout(
+        title=titulo,
+        xaxis_title="Periodo",
+        yaxis_title="Índice de Vivienda",
+        template="plotly_dark",
+        hovermode="x unified",
+        height=altura,
+        xaxis=dict(tickangle=-90),
+        legend=dict(
+            orientation="h",
+            yanchor="bottom",
+            y=1.02,
+            xanchor="right",
+            x=1
+        )
+    )
+    return fig
+
+
+# ------------------------------------------------
+# 🏙️ RANKINGS POR ÁREA
+# ------------------------------------------------
+def figura_barras_ranking(df, columna_area, titulo, etiqueta_valor, titulo_x, altura_minima=600, alto_fila=25):
+    """
+    Barras horizontales de todas las áreas de un corte, ordenadas por valor
+
+    Args:
+        df: DataFrame con la columna del área y 'Indice'
+        etiqueta_valor: Etiqueta de 'Indice' en la escala de color y el hover
+    """
+    fig = px.bar(
+        df.sort_values("Indice", ascending=True),
+        x="Indice",
+        y=columna_area,
+        orientation="h",
+        title=titulo,
+        color="Indice",
+        color_continuous_scale="RdYlGn",
+        labels={"Indice": etiqueta_valor, columna_area: columna_area}
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        height=max(altura_minima, len(df) * alto_fila),
+        showlegend=False,
+        xaxis_title=titulo_x,
+        yaxis_title=columna_area
+    )
+    return fig
+
+
+def figura_torta_top(df_top, columna_area, titulo, altura=500):
+    """Proporción de cada área dentro del top (df_top ya viene ordenado)"""
+    fig = px.pie(
+        df_top,
+        values="Indice",
+        names=columna_area,
+        title=titulo,
+        color_discrete_sequence=px.colors.sequential.RdBu
+    )
+    fig.update_traces(
+        textposition="inside",
+        textinfo="percent+label",
+        hovertemplate="<b>%{label}</b><br>Índice: %{value:.2f}<br>Porcentaje: %{percent}<extra></extra>"
+    )
+    fig.update_layout(
+        template="plotly_dark",
+        height=altura,
+        showlegend=True,
+        legend=dict(
+            orientation="v",
+            yanchor="middle",
+            y=0.5,
+            xanchor="left",
+            x=1.02
+        )
+    )
+    return fig
+
+
+# ------------------------------------------------
+# 🗄️ CACHÉ DE FIGURAS
+# ------------------------------------------------
+@dataclass(frozen=True)
+class EntradaFigura:
+    figura: go.Figure   # ya validada, para st.plotly_chart
+    ms: float           # tiempo de construcción
+
+
+class CacheFiguras:
+    """
+    Figuras ya construidas, compartidas por todas las sesiones
+
+    La clave la arma quien llama, p. ej. (archivo, versión, tipo, periodo,
+    clase). Se guarda la go.Figure y no su dict: st.plotly_chart vuelve a
+    validar los dict en cada llamada (Figure(**dict)), mientras que de una
+    Figure solo copia el dict y lo serializa sin validar.
+    Las figuras son compartidas: no deben modificarse.
+    """
+
+    def __init__(self, capacidad=256):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.ms_construccion = 0.0
+
+    def obtener(self, clave, construir):
+        """
+        Retorna la figura de la clave, construyéndola solo la primera vez
+
+        Args:
+            construir: Función sin argumentos que retorna la go.Figure
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada.figura
+
+        # Se construye fuera del candado: otras sesiones siguen sirviendo aciertos
+        inicio = time.perf_counter()
+        entrada = EntradaFigura(figura=construir(), ms=(time.perf_counter() - inicio) * 1000)
+
+        with self._lock:
+            self.fallos += 1
+            self.ms_construccion += entrada.ms
+            self._entradas[clave] = entrada
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+        return entrada.figura
+
+    def estadisticas(self):
+        """Entradas, aciertos, fallos, tasa de aciertos y ms de construcción"""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "entradas": len(self._entradas),
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": self.aciertos / consultas if consultas else 0.0,
+                "ms_construccion": self.ms_construccion,
+                "ms_promedio": self.ms_construccion / self.fallos if self.fallos else 0.0,
+            }
+
+    def bytes_json(self):
+        """Bytes del JSON que recibiría el navegador por todas las figuras (las serializa: solo bajo demanda)"""
+        with self._lock:
+            figuras = [e.figura for e in self._entradas.values()]
+        return sum(len(figura.to_json()) for figura in figuras)
+
+    def limpiar(self, prefijo=()):
+        """Borra las entradas cuya clave empieza por `prefijo` (todas si va vacío)"""
+        with self._lock:
+            for clave in [c for c in self._entradas if c[:len(prefijo)] == tuple(prefijo)]:
+                del self._entradas[clave]
@@ -0,0 +1,322 @@
+"""
+Lectura del libro IPVN (Índice de Precios de la Vivienda Nueva) del DANE.
+
+El libro trae cuatro anexos con títulos, encabezados de dos niveles, celdas
+"(-)" y notas al pie, así que pd.read_excel lo devuelve como DataFrames de
+tipo object que luego habría que limpiar. Aquí se recorre cada hoja con
+openpyxl en modo read_only (una fila a la vez, sin cargar el XML completo),
+se saltan títulos y notas, y los valores se van acumulando directamente en
+arreglos tipados con los que se construye cada tabla al final.
+
+Tablas que produce leer_ipvn():
+    total_destinos     Serie trimestral (Año, Trimestre, Periodo) con las
+                       variaciones trimestral, año corrido y anual del total,
+                       apartamentos y casas (formato ancho)
+    areas_destino      Área × Destino × Año × Medida → Variación
+    municipio_estrato  Municipio × Estrato × Medida → Variación
+    total_obras        Área × Destino × Periodo → Obras
+
+Uso por línea de comandos:
+    python ipvn.py --ruta Dashboard_github
+"""
+import argparse
+import os
+import re
+import sys
+from array import array
+
+import numpy as np
+import pandas as pd
+
+from cache_columnar import leer_tablas_cacheadas
+
+ARCHIVO_IPVN = "Índice de Precios de la Vivienda Nueva IPVN.xlsx"
+
+HOJA_TOTAL_DESTINOS = "TOTAL Y DESTINOS"
+HOJA_AREAS_DESTINO = "ÁREAS - DESTINO"
+HOJA_MUNICIPIO_ESTRATO = "MUNICIPIO - ESTRATO"
+HOJA_TOTAL_OBRAS = "TOTAL DE OBRAS"
+
+TABLAS_IPVN = ("total_destinos", "areas_destino", "municipio_estrato", "total_obras")
+
+TRIMESTRES = ("I", "II", "III", "IV")
+MEDIDAS = ("Trimestral", "Año corrido", "Anual")
+
+# Llamadas de nota al pie pegadas a los nombres ("Áreas4", "Bogotá+Soacha3")
+_NOTA_AL_PIE = re.compile(r"\d+$")
+
+
+# ------------------------------------------------
+# 🧹 CELDAS
+# ------------------------------------------------
+def _texto(valor):
+    """Texto de una celda con espacios y saltos de línea normalizados, o None"""
+    if valor is None:
+        return None
+    texto = " ".join(str(valor).split())
+    return texto or None
+
+
+def _nombre(valor):
+    """Nombre de área o municipio sin la llamada de nota al pie"""
+    texto = _texto(valor)
+    return _NOTA_AL_PIE.sub("", texto).strip() if texto else None
+
+
+def _numero(valor):
+    """Valor numérico de una celda; '(-)' (no disponible) y vacías son NaN"""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return float(valor)
+    return np.nan
+
+
+def _medida(titulo):
+    """Medida de variación a partir del título del bloque"""
+    titulo = (titulo or "").lower()
+    if "año corrido" in titulo:
+        return "Año corrido"
+    if "trimestral" in titulo:
+        return "Trimestral"
+    if "anual" in titulo:
+        return "Anual"
+    return None
+
+
+def _titulo_bloque(fila_titulo, inicio):
+    """El título de un bloque está en su primera columna o a su izquierda"""
+    for valor in reversed(fila_titulo[:inicio + 1]):
+        if _texto(valor):
+            return _texto(valor)
+    return None
+
+
+def _columnas_bloque(encabezado, subencabezado, inicio, fin):
+    """
+    Columnas de valores de un bloque con su etiqueta de dos niveles
+
+    El primer nivel se propaga hacia la derecha (celdas combinadas) y se
+    descartan las columnas separadoras, que no tienen ninguno de los dos.
+
+    Returns:
+        Lista de (índice de columna, grupo, subgrupo)
+    """
+    columnas = []
+    grupo = None
+    for j in range(inicio + 1, fin):
+        arriba = _texto(encabezado[j]) if j < len(encabezado) else None
+        abajo = subencabezado[j] if j < len(subencabezado) else None
+        if arriba is None and abajo is None:
+            grupo = None
+            continue
+        grupo = arriba or grupo
+        columnas.append((j, grupo, abajo))
+    return columnas
+
+
+# ------------------------------------------------
+# 📈 A1: SERIE TRIMESTRAL
+# ------------------------------------------------
+def _leer_total_destinos(filas):
+    """
+    Serie trimestral del anexo A1 en formato ancho
+
+    El encabezado es la fila que empieza con 'Año'; cada bloque empieza en una
+    columna 'Trimestre' y el año solo aparece en el primer trimestre.
+    """
+    anterior = ()
+    for fila in filas:
+        if _texto(fila[0]) == "Año":
+            encabezado, fila_titulo = fila, anterior
+            break
+        if any(v is not None for v in fila):
+            anterior = fila
+    else:
+        raise ValueError(f"No se encontró el encabezado 'Año' en '{HOJA_TOTAL_DESTINOS}'")
+    subencabezado = next(filas)
+
+    inicios = [j for j, v in enumerate(encabezado) if _texto(v) == "Trimestre"]
+    columnas = []
+    for k, inicio in enumerate(inicios):
+        fin = inicios[k + 1] if k + 1 < len(inicios) else len(encabezado)
+        medida = _medida(_titulo_bloque(fila_titulo, inicio))
+        for j, grupo, subgrupo in _columnas_bloque(encabezado, subencabezado, inicio, fin):
+            columnas.append((j, f"{medida} {_texto(subgrupo) or grupo}"))
+
+    anios = array("h")
+    trimestres = array("b")
+    valores = {nombre: array("d") for _, nombre in columnas}
+    columna_trimestre = inicios[0]
+    anio = None
+    for fila in filas:
+        trimestre = _texto(fila[columna_trimestre])
+        if trimestre not in TRIMESTRES:
+            break  # fin de la serie: vienen filas vacías y notas al pie
+        if fila[0] is not None:
+            anio = int(fila[0])
+        anios.append(anio)
+        trimestres.append(TRIMESTRES.index(trimestre))
+        for j, nombre in columnas:
+            valores[nombre].append(_numero(fila[j]))
+
+    anio = np.frombuffer(anios, dtype=np.int16)
+    trimestre = pd.Categorical.from_codes(np.frombuffer(trimestres, dtype=np.int8), TRIMESTRES, ordered=True)
+    df = pd.DataFrame({"Año": anio, "Trimestre": trimestre})
+    df["Periodo"] = [f"{a}-{t}" for a, t in zip(anio, trimestre)]
+    for nombre, columna in valores.items():
+        df[nombre] = np.frombuffer(columna, dtype=np.float64)
+    return df
+
+
+# ------------------------------------------------
+# 🗺️ A2-A4: CORTES TRANSVERSALES
+# ------------------------------------------------
+def _leer_bloques(filas, etiqueta):
+    """
+    Recorre una hoja de bloques lado a lado (una medida por bloque) en formato largo
+
+    El encabezado es la fila cuya primera celda es `etiqueta` ('Áreas',
+    'Municipios'); la lectura se detiene en la primera fila vacía, antes de
+    las notas al pie.
+
+    Returns:
+        dict de columnas: nombre, grupo, subgrupo, medida (listas) y valor (array)
+    """
+    anterior = ()
+    for fila in filas:
+        if _nombre(fila[0]) == etiqueta:
+            encabezado, fila_titulo = fila, anterior
+            break
+        if any(v is not None for v in fila):
+            anterior = fila
+    else:
+        raise ValueError(f"No se encontró el encabezado '{etiqueta}'")
+    subencabezado = next(filas)
+
+    inicios = [j for j, v in enumerate(encabezado) if _nombre(v) == etiqueta]
+    bloques = []
+    for k, inicio in enumerate(inicios):
+        fin = inicios[k + 1] if k + 1 < len(inicios) else len(encabezado)
+        medida = _medida(_titulo_bloque(fila_titulo, inicio))
+        bloques.append((inicio, medida, _columnas_bloque(encabezado, subencabezado, inicio, fin)))
+
+    salida = {"nombre": [], "grupo": [], "subgrupo": [], "medida": [], "valor": array("d")}
+    for fila in filas:
+        if _texto(fila[0]) is None:
+            break
+        for inicio, medida, columnas in bloques:
+            nombre = _nombre(fila[inicio])
+            for j, grupo, subgrupo in columnas:
+                salida["nombre"].append(nombre)
+                salida["grupo"].append(grupo)
+                salida["subgrupo"].append(subgrupo)
+                salida["medida"].append(medida)
+                salida["valor"].append(_numero(fila[j]))
+    return salida
+
+
+def _categorica(valores, categorias=None):
+    """Columna categórica que conserva el orden de aparición (o el dado)"""
+    if categorias is None:
+        categorias = list(dict.fromkeys(valores))
+    return pd.Categorical(valores, categories=categorias)
+
+
+def _leer_areas_destino(filas):
+    bloques = _leer_bloques(filas, "Áreas")
+    return pd.DataFrame({
+        "Área": _categorica(bloques["nombre"]),
+        "Destino": _categorica(bloques["grupo"]),
+        "Año": np.array(bloques["subgrupo"], dtype=np.int16),
+        "Medida": _categorica(bloques["medida"], MEDIDAS),
+        "Variación": np.frombuffer(bloques["valor"], dtype=np.float64),
+    })
+
+
+def _leer_municipio_estrato(filas):
+    bloques = _leer_bloques(filas, "Municipios")
+    # 'Total municipio' no tiene subnivel; los estratos cuelgan de 'Estratos socioeconómicos'
+    estratos = [_texto(s) or "Total" for s in bloques["subgrupo"]]
+    return pd.DataFrame({
+        "Municipio": _categorica(bloques["nombre"]),
+        "Estrato": _categorica(estratos),
+        "Medida": _categorica(bloques["medida"], MEDIDAS),
+        "Variación": np.frombuffer(bloques["valor"], dtype=np.float64),
+    })
+
+
+def _leer_total_obras(filas):
+    bloques = _leer_bloques(filas, "Áreas")
+    obras = pd.array(np.frombuffer(bloques["valor"], dtype=np.float64), dtype="Float64")
+    return pd.DataFrame({
+        "Área": _categorica(bloques["nombre"]),
+        "Destino": _categorica(bloques["grupo"]),
+        "Periodo": _categorica([_texto(s) for s in bloques["subgrupo"]]),
+        "Obras": obras.astype("Int32"),
+    })
+
+
+_LECTORES = {
+    "total_destinos": (HOJA_TOTAL_DESTINOS, _leer_total_destinos),
+    "areas_destino": (HOJA_AREAS_DESTINO, _leer_areas_destino),
+    "municipio_estrato": (HOJA_MUNICIPIO_ESTRATO, _leer_municipio_estrato),
+    "total_obras": (HOJA_TOTAL_OBRAS, _leer_total_obras),
+}
+
+
+# ------------------------------------------------
+# 📥 LECTURA
+# ------------------------------------------------
+def _buscar_hoja(libro, nombre):
+    """Las hojas del DANE traen espacios sobrantes ('TOTAL Y DESTINOS ')"""
+    for hoja in libro.sheetnames:
+        if _texto(hoja).upper() == nombre.upper():
+            return libro[hoja]
+    raise ValueError(f"No se encontró la hoja '{nombre}'. Hojas disponibles: {libro.sheetnames}")
+
+
+def leer_ipvn(ruta_abs):
+    """
+    Parsea el libro IPVN fila por fila con openpyxl en modo read_only
+
+    Returns:
+        dict {tabla: DataFrame} con las tablas de TABLAS_IPVN
+    """
+    from openpyxl import load_workbook
+
+    libro = load_workbook(ruta_abs, read_only=True, data_only=True)
+    try:
+        tablas = {}
+        for tabla, (hoja, lector) in _LECTORES.items():
+            filas = _buscar_hoja(libro, hoja).iter_rows(values_only=True)
+            try:
+                tablas[tabla] = lector(filas)
+            except (ValueError, TypeError, StopIteration) as e:
+                raise ValueError(f"Formato inesperado en la hoja '{hoja}': {e}") from e
+        return tablas
+    finally:
+        libro.close()
+
+
+def leer_ipvn_cacheado(ruta_abs):
+    """leer_ipvn() detrás de la caché columnar: el xlsx se parsea una vez por versión"""
+    return leer_tablas_cacheadas(ruta_abs, TABLAS_IPVN, leer_ipvn)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lee el libro IPVN y muestra sus tablas")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con el archivo IPVN")
+    args = parser.parse_args(argv)
+
+    ruta_abs = os.path.abspath(os.path.join(args.ruta, ARCHIVO_IPVN))
+    if not os.path.exists(ruta_abs):
+        print(f"❌ No se encontró {ruta_abs}")
+        return 1
+
+    for tabla, df in leer_ipvn_cacheado(ruta_abs).items():
+        print(f"✅ {tabla}: {len(df)} filas, {df.memory_usage(deep=True).sum() / 1024:.1f} KiB")
+        print("   " + ", ".join(f"{c} ({t})" for c, t in df.dtypes.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
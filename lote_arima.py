@@ -0,0 +1,321 @@
+"""
+Ajuste ARIMA en lote de todas las series por área.
+
+La vista "Total y Modelo" ajusta el ARMA(1,1) solo a la serie nacional. Aquí
+se ajusta el mismo modelo, con su pronóstico, a cada serie de los libros por
+área (cada ciudad o departamento, para Casas y Apartamentos) y a las series
+nacionales del archivo principal. Los ajustes son independientes: se
+reparten en trozos entre los procesos de un ProcessPoolExecutor (statsmodels
+se importa una vez por proceso y cada envío lleva varias series) y los
+coeficientes, AIC/BIC y pronósticos quedan en una sola tabla, guardada en
+DIRECTORIO_LOTES con una clave que depende de los datos, el orden y el
+horizonte.
+
+Con motor="rapido" y orden (1,0,1) los ajustes usan el estimador de
+arma11.py, que estima todas las series del mismo largo a la vez en este
+proceso (sin pool); las series con datos faltantes siguen con statsmodels.
+
+Las series con menos de MIN_OBSERVACIONES datos no se ajustan y quedan en la
+tabla con estado "serie corta" (hoy los libros por área traen dos periodos
+por hoja, así que solo entran las series nacionales).
+
+Uso:
+    python lote_arima.py --ruta Dashboard_github
+    python lote_arima.py --procesos 4 --trozo 8 --sin-serial
+    python lote_arima.py --motor rapido
+"""
+import argparse
+import hashlib
+import math
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from importlib.metadata import version
+
+import numpy as np
+import pandas as pd
+
+import arma11
+import configuracion
+import datos
+from almacen import etiqueta_periodo
+from cache_columnar import DIRECTORIO_CACHE, PARQUET_DISPONIBLE, escritura_atomica
+from modelos import ORDEN_ARMA, huella_serie
+
+DIRECTORIO_LOTES = os.path.join(DIRECTORIO_CACHE, "lotes_arima")
+
+ARCHIVO_PRINCIPAL, ARCHIVO_DEPARTAMENTOS, ARCHIVO_CIUDADES = configuracion.ARCHIVOS_REQUERIDOS
+COLUMNAS_NACIONALES = ("Total", "Casas", "Apartamentos")
+TIPOS = ("Casas", "Apartamentos")
+AREA_NACIONAL = "Nacional"
+
+HORIZONTE = 4
+# Con menos datos el ARMA(1,1) con constante (4 parámetros) no es estimable con sentido
+MIN_OBSERVACIONES = 12
+MOTORES = ("statsmodels", "rapido")
+
+
+# ------------------------------------------------
+# 📚 SERIES
+# ------------------------------------------------
+def series_por_area(directorio):
+    """
+    Todas las series a ajustar, en el orden de los libros
+
+    Del archivo principal entran Total, Casas y Apartamentos con área
+    'Nacional'; de Departamentos y Obras, cada área de cada tipo.
+
+    Returns:
+        dict {(archivo, tipo, área): Series indexada por la etiqueta del periodo}
+    """
+    series = {}
+
+    principal = datos.preparar_datos_principal(datos.cargar_libro((directorio,), ARCHIVO_PRINCIPAL))
+    if principal.ok:
+        df = principal.datos
+        etiquetas = df["Periodo"].astype(str).str.strip().to_numpy()
+        for columna in COLUMNAS_NACIONALES:
+            if columna in df.columns:
+                series[(ARCHIVO_PRINCIPAL, columna, AREA_NACIONAL)] = pd.Series(
+                    df[columna].to_numpy(dtype=float), index=etiquetas, name=columna
+                )
+    else:
+        print(f"⚠️ {principal.error.mensaje}")
+
+    for archivo in (ARCHIVO_DEPARTAMENTOS, ARCHIVO_CIUDADES):
+        resultado = datos.preparar_almacen(datos.cargar_libro((directorio,), archivo))
+        if not resultado.ok:
+            print(f"⚠️ {resultado.error.mensaje}")
+            continue
+        almacen_indices = resultado.datos
+        for tipo in TIPOS:
+            tipo_encontrado = datos.resolver_hoja(tipo, almacen_indices.tipos)
+            if tipo_encontrado is None:
+                continue
+            ancho = almacen_indices.ancho(tipo_encontrado)
+            etiquetas = [etiqueta_periodo(p) for p in ancho.columns]
+            for area, fila in ancho.iterrows():
+                series[(archivo, tipo, area)] = pd.Series(fila.to_numpy(dtype=float), index=etiquetas, name=area)
+
+    return series
+
+
+# ------------------------------------------------
+# ⚙️ AJUSTE (se ejecuta en los procesos del pool)
+# ------------------------------------------------
+def _ajustar_serie(clave, valores, orden, h):
+    """Ajusta una serie y retorna su fila de resultados (dict plano)"""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    archivo, tipo, area = clave
+    try:
+        with warnings.catch_warnings():
+            # Avisos de convergencia: quedan en la columna 'convergio'
+            warnings.simplefilter("ignore")
+            res = ARIMA(valores, order=orden).fit()
+    except Exception as e:
+        return {"archivo": archivo, "tipo": tipo, "area": area, "estado": f"error: {e}"}
+    return _fila_resultado(clave, res, h)
+
+
+def _fila_resultado(clave, res, h):
+    """Fila plana con convergencia, AIC/BIC, coeficientes y pronóstico de un ajuste"""
+    archivo, tipo, area = clave
+    fila = {"archivo": archivo, "tipo": tipo, "area": area}
+    try:
+        fc = res.get_forecast(steps=h)
+        media = np.asarray(fc.predicted_mean, dtype=float)
+        conf = np.asarray(fc.conf_int(alpha=0.05), dtype=float)
+    except Exception as e:
+        fila["estado"] = f"error: {e}"
+        return fila
+
+    fila.update(estado="ok", convergio=bool(res.mle_retvals.get("converged", True)),
+                aic=float(res.aic), bic=float(res.bic))
+    for nombre, valor in zip(res.param_names, res.params):
+        fila[f"coef_{nombre}"] = float(valor)
+    for paso in range(h):
+        fila[f"pronostico_{paso + 1}"] = float(media[paso])
+        fila[f"inferior_{paso + 1}"] = float(conf[paso, 0])
+        fila[f"superior_{paso + 1}"] = float(conf[paso, 1])
+    return fila
+
+
+def _ajustar_trozo(tareas):
+    """Ajusta un trozo de series en el mismo proceso"""
+    return [_ajustar_serie(*tarea) for tarea in tareas]
+
+
+def _ajustar_rapido(tareas):
+    """ARMA(1,1) con el estimador en lote de arma11; las series con faltantes van a statsmodels"""
+    completas = [tarea for tarea in tareas if np.isfinite(tarea[1]).all()]
+    resultados = arma11.ajustar_lote([pd.Series(valores) for _, valores, _, _ in completas])
+    filas = [_fila_resultado(clave, res, h) for (clave, _, _, h), res in zip(completas, resultados)]
+    return filas + _ajustar_trozo([tarea for tarea in tareas if not np.isfinite(tarea[1]).all()])
+
+
+# ------------------------------------------------
+# 📦 LOTE
+# ------------------------------------------------
+def ajustar_lote(series, orden=ORDEN_ARMA, h=HORIZONTE, procesos=None, tamano_trozo=None, motor="statsmodels"):
+    """
+    Ajusta ARIMA(orden) y pronostica `h` pasos para cada serie
+
+    Args:
+        series: dict {(archivo, tipo, área): Series}
+        procesos: Procesos del pool (None = os.cpu_count(); 1 = en este proceso)
+        tamano_trozo: Series por envío al pool (None = unos 4 trozos por proceso)
+        motor: "statsmodels" o "rapido" (arma11, solo para el orden (1,0,1))
+
+    Returns:
+        DataFrame con una fila por serie: n, último periodo, estado,
+        convergencia, AIC/BIC, coeficientes (coef_*) y pronóstico con su
+        intervalo del 95 % (pronostico_k, inferior_k, superior_k)
+    """
+    filas_cortas, tareas, descripcion = [], [], {}
+    for clave, serie in series.items():
+        valores = serie.to_numpy(dtype=float)
+        n = int(np.isfinite(valores).sum())
+        descripcion[clave] = (n, str(serie.index[-1]) if len(serie) else "")
+        if n < MIN_OBSERVACIONES:
+            archivo, tipo, area = clave
+            filas_cortas.append({"archivo": archivo, "tipo": tipo, "area": area, "estado": "serie corta"})
+        else:
+            tareas.append((clave, valores, tuple(orden), h))
+
+    procesos = procesos or os.cpu_count() or 1
+    if motor == "rapido" and tuple(orden) == arma11.ORDEN:
+        filas = _ajustar_rapido(tareas)
+    elif procesos == 1 or len(tareas) < 2:
+        filas = _ajustar_trozo(tareas)
+    else:
+        tamano_trozo = tamano_trozo or max(1, math.ceil(len(tareas) / (procesos * 4)))
+        trozos = [tareas[i:i + tamano_trozo] for i in range(0, len(tareas), tamano_trozo)]
+        with ProcessPoolExecutor(max_workers=min(procesos, len(trozos))) as ejecutor:
+            filas = [fila for trozo in ejecutor.map(_ajustar_trozo, trozos) for fila in trozo]
+
+    # Mismo orden que `series`
+    por_clave = {(f["archivo"], f["tipo"], f["area"]): f for f in filas + filas_cortas}
+    tabla = pd.DataFrame([por_clave[clave] for clave in series])
+    if tabla.empty:
+        return tabla
+    tabla.insert(3, "n", [descripcion[clave][0] for clave in series])
+    tabla.insert(4, "ultimo_periodo", [descripcion[clave][1] for clave in series])
+    return tabla
+
+
+def clave_lote(series, orden=ORDEN_ARMA, h=HORIZONTE, motor="statsmodels"):
+    """Clave de la tabla: huella de cada serie, orden, horizonte, motor y versión de statsmodels"""
+    base = "|".join(f"{clave}:{huella_serie(serie)}" for clave, serie in series.items())
+    base += f"|{tuple(orden)}|{h}|{MIN_OBSERVACIONES}|{version('statsmodels')}"
+    if motor != "statsmodels":
+        base += f"|{motor}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+def _ruta_lote(clave):
+    extension = ".parquet" if PARQUET_DISPONIBLE else ".pkl"
+    return os.path.join(DIRECTORIO_LOTES, f"{clave}{extension}")
+
+
+def guardar_lote(tabla, clave):
+    """Guarda la tabla de resultados (Parquet, o pickle sin pyarrow); retorna la ruta"""
+    ruta = _ruta_lote(clave)
+    if PARQUET_DISPONIBLE:
+        escritura_atomica(ruta, lambda temporal: tabla.to_parquet(temporal, index=False))
+    else:
+        escritura_atomica(ruta, tabla.to_pickle)
+    return ruta
+
+
+def leer_lote(clave):
+    """Tabla guardada de la clave, o None si no existe o está corrupta"""
+    ruta = _ruta_lote(clave)
+    if not os.path.exists(ruta):
+        return None
+    try:
+        return pd.read_parquet(ruta) if PARQUET_DISPONIBLE else pd.read_pickle(ruta)
+    except Exception as e:
+        print(f"⚠️ Tabla de lote inválida ({clave}): {e}")
+        return None
+
+
+def resultados_lote(series, orden=ORDEN_ARMA, h=HORIZONTE, procesos=None, motor="statsmodels"):
+    """Tabla del lote desde el disco si los datos no cambiaron; si no, la ajusta y la guarda"""
+    clave = clave_lote(series, orden, h, motor)
+    tabla = leer_lote(clave)
+    if tabla is None:
+        tabla = ajustar_lote(series, orden, h, procesos, motor=motor)
+        try:
+            guardar_lote(tabla, clave)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar la tabla del lote: {e}")
+    return tabla
+
+
+# ------------------------------------------------
+# ⏱️ CLI: AJUSTE Y RENDIMIENTO
+# ------------------------------------------------
+def _cronometrar(series, orden, h, procesos, tamano_trozo=None, motor="statsmodels"):
+    inicio = time.perf_counter()
+    tabla = ajustar_lote(series, orden, h, procesos, tamano_trozo, motor)
+    segundos = time.perf_counter() - inicio
+    ajustes = int((tabla["estado"] == "ok").sum()) if not tabla.empty else 0
+    return tabla, segundos, ajustes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ajusta ARIMA a todas las series por área y mide el rendimiento")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--trozo", type=int, default=None, help="Series por envío al pool")
+    parser.add_argument("--horizonte", type=int, default=HORIZONTE, help="Pasos de pronóstico")
+    parser.add_argument("--sin-serial", action="store_true", help="No medir la ejecución en serie")
+    parser.add_argument("--motor", choices=MOTORES, default="statsmodels",
+                        help="Estimador de la tabla guardada; 'rapido' también se mide")
+    args = parser.parse_args(argv)
+
+    series = series_por_area(args.ruta)
+    if not series:
+        print("❌ No se encontraron series para ajustar")
+        return 1
+
+    procesos = args.procesos or os.cpu_count() or 1
+    cortas = sum(int(np.isfinite(s.to_numpy(dtype=float)).sum()) < MIN_OBSERVACIONES for s in series.values())
+    print(f"\n📈 {len(series)} series ({cortas} con menos de {MIN_OBSERVACIONES} datos, no se ajustan), "
+          f"ARIMA{ORDEN_ARMA}, horizonte {args.horizonte}")
+    if procesos == 1:
+        print("⚠️ Un solo núcleo disponible: el pool no puede ganar a la ejecución en serie")
+
+    # La importación de statsmodels no cuenta en ninguna medición (los
+    # procesos creados con fork la heredan del padre)
+    from statsmodels.tsa.arima.model import ARIMA  # noqa: F401
+
+    mediciones = []
+    if not args.sin_serial:
+        mediciones.append(("Serie (1 proceso)",) + _cronometrar(series, ORDEN_ARMA, args.horizonte, 1))
+    mediciones.append((f"Pool ({procesos} procesos)",) +
+                      _cronometrar(series, ORDEN_ARMA, args.horizonte, procesos, args.trozo))
+    if args.motor == "rapido":
+        mediciones.append(("Rápido (arma11, lote)",) +
+                          _cronometrar(series, ORDEN_ARMA, args.horizonte, 1, motor="rapido"))
+
+    for nombre, _, segundos, ajustes in mediciones:
+        ritmo = ajustes / segundos if segundos else float("nan")
+        print(f"   {nombre:<22} {ajustes:4d} ajustes en {segundos:7.2f} s → {ritmo:7.1f} ajustes/s")
+    if not args.sin_serial and len(mediciones) >= 2 and mediciones[1][2]:
+        print(f"   Aceleración del pool: {mediciones[0][2] / mediciones[1][2]:.2f}×")
+
+    tabla = mediciones[-1][1]
+    ruta = guardar_lote(tabla, clave_lote(series, ORDEN_ARMA, args.horizonte, args.motor))
+    print(f"💾 Tabla guardada: {ruta}")
+    errores = tabla[tabla["estado"].str.startswith("error")]
+    for _, fila in errores.iterrows():
+        print(f"⚠️ {fila['archivo']} / {fila['tipo']} / {fila['area']}: {fila['estado']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Almacén de DataFrames en memoria compartida para despliegues con varios workers.
+
+Cada hoja cargada se escribe una sola vez por máquina como archivo Arrow IPC
+dentro de un directorio en RAM (/dev/shm). Los demás procesos la abren con
+memory-map: las columnas numéricas sin nulos quedan como vistas NumPy sobre
+las mismas páginas físicas, de modo que la memoria no crece con el número de
+workers y el parseo del Excel se paga una sola vez por host.
+
+Es opcional: se activa con VIVIENDA_MEMORIA_COMPARTIDA=1 y requiere pyarrow.
+"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin candado entre procesos
+    fcntl = None
+
+from cache_columnar import clave_cache, escritura_atomica
+
+
+def _directorio_por_defecto():
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "vivienda_dashboard")
+
+
+DIRECTORIO_SEGMENTOS = os.environ.get("VIVIENDA_SHM_DIR", _directorio_por_defecto())
+
+
+def activa():
+    """True si el backend está habilitado por entorno y pyarrow está disponible"""
+    return pa is not None and os.environ.get("VIVIENDA_MEMORIA_COMPARTIDA", "0") == "1"
+
+
+# ------------------------------------------------
+# 🔑 NOMBRES DE SEGMENTOS
+# ------------------------------------------------
+def _prefijo(ruta_abs):
+    """Identifica el libro sin importar su versión (para borrar segmentos viejos)"""
+    return hashlib.sha1(os.path.abspath(ruta_abs).encode("utf-8")).hexdigest()[:16]
+
+
+def _ruta_manifiesto(ruta_abs):
+    return os.path.join(DIRECTORIO_SEGMENTOS, f"{_prefijo(ruta_abs)}-{clave_cache(ruta_abs, '__libro__')}.json")
+
+
+def _ruta_segmento(ruta_abs, hoja, extension):
+    return os.path.join(DIRECTORIO_SEGMENTOS, f"{_prefijo(ruta_abs)}-{clave_cache(ruta_abs, hoja)}.{extension}")
+
+
+@contextlib.contextmanager
+def _candado(ruta_abs):
+    """Candado exclusivo por libro para que un solo worker lo parsee"""
+    os.makedirs(DIRECTORIO_SEGMENTOS, exist_ok=True)
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(DIRECTORIO_SEGMENTOS, f"{_prefijo(ruta_abs)}.lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ------------------------------------------------
+# 📤 PUBLICAR
+# ------------------------------------------------
+def _a_tabla_arrow(df):
+    """
+    Convierte un DataFrame en tabla Arrow conservando NaN como NaN (no como nulo)
+    para que las columnas numéricas se puedan leer luego sin copiar
+    """
+    columnas = {}
+    for i, col in enumerate(df.columns):
+        serie = df.iloc[:, i]
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_extension_array_dtype(serie):
+            columnas[str(i)] = pa.array(serie.to_numpy(), from_pandas=False)
+        else:
+            columnas[str(i)] = pa.array(serie.to_numpy(dtype=object), from_pandas=True)
+    tabla = pa.table(columnas)
+    nombres = [c if isinstance(c, (str, int, float)) else str(c) for c in df.columns]
+    return tabla.replace_schema_metadata({"columnas": json.dumps(nombres, ensure_ascii=False)})
+
+
+def _borrar_versiones_anteriores(ruta_abs, vigentes):
+    """Elimina segmentos de versiones previas del mismo libro (los mmap abiertos siguen válidos)"""
+    prefijo = _prefijo(ruta_abs) + "-"
+    for nombre in os.listdir(DIRECTORIO_SEGMENTOS):
+        ruta = os.path.join(DIRECTORIO_SEGMENTOS, nombre)
+        if nombre.startswith(prefijo) and ruta not in vigentes and not nombre.endswith(".tmp"):
+            with contextlib.suppress(OSError):
+                os.remove(ruta)
+
+
+def publicar_libro(ruta_abs, libro):
+    """Escribe todas las hojas de un libro en el directorio compartido"""
+    os.makedirs(DIRECTORIO_SEGMENTOS, exist_ok=True)
+    hojas = []
+    vigentes = set()
+
+    for hoja, df in libro.items():
+        try:
+            tabla = _a_tabla_arrow(df)
+            ruta = _ruta_segmento(ruta_abs, hoja, "arrow")
+
+            def escribir(temporal, tabla=tabla):
+                with pa.OSFile(temporal, "wb") as sink, pa.ipc.new_file(sink, tabla.schema) as writer:
+                    writer.write_table(tabla)
+
+            formato = "arrow"
+        except (TypeError, ValueError, pa.ArrowException):
+            # Columnas con tipos mezclados: se comparte el pickle (se parsea una vez, pero se copia)
+            ruta = _ruta_segmento(ruta_abs, hoja, "pkl")
+
+            def escribir(temporal, df=df):
+                df.to_pickle(temporal)
+
+            formato = "pickle"
+
+        escritura_atomica(ruta, escribir)
+        vigentes.add(ruta)
+        hojas.append({"hoja": hoja, "formato": formato, "ruta": ruta})
+
+    manifiesto = _ruta_manifiesto(ruta_abs)
+
+    def escribir_manifiesto(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump({"origen": os.path.abspath(ruta_abs), "hojas": hojas}, f, ensure_ascii=False)
+
+    escritura_atomica(manifiesto, escribir_manifiesto)
+    vigentes.add(manifiesto)
+    _borrar_versiones_anteriores(ruta_abs, vigentes)
+
+
+# ------------------------------------------------
+# 📎 ADJUNTAR
+# ------------------------------------------------
+def _leer_segmento_arrow(ruta):
+    """Abre un segmento con memory-map y lo convierte a pandas sin copiar lo numérico"""
+    with pa.memory_map(ruta, "r") as fuente:
+        tabla = pa.ipc.open_file(fuente).read_all()
+    nombres = json.loads(tabla.schema.metadata[b"columnas"].decode("utf-8"))
+    df = tabla.to_pandas(split_blocks=True, zero_copy_only=False)
+    df.columns = nombres
+    return df
+
+
+def adjuntar_libro(ruta_abs):
+    """
+    Abre el libro publicado para la versión actual del archivo
+
+    Returns:
+        dict {hoja: DataFrame} o None si aún no se ha publicado
+    """
+    manifiesto = _ruta_manifiesto(ruta_abs)
+    if not os.path.exists(manifiesto):
+        return None
+    try:
+        with open(manifiesto, encoding="utf-8") as f:
+            hojas = json.load(f)["hojas"]
+        libro = {}
+        for entrada in hojas:
+            if entrada["formato"] == "arrow":
+                libro[entrada["hoja"]] = _leer_segmento_arrow(entrada["ruta"])
+            else:
+                libro[entrada["hoja"]] = pd.read_pickle(entrada["ruta"])
+        return libro
+    except (OSError, ValueError, KeyError, pa.ArrowException) as e:
+        print(f"⚠️ Segmento compartido inválido para {ruta_abs}: {e}")
+        return None
+
+
+def libro_compartido(ruta_abs, cargar):
+    """
+    Retorna el libro desde memoria compartida, cargándolo y publicándolo si hace falta
+
+    Args:
+        ruta_abs: Ruta absoluta del Excel
+        cargar: Función ruta_abs -> dict {hoja: DataFrame} para el primer worker
+    """
+    libro = adjuntar_libro(ruta_abs)
+    if libro is not None:
+        return libro
+
+    with _candado(ruta_abs):
+        # Otro worker pudo publicarlo mientras esperábamos el candado
+        libro = adjuntar_libro(ruta_abs)
+        if libro is not None:
+            return libro
+
+        libro = cargar(ruta_abs)
+        try:
+            publicar_libro(ruta_abs, libro)
+        except OSError as e:
+            print(f"⚠️ No se pudo publicar {ruta_abs} en memoria compartida: {e}")
+            return libro
+
+    return adjuntar_libro(ruta_abs) or libro
+
@@ -0,0 +1,151 @@
+"""
+Registro de modelos ARIMA ajustados.
+
+Cada ajuste se identifica por la huella de la serie (valores e índice), el
+orden del modelo y la ventana de entrenamiento. El resultado se guarda en
+memoria y como pickle en DIRECTORIO_MODELOS, así un mismo modelo se ajusta
+una sola vez por versión de los datos aunque Streamlit re-ejecute el script
+en cada interacción o arranque un worker nuevo.
+
+statsmodels y scikit-learn se importan solo al ajustar o validar, así las
+vistas que solo usan las huellas no pagan su tiempo de importación.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from importlib.metadata import version
+
+import numpy as np
+import pandas as pd
+
+from cache_columnar import DIRECTORIO_CACHE, escritura_atomica
+
+DIRECTORIO_MODELOS = os.path.join(DIRECTORIO_CACHE, "modelos")
+
+# Orden del modelo que presenta el dashboard
+ORDEN_ARMA = (1, 0, 1)
+
+
+# ------------------------------------------------
+# 🔑 CLAVES
+# ------------------------------------------------
+def huella_serie(serie):
+    """Hash estable de los valores y el índice de una serie"""
+    valores = pd.util.hash_pandas_object(serie, index=True).to_numpy()
+    return hashlib.sha1(valores.tobytes()).hexdigest()
+
+
+def clave_modelo(serie, orden, n_train=None):
+    """Clave del ajuste: serie, orden, ventana de entrenamiento y versión de statsmodels"""
+    n_train = len(serie) if n_train is None else n_train
+    base = f"{huella_serie(serie)}|{tuple(orden)}|{n_train}|{version('statsmodels')}"
+    return hashlib.sha1(base.encode("utf-8")).hexdigest()
+
+
+# ------------------------------------------------
+# 📦 REGISTRO
+# ------------------------------------------------
+class RegistroModelos:
+    """
+    Ajustes ARIMA compartidos por todas las sesiones de un proceso
+
+    Busca primero en memoria, luego en disco, y solo ajusta si no encuentra
+    el modelo. Los resultados son compartidos: no deben modificarse.
+    """
+
+    def __init__(self, directorio=DIRECTORIO_MODELOS):
+        self.directorio = directorio
+        self._modelos = {}
+        self._lock = threading.Lock()
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pkl")
+
+    def _leer(self, clave):
+        ruta = self._ruta(clave)
+        if not os.path.exists(ruta):
+            return None
+        try:
+            with open(ruta, "rb") as f:
+                return pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ Modelo guardado inválido ({clave}): {e}")
+            return None
+
+    def _guardar(self, clave, resultado):
+        def escribir(temporal):
+            with open(temporal, "wb") as f:
+                pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        try:
+            escritura_atomica(self._ruta(clave), escribir)
+        except Exception as e:
+            print(f"⚠️ No se pudo guardar el modelo ({clave}): {e}")
+
+    def obtener(self, serie, orden=ORDEN_ARMA, n_train=None):
+        """
+        Retorna el ajuste ARIMA de la serie, ajustándolo solo la primera vez
+
+        Args:
+            serie: Serie completa (pandas Series)
+            orden: Orden (p, d, q) del modelo
+            n_train: Número de observaciones iniciales usadas para ajustar
+                (None = toda la serie)
+
+        Returns:
+            ARIMAResults del ajuste
+        """
+        clave = clave_modelo(serie, orden, n_train)
+        with self._lock:
+            resultado = self._modelos.get(clave)
+            if resultado is not None:
+                return resultado
+
+            resultado = self._leer(clave)
+            if resultado is None:
+                from statsmodels.tsa.arima.model import ARIMA
+
+                datos_ajuste = serie if n_train is None else serie.iloc[:n_train]
+                resultado = ARIMA(datos_ajuste, order=orden).fit()
+                self._guardar(clave, resultado)
+
+            self._modelos[clave] = resultado
+            return resultado
+
+    def limpiar(self):
+        with self._lock:
+            self._modelos.clear()
+
+
+# ------------------------------------------------
+# 🔮 VALIDACIÓN FUERA DE MUESTRA
+# ------------------------------------------------
+def pronostico_validacion(registro, serie, h=4, orden=ORDEN_ARMA):
+    """
+    Ajusta el modelo sin las últimas `h` observaciones y las pronostica
+
+    Returns:
+        dict con listas (serializables) de train, test, pronóstico, banda de
+        confianza y las métricas RMSE/MAE
+    """
+    from sklearn.metrics import mean_absolute_error, mean_squared_error
+
+    train, test = serie[:-h], serie[-h:]
+    res = registro.obtener(serie, orden, n_train=len(train))
+
+    fc = res.get_forecast(steps=h)
+    pred = fc.predicted_mean
+    conf = fc.conf_int()
+
+    return {
+        "train_x": train.index.tolist(),
+        "train": train.astype(float).tolist(),
+        "test_x": test.index.tolist(),
+        "test": test.astype(float).tolist(),
+        "pred": pred.astype(float).tolist(),
+        "inf": conf.iloc[:, 0].astype(float).tolist(),
+        "sup": conf.iloc[:, 1].astype(float).tolist(),
+        "rmse": float(np.sqrt(mean_squared_error(test, pred))),
+        "mae": float(mean_absolute_error(test, pred)),
+    }
@@ -0,0 +1,256 @@
+"""
+Pronósticos precalculados de todas las series (próximo trimestre y siguientes).
+
+Un trabajo programado (cron) ajusta el ARMA(1,1) a cada serie de los libros
+(las nacionales del archivo principal y cada área de Departamentos y Obras)
+y guarda sus pronósticos con el intervalo del 95 % en una tabla larga y
+compacta, una fila por (archivo, tipo, área, paso), ordenada por esas
+claves. El dashboard solo la lee: no ajusta nada al servir un pronóstico.
+
+Junto a la tabla se guardan sus metadatos, entre ellos la versión
+(mtime_ns, tamaño) de cada archivo fuente al momento de leerlo; si un libro
+cambió después, el dashboard marca los pronósticos como desactualizados.
+
+Uso (por ejemplo, cada hora desde cron):
+    python pronosticos.py
+    python pronosticos.py --ruta Dashboard_github --horizonte 4
+    python pronosticos.py --si-cambio   # no hace nada si ya están al día
+
+    0 * * * * cd /ruta/al/dashboard && python pronosticos.py --si-cambio
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import configuracion
+from cache_columnar import DIRECTORIO_CACHE, PARQUET_DISPONIBLE, escritura_atomica
+
+DIRECTORIO_PRONOSTICOS = os.path.join(DIRECTORIO_CACHE, "pronosticos")
+ARCHIVO_METADATOS = "pronosticos.json"
+HORIZONTE = 4
+NIVEL = 95
+CLAVES = ("archivo", "tipo", "area", "paso")
+COLUMNAS_VALORES = ["periodo", "pronostico", "inferior", "superior", "n", "estado"]
+
+
+@dataclass(frozen=True)
+class Pronosticos:
+    tabla: pd.DataFrame   # indexada por (archivo, tipo, área, paso)
+    metadatos: dict
+
+    def serie(self, archivo, tipo, area):
+        """Filas de una serie (una por paso), o un DataFrame vacío si no está"""
+        try:
+            return self.tabla.loc[(archivo, tipo, area)]
+        except KeyError:
+            return self.tabla.iloc[:0].droplevel(["archivo", "tipo", "area"])
+
+    def proximo(self):
+        """Pronóstico a un paso de cada serie (índice archivo, tipo, área)"""
+        return self.tabla.xs(1, level="paso")
+
+
+# ------------------------------------------------
+# ⚙️ GENERACIÓN
+# ------------------------------------------------
+def versiones_fuentes(ruta_base):
+    """{nombre: [mtime_ns, tamaño]} de cada archivo requerido (None si no existe)"""
+    versiones = {}
+    for nombre in configuracion.ARCHIVOS_REQUERIDOS:
+        try:
+            info = os.stat(os.path.join(ruta_base, nombre))
+            versiones[nombre] = [info.st_mtime_ns, info.st_size]
+        except OSError:
+            versiones[nombre] = None
+    return versiones
+
+
+def tabla_larga(lote, horizonte):
+    """
+    Tabla de lote_arima (una fila por serie) → una fila por serie y paso
+
+    Las series sin ajuste (cortas o con error) quedan con pronóstico NaN y su estado.
+    """
+    from abanico import periodos_siguientes
+
+    if lote.empty:
+        return pd.DataFrame(columns=list(CLAVES) + COLUMNAS_VALORES)
+
+    n_series = len(lote)
+    pasos = np.tile(np.arange(1, horizonte + 1, dtype=np.int8), n_series)
+
+    def repetir(columna):
+        return np.repeat(lote[columna].to_numpy(), horizonte)
+
+    def valores(prefijo):
+        columnas = [f"{prefijo}_{paso}" for paso in range(1, horizonte + 1)]
+        if not set(columnas) <= set(lote.columns):
+            return np.full(n_series * horizonte, np.nan)
+        return lote[columnas].to_numpy(dtype=float).ravel()
+
+    periodos = [etiqueta for ultimo in lote["ultimo_periodo"] for etiqueta in periodos_siguientes(ultimo, horizonte)]
+    tabla = pd.DataFrame({
+        "archivo": pd.Categorical(repetir("archivo")),
+        "tipo": pd.Categorical(repetir("tipo")),
+        "area": pd.Categorical(repetir("area")),
+        "paso": pasos,
+        "periodo": pd.Categorical(periodos),
+        "pronostico": valores("pronostico"),
+        "inferior": valores("inferior"),
+        "superior": valores("superior"),
+        "n": np.repeat(lote["n"].to_numpy(dtype=np.int32), horizonte),
+        "estado": pd.Categorical(repetir("estado")),
+    })
+    return tabla.sort_values(list(CLAVES), ignore_index=True)
+
+
+def generar(ruta_base, horizonte=HORIZONTE, motor="rapido"):
+    """
+    Ajusta y pronostica todas las series de los libros en `ruta_base`
+
+    Returns:
+        (tabla larga, metadatos)
+    """
+    import lote_arima
+    from modelos import ORDEN_ARMA
+
+    # Versiones leídas antes que los datos: si un libro cambia durante el ajuste, queda como desactualizado
+    fuentes = versiones_fuentes(ruta_base)
+    inicio = time.perf_counter()
+    series = lote_arima.series_por_area(ruta_base)
+    # Sin series (directorio inexistente o sin libros) no hay nada que ajustar; si los datos no
+    # cambiaron desde el último lote guardado (este trabajo o lote_arima.py), se lee del disco
+    lote = lote_arima.resultados_lote(series, ORDEN_ARMA, horizonte, motor=motor) if series else pd.DataFrame()
+    tabla = tabla_larga(lote, horizonte)
+
+    metadatos = {
+        "generado": datetime.now().isoformat(timespec="seconds"),
+        "ruta_base": os.path.abspath(ruta_base),
+        "fuentes": fuentes,
+        "orden": list(ORDEN_ARMA),
+        "motor": motor,
+        "horizonte": horizonte,
+        "nivel": NIVEL,
+        "minimo": lote_arima.MIN_OBSERVACIONES,
+        "series": len(lote),
+        "ajustadas": int((lote["estado"] == "ok").sum()) if len(lote) else 0,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    return tabla, metadatos
+
+
+# ------------------------------------------------
+# 💾 ARCHIVO
+# ------------------------------------------------
+def _ruta_tabla(directorio):
+    return os.path.join(directorio, "pronosticos.parquet" if PARQUET_DISPONIBLE else "pronosticos.pkl")
+
+
+def guardar(tabla, metadatos, directorio=DIRECTORIO_PRONOSTICOS):
+    """Escribe la tabla y luego los metadatos (los lectores se guían por estos últimos)"""
+    if PARQUET_DISPONIBLE:
+        escritura_atomica(_ruta_tabla(directorio), lambda ruta: tabla.to_parquet(ruta, index=False))
+    else:
+        escritura_atomica(_ruta_tabla(directorio), tabla.to_pickle)
+
+    def escribir_metadatos(ruta):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(metadatos, f, ensure_ascii=False, indent=2)
+
+    escritura_atomica(os.path.join(directorio, ARCHIVO_METADATOS), escribir_metadatos)
+
+
+def version_guardada(directorio=DIRECTORIO_PRONOSTICOS):
+    """mtime_ns del archivo de metadatos (sirve de clave de caché), o None si no hay pronósticos"""
+    try:
+        return os.stat(os.path.join(directorio, ARCHIVO_METADATOS)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def leer_metadatos(directorio=DIRECTORIO_PRONOSTICOS):
+    try:
+        with open(os.path.join(directorio, ARCHIVO_METADATOS), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def leer(directorio=DIRECTORIO_PRONOSTICOS):
+    """Pronosticos guardados, o None si no existen o están corruptos"""
+    metadatos = leer_metadatos(directorio)
+    if metadatos is None:
+        return None
+    ruta = _ruta_tabla(directorio)
+    try:
+        tabla = pd.read_parquet(ruta) if PARQUET_DISPONIBLE else pd.read_pickle(ruta)
+    except Exception as e:
+        print(f"⚠️ Pronósticos guardados inválidos: {e}")
+        return None
+    return Pronosticos(tabla=tabla.set_index(list(CLAVES)).sort_index(), metadatos=metadatos)
+
+
+def desactualizados(metadatos, ruta_base, versiones):
+    """
+    Archivos fuente que cambiaron después de generar los pronósticos
+
+    Args:
+        versiones: {nombre: (mtime_ns, tamaño) o None} actuales de los archivos requeridos
+
+    Returns:
+        lista de nombres; vacía si los pronósticos están al día
+    """
+    if os.path.abspath(ruta_base) != metadatos.get("ruta_base"):
+        return list(configuracion.ARCHIVOS_REQUERIDOS)
+    guardadas = metadatos.get("fuentes", {})
+    return [
+        nombre for nombre in configuracion.ARCHIVOS_REQUERIDOS
+        if _como_tupla(guardadas.get(nombre)) != _como_tupla(versiones.get(nombre))
+    ]
+
+
+def _como_tupla(version_fuente):
+    return tuple(version_fuente) if version_fuente else None
+
+
+# ------------------------------------------------
+# ⏱️ CLI (apto para cron)
+# ------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcula los pronósticos de todas las series")
+    parser.add_argument("--ruta", default=None, help="Directorio con los archivos .xlsx (por defecto, el del dashboard)")
+    parser.add_argument("--horizonte", type=int, default=HORIZONTE, help="Trimestres a pronosticar")
+    parser.add_argument("--motor", choices=("statsmodels", "rapido"), default="rapido", help="Estimador del ARMA(1,1)")
+    parser.add_argument("--directorio", default=DIRECTORIO_PRONOSTICOS, help="Dónde guardar los pronósticos")
+    parser.add_argument("--si-cambio", action="store_true",
+                        help="Solo regenerar si algún archivo fuente cambió desde la última vez")
+    args = parser.parse_args(argv)
+
+    ruta_base = args.ruta or configuracion.resolver_configuracion().ruta_base
+
+    if args.si_cambio:
+        metadatos = leer_metadatos(args.directorio)
+        if (metadatos is not None and metadatos.get("horizonte") == args.horizonte
+                and not desactualizados(metadatos, ruta_base, versiones_fuentes(ruta_base))):
+            print(f"✅ Pronósticos al día (generados {metadatos['generado']}); nada que hacer")
+            return 0
+
+    tabla, metadatos = generar(ruta_base, args.horizonte, args.motor)
+    if not metadatos["series"]:
+        print(f"❌ No se encontraron series en {ruta_base}")
+        return 1
+    guardar(tabla, metadatos, args.directorio)
+    print(f"🔭 {metadatos['ajustadas']} de {metadatos['series']} series pronosticadas a {args.horizonte} pasos "
+          f"en {metadatos['segundos']:.2f} s ({args.motor}) → {_ruta_tabla(args.directorio)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Pre-calentamiento en segundo plano tras un cambio en los Excel.
+
+Cuando el vigilante de configuracion.py detecta archivos nuevos o
+modificados, el Precalentador vuelve a leer esos libros (lo que llena la
+caché columnar y, si está activa, la memoria compartida) y, si cambió el
+archivo principal, ajusta los modelos, genera los paquetes de diagnósticos
+y de análisis estacional y el backtest con origen móvil.
+Así el primer usuario después de una actualización de datos no paga el
+parseo del xlsx ni el ajuste del modelo.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import backtest
+import datos
+import estacional
+import ipvn
+import modelos
+
+# Series del archivo principal que presenta la vista "Total y Modelo"
+SERIES_MODELADAS = ("Total",)
+HORIZONTE_VALIDACION = 4
+
+
+class Precalentador:
+    """Ejecuta los pre-calentamientos de a uno, en un hilo propio"""
+
+    def __init__(self, registro, archivo_principal):
+        self.registro = registro
+        self.archivo_principal = archivo_principal
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="precalentador")
+        self._lock = threading.Lock()
+        self._pendiente = None
+
+    def programar(self, ruta_base, archivos):
+        """Encola el pre-calentamiento de los archivos cambiados"""
+        with self._lock:
+            self._pendiente = self._ejecutor.submit(self._precalentar, ruta_base, tuple(archivos))
+            return self._pendiente
+
+    def esperar(self, timeout=None):
+        """Bloquea hasta que termine el último pre-calentamiento programado"""
+        with self._lock:
+            pendiente = self._pendiente
+        if pendiente is not None:
+            pendiente.result(timeout)
+
+    def _precalentar(self, ruta_base, archivos):
+        for archivo in archivos:
+            if archivo == ipvn.ARCHIVO_IPVN:
+                resultado = datos.cargar_ipvn((ruta_base,))
+            else:
+                resultado = datos.cargar_libro((ruta_base,), archivo)
+            if not resultado.ok:
+                print(f"⚠️ Pre-calentamiento de {archivo}: {resultado.error.mensaje}")
+                continue
+            print(f"🔥 Pre-calentado: {archivo} ({len(resultado.datos)} hojas)")
+
+            if archivo == self.archivo_principal:
+                self._precalentar_modelos(datos.preparar_datos_principal(resultado))
+
+    def _precalentar_modelos(self, resultado):
+        import diagnosticos
+
+        if not resultado.ok:
+            return
+        for columna in SERIES_MODELADAS:
+            if columna not in resultado.datos.columns:
+                continue
+            serie = resultado.datos[columna]
+            try:
+                diagnosticos.obtener_diagnosticos(
+                    serie, lambda: self.registro.obtener(serie, modelos.ORDEN_ARMA)
+                )
+                modelos.pronostico_validacion(self.registro, serie, HORIZONTE_VALIDACION, modelos.ORDEN_ARMA)
+                estacional.obtener_estacional(serie)
+                print(f"🔥 Modelo y diagnósticos pre-calculados: {columna}")
+            except Exception as e:
+                print(f"⚠️ No se pudo pre-calcular el modelo de {columna}: {e}")
+
+        for columna in backtest.SERIES_BACKTEST:
+            if columna not in resultado.datos.columns:
+                continue
+            try:
+                backtest.obtener_backtest(resultado.datos[columna], modelos.ORDEN_ARMA)
+                print(f"🔥 Backtest pre-calculado: {columna}")
+            except Exception as e:
+                print(f"⚠️ No se pudo pre-calcular el backtest de {columna}: {e}")
@@ -0,0 +1,403 @@
+"""
+Selección automática del orden (p,d,q)(P,D,Q,4) por AIC o BIC.
+
+Las diferencias (d, D) se eligen antes de buscar, como en auto.arima
+(Hyndman y Khandakar): D = 1 si la fuerza estacional de la STL supera
+UMBRAL_FUERZA_ESTACIONAL y luego d mientras KPSS rechace la estacionariedad.
+Cada diferencia cambia la muestra sobre la que se calcula la verosimilitud,
+así que el AIC/BIC solo se compara entre candidatos con las mismas (d, D).
+
+Con (d, D) fijas, la rejilla de p, q, P, Q se recorre por olas, de los
+modelos más simples a los más complejos: la primera ola es el modelo sin
+términos ARMA, y cada candidato ajustado propone como
+siguiente ola sus "hijos" (un término AR, MA, AR estacional o MA estacional
+más). Un candidato que no mejora el criterio de su mejor padre queda
+dominado y no se expande: sus hijos solo se ajustan si otro padre los
+propone. Los candidatos de cada ola se ajustan en paralelo
+(ProcessPoolExecutor) y cada uno arranca desde los parámetros de su mejor
+padre, con cero en el término nuevo.
+
+Cada candidato ajustado se guarda en DIRECTORIO_CANDIDATOS por huella de la
+serie: repetir la búsqueda con los mismos datos no ajusta nada. Además se
+guardan, por nombre de serie, los parámetros de la última versión: cuando
+llega un trimestre nuevo la búsqueda empieza por los candidatos que
+sobrevivieron la vez anterior (todos en la primera ola) y cada uno arranca
+desde sus propios parámetros previos, así el optimizador converge en pocas
+iteraciones.
+
+Uso:
+    python seleccion_orden.py --ruta Dashboard_github --serie Total --criterio aic
+    python seleccion_orden.py --recortar 1   # simula la versión sin el último trimestre
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+import configuracion
+import datos
+from cache_columnar import DIRECTORIO_CACHE, escritura_atomica
+from modelos import ORDEN_ARMA, huella_serie
+
+DIRECTORIO_CANDIDATOS = os.path.join(DIRECTORIO_CACHE, "candidatos")
+
+PERIODO_ESTACIONAL = 4
+# Límites (inclusive) de cada componente de (p, d, q, P, D, Q)
+REJILLA = {"p": 2, "d": 1, "q": 2, "P": 1, "D": 1, "Q": 1}
+CRITERIOS = ("aic", "bic")
+# Mejora mínima del criterio para que un candidato no quede dominado por su padre
+MARGEN_PODA = 0.0
+# D = 1 si la fuerza estacional (STL) supera este umbral (el de nsdiffs en el paquete forecast de R)
+UMBRAL_FUERZA_ESTACIONAL = 0.64
+# Nivel de la prueba KPSS para cada diferencia regular
+ALFA_KPSS = 0.05
+
+# Posiciones de (p, d, q, P, D, Q) que agregan términos ARMA (las diferencias no)
+_TERMINOS = (0, 2, 3, 5)
+
+
+# ------------------------------------------------
+# 🔑 CANDIDATOS
+# ------------------------------------------------
+def texto_candidato(candidato):
+    """'(1,0,1)(0,0,0,4)' a partir de (p, d, q, P, D, Q)"""
+    p, d, q, P, D, Q = candidato
+    return f"({p},{d},{q})({P},{D},{Q},{PERIODO_ESTACIONAL})"
+
+
+def _clave(candidato):
+    return ",".join(str(c) for c in candidato)
+
+
+def _de_clave(clave):
+    return tuple(int(c) for c in clave.split(","))
+
+
+def candidatos_rejilla(rejilla=REJILLA):
+    """Todos los candidatos de la rejilla, como tuplas (p, d, q, P, D, Q)"""
+    return list(product(*(range(rejilla[k] + 1) for k in ("p", "d", "q", "P", "D", "Q"))))
+
+
+def _padres(candidato):
+    """Candidatos con un término ARMA menos (mismas diferencias)"""
+    for i in _TERMINOS:
+        if candidato[i] > 0:
+            yield candidato[:i] + (candidato[i] - 1,) + candidato[i + 1:]
+
+
+def _hijos(candidato, rejilla):
+    """Candidatos con un término ARMA más, dentro de la rejilla"""
+    limites = tuple(rejilla[k] for k in ("p", "d", "q", "P", "D", "Q"))
+    for i in _TERMINOS:
+        if candidato[i] < limites[i]:
+            yield candidato[:i] + (candidato[i] + 1,) + candidato[i + 1:]
+
+
+# ------------------------------------------------
+# 📐 DIFERENCIAS
+# ------------------------------------------------
+def elegir_diferencias(valores, rejilla=REJILLA):
+    """
+    Diferencias (d, D) por pruebas, antes de comparar candidatos por AIC/BIC
+
+    Returns:
+        ((d, D), fuerza estacional de la STL, p-valor KPSS de la serie ya diferenciada)
+    """
+    from statsmodels.tsa.stattools import kpss
+
+    from estacional import calcular_stl
+
+    valores = valores[np.isfinite(valores)]
+    fuerza = calcular_stl(valores)["fuerza_estacional"]
+    D = min(rejilla["D"], int(fuerza > UMBRAL_FUERZA_ESTACIONAL))
+    x = valores[PERIODO_ESTACIONAL:] - valores[:-PERIODO_ESTACIONAL] if D else valores
+
+    d = 0
+    with warnings.catch_warnings():
+        # KPSS interpola su p-valor en una tabla acotada a [0.01, 0.1] y avisa al salirse
+        warnings.simplefilter("ignore")
+        pvalue = float(kpss(x, regression="c", nlags="auto")[1])
+        while d < rejilla["d"] and pvalue < ALFA_KPSS:
+            d += 1
+            x = np.diff(x)
+            pvalue = float(kpss(x, regression="c", nlags="auto")[1])
+    return (d, D), fuerza, pvalue
+
+
+# ------------------------------------------------
+# 💾 CACHÉ DE CANDIDATOS
+# ------------------------------------------------
+def _ruta(nombre):
+    return os.path.join(DIRECTORIO_CANDIDATOS, f"{nombre}.json")
+
+
+def _leer_json(nombre):
+    ruta = _ruta(nombre)
+    if not os.path.exists(ruta):
+        return {}
+    try:
+        with open(ruta, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Caché de candidatos inválida ({nombre}): {e}")
+        return {}
+
+
+def _guardar_json(nombre, contenido):
+    def escribir(temporal):
+        with open(temporal, "w", encoding="utf-8") as f:
+            json.dump(contenido, f)
+
+    try:
+        escritura_atomica(_ruta(nombre), escribir)
+    except OSError as e:
+        print(f"⚠️ No se pudo guardar la caché de candidatos ({nombre}): {e}")
+
+
+def _nombre_arranques(serie):
+    """Archivo de parámetros previos por nombre de serie (sobrevive a los cambios de datos)"""
+    nombre = "".join(c if c.isalnum() else "_" for c in str(serie.name or "serie"))
+    return f"arranques_{nombre}"
+
+
+# ------------------------------------------------
+# ⚙️ AJUSTE DE UN CANDIDATO (se ejecuta en los procesos del pool)
+# ------------------------------------------------
+def _ajustar_candidato(valores, candidato, arranque):
+    """
+    Ajusta un candidato, arrancando de `arranque` ({parámetro: valor}) si se da
+
+    Returns:
+        dict con aic, bic, llf, params, convergio, iteraciones, o con 'error'
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    p, d, q, P, D, Q = candidato
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        try:
+            modelo = ARIMA(valores, order=(p, d, q), seasonal_order=(P, D, Q, PERIODO_ESTACIONAL))
+            inicio = None
+            if arranque and "sigma2" in arranque:
+                inicio = np.array([arranque.get(nombre, 0.0) for nombre in modelo.param_names])
+            try:
+                res = modelo.fit(start_params=inicio)
+            except (ValueError, np.linalg.LinAlgError):
+                if inicio is None:
+                    raise
+                # Arranque no estacionario o no invertible: se ajusta desde cero
+                res = modelo.fit()
+        except Exception as e:
+            return {"error": str(e)}
+
+    return {
+        "aic": float(res.aic),
+        "bic": float(res.bic),
+        "llf": float(res.llf),
+        "params": {nombre: float(valor) for nombre, valor in zip(res.param_names, res.params)},
+        "convergio": bool(res.mle_retvals.get("converged", True)),
+        "iteraciones": int(res.mle_retvals.get("iterations", 0) or 0),
+    }
+
+
+def _ajustar_tarea(tarea):
+    return _ajustar_candidato(*tarea)
+
+
+# ------------------------------------------------
+# 🔎 BÚSQUEDA
+# ------------------------------------------------
+@dataclass(frozen=True)
+class SeleccionOrden:
+    """Resultado de una búsqueda de orden"""
+    criterio: str
+    mejor: tuple            # (p, d, q, P, D, Q)
+    tabla: pd.DataFrame     # candidatos evaluados, del mejor al peor
+    diferencias: tuple      # (d, D) comunes a todos los candidatos
+    fuerza_estacional: float
+    kpss_pvalue: float      # de la serie con las diferencias elegidas
+    rejilla: int            # candidatos en la rejilla con esas diferencias
+    evaluados: int
+    podados: int            # candidatos de la rejilla que no hizo falta ajustar
+    aciertos: int           # candidatos leídos de la caché (misma versión de los datos)
+    ajustes: int            # candidatos ajustados en esta búsqueda
+    arranques_previos: int  # ajustes que arrancaron desde la versión anterior
+    segundos: float
+
+
+def seleccionar_orden(serie, criterio="aic", rejilla=REJILLA, procesos=None, margen=MARGEN_PODA,
+                      diferencias=None):
+    """
+    Busca el orden SARIMA con menor AIC/BIC para la serie
+
+    Args:
+        serie: pandas Series (su nombre identifica los parámetros previos)
+        criterio: 'aic' o 'bic'
+        rejilla: Límites de (p, d, q, P, D, Q)
+        diferencias: (d, D) fijas; None = elegidas con elegir_diferencias
+        procesos: Procesos del pool (None = os.cpu_count(); 1 = en este proceso).
+            El pool se crea con fork: desde un proceso con varios hilos (el
+            servidor de Streamlit) usar 1
+        margen: Mejora mínima sobre el mejor padre para seguir expandiendo
+
+    Returns:
+        SeleccionOrden
+    """
+    if criterio not in CRITERIOS:
+        raise ValueError(f"Criterio desconocido: {criterio!r} (use {CRITERIOS})")
+
+    inicio = time.perf_counter()
+    valores = serie.to_numpy(dtype=float)
+    huella = huella_serie(serie)
+    diferencias_probadas, fuerza, pvalue = elegir_diferencias(valores, rejilla)
+    d, D = diferencias = tuple(diferencias or diferencias_probadas)
+    todos = {c for c in candidatos_rejilla(rejilla) if (c[1], c[4]) == (d, D)}
+
+    guardados = _leer_json(huella)
+    previos = _leer_json(_nombre_arranques(serie))
+
+    evaluados, origen = {}, {}
+    aciertos = ajustes = arranques_previos = 0
+
+    def puntaje(candidato):
+        resultado = evaluados.get(candidato)
+        if resultado is None or "error" in resultado:
+            return np.inf
+        return resultado[criterio]
+
+    # Primera ola: el modelo sin términos ARMA y los que sobrevivieron la versión anterior
+    ola = {c for c in todos if not any(c[i] for i in _TERMINOS)}
+    ola |= {_de_clave(k) for k in previos} & todos
+
+    procesos = procesos or os.cpu_count() or 1
+    ejecutor = ProcessPoolExecutor(max_workers=procesos) if procesos > 1 else None
+    try:
+        while ola:
+            tareas, pendientes = [], []
+            for candidato in sorted(ola):
+                guardado = guardados.get(_clave(candidato))
+                if guardado is not None:
+                    evaluados[candidato] = guardado
+                    origen[candidato] = "caché"
+                    aciertos += 1
+                    continue
+                # Arranque: los parámetros propios de la versión anterior, o los del mejor padre
+                arranque = previos.get(_clave(candidato))
+                if arranque is not None:
+                    arranques_previos += 1
+                else:
+                    padres = [p for p in _padres(candidato) if np.isfinite(puntaje(p))]
+                    if padres:
+                        arranque = evaluados[min(padres, key=puntaje)]["params"]
+                tareas.append((valores, candidato, arranque))
+                pendientes.append(candidato)
+
+            if ejecutor is not None and len(tareas) > 1:
+                resultados = list(ejecutor.map(_ajustar_tarea, tareas))
+            else:
+                resultados = [_ajustar_tarea(t) for t in tareas]
+            for candidato, resultado in zip(pendientes, resultados):
+                evaluados[candidato] = resultado
+                origen[candidato] = "ajuste"
+                ajustes += 1
+
+            # Siguiente ola: hijos de los candidatos que mejoran a su mejor padre
+            siguiente = set()
+            for candidato in ola:
+                propio = puntaje(candidato)
+                padres = [puntaje(p) for p in _padres(candidato) if p in evaluados]
+                if not np.isfinite(propio) or (padres and propio > min(padres) - margen):
+                    continue
+                siguiente.update(h for h in _hijos(candidato, rejilla) if h not in evaluados)
+            ola = siguiente
+    finally:
+        if ejecutor is not None:
+            ejecutor.shutdown()
+
+    # Guardar todos los candidatos de esta versión y los parámetros para la próxima
+    # (los de otras diferencias se conservan por si las pruebas cambian de decisión)
+    guardados.update({_clave(c): r for c, r in evaluados.items()})
+    _guardar_json(huella, guardados)
+    arranques = {k: v for k, v in previos.items() if _de_clave(k) not in todos}
+    arranques.update({_clave(c): r["params"] for c, r in evaluados.items() if "error" not in r})
+    _guardar_json(_nombre_arranques(serie), arranques)
+
+    filas = [{
+        "Orden": texto_candidato(c),
+        "AIC": r.get("aic", np.nan),
+        "BIC": r.get("bic", np.nan),
+        "Convergió": r.get("convergio", False),
+        "Iteraciones": r.get("iteraciones", 0),
+        "Origen": origen[c],
+        "Error": r.get("error", ""),
+    } for c, r in evaluados.items()]
+    tabla = pd.DataFrame(filas).sort_values(criterio.upper(), na_position="last").reset_index(drop=True)
+    validos = [c for c in evaluados if np.isfinite(puntaje(c))]
+    if not validos:
+        raise ValueError("Ningún candidato pudo ajustarse")
+
+    return SeleccionOrden(
+        criterio=criterio,
+        mejor=min(validos, key=puntaje),
+        tabla=tabla,
+        diferencias=diferencias,
+        fuerza_estacional=fuerza,
+        kpss_pvalue=pvalue,
+        rejilla=len(todos),
+        evaluados=len(evaluados),
+        podados=len(todos) - len(evaluados),
+        aciertos=aciertos,
+        ajustes=ajustes,
+        arranques_previos=arranques_previos,
+        segundos=time.perf_counter() - inicio,
+    )
+
+
+# ------------------------------------------------
+# ⏱️ CLI
+# ------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Selección automática del orden SARIMA por AIC/BIC")
+    parser.add_argument("--ruta", default="Dashboard_github", help="Directorio con los archivos .xlsx")
+    parser.add_argument("--serie", default="Total", help="Columna del archivo principal")
+    parser.add_argument("--criterio", choices=CRITERIOS, default="aic")
+    parser.add_argument("--procesos", type=int, default=None, help="Procesos del pool (por defecto, todos los núcleos)")
+    parser.add_argument("--recortar", type=int, default=0, help="Quita los últimos N trimestres (versión anterior)")
+    args = parser.parse_args(argv)
+
+    archivo_principal = configuracion.ARCHIVOS_REQUERIDOS[0]
+    resultado = datos.preparar_datos_principal(datos.cargar_libro((args.ruta,), archivo_principal))
+    if not resultado.ok:
+        print(f"❌ {resultado.error.mensaje}")
+        return 1
+    if args.serie not in resultado.datos.columns:
+        print(f"❌ La columna '{args.serie}' no existe en {archivo_principal}")
+        return 1
+    serie = resultado.datos[args.serie]
+    if args.recortar:
+        serie = serie.iloc[:-args.recortar]
+
+    seleccion = seleccionar_orden(serie, args.criterio, procesos=args.procesos)
+    actual = texto_candidato(ORDEN_ARMA + (0, 0, 0))
+    print(f"\n🔎 {args.serie} ({len(serie)} trimestres), criterio {args.criterio.upper()}")
+    d, D = seleccion.diferencias
+    print(f"   Diferencias: d={d}, D={D} (fuerza estacional {seleccion.fuerza_estacional:.3f}, "
+          f"KPSS p={seleccion.kpss_pvalue:.3f})")
+    print(f"   Mejor orden: {texto_candidato(seleccion.mejor)} (modelo actual: {actual})")
+    print(f"   Evaluados {seleccion.evaluados} de {seleccion.rejilla} ({seleccion.podados} podados); "
+          f"{seleccion.aciertos} de la caché, {seleccion.ajustes} ajustes "
+          f"({seleccion.arranques_previos} desde la versión anterior) en {seleccion.segundos:.1f} s")
+    print(seleccion.tabla.head(10).to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
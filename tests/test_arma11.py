@@ -0,0 +1,102 @@
+"""
+El estimador rápido de arma11.py frente a statsmodels ARIMA(1,0,1).
+
+Se ajustan todos los prefijos crecientes (desde 20 datos) de las series
+nacionales del libro principal incluido en Dashboard_github, como en
+`python arma11.py`. pronosticos.py usa este estimador por defecto, así que
+cualquier cambio que lo aleje de statsmodels debe hacer fallar estas pruebas.
+"""
+import os
+import warnings
+
+import numpy as np
+import pytest
+
+import arma11
+import configuracion
+import datos
+
+RUTA_DATOS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Dashboard_github")
+MINIMO = 20
+
+# Mismo óptimo: |Δllf| por debajo de esto
+TOLERANCIA_LLF = 1e-4
+# Con el mismo óptimo, diferencia absoluta máxima de (const, ar.L1, ma.L1, sigma2); con θ cerca
+# de ±1 la verosimilitud es plana y los dos optimizadores se detienen hasta ~1.5e-3 entre sí
+TOLERANCIA_PARAMETROS = 5e-3
+# Con el mismo óptimo, diferencia absoluta máxima de la media y del intervalo del 95 % a 4 pasos
+TOLERANCIA_PRONOSTICO = 2e-3
+
+
+@pytest.fixture(scope="module")
+def ajustes():
+    """[(nombre, largo, serie, ResultadoARMA11, ARIMAResults)] de cada prefijo"""
+    from statsmodels.tsa.arima.model import ARIMA
+
+    resultado = datos.preparar_datos_principal(datos.cargar_libro((RUTA_DATOS,), configuracion.ARCHIVOS_REQUERIDOS[0]))
+    assert resultado.ok, resultado.error
+    df = resultado.datos
+    prefijos = [(columna, largo, df[columna].iloc[:largo])
+                for columna in ("Total", "Casas", "Apartamentos") for largo in range(MINIMO, len(df) + 1)]
+
+    rapidos = arma11.ajustar_lote([serie for _, _, serie in prefijos])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        referencia = [ARIMA(serie, order=arma11.ORDEN).fit() for _, _, serie in prefijos]
+    return [(columna, largo, serie, rapido, ref)
+            for (columna, largo, serie), rapido, ref in zip(prefijos, rapidos, referencia)]
+
+
+def _mismo_optimo(ajustes):
+    return [a for a in ajustes if abs(a[3].llf - a[4].llf) < TOLERANCIA_LLF]
+
+
+def test_nunca_queda_en_un_optimo_peor(ajustes):
+    peores = [(columna, largo, rapido.llf - ref.llf) for columna, largo, _, rapido, ref in ajustes
+              if rapido.llf < ref.llf - TOLERANCIA_LLF]
+    assert not peores
+
+
+def test_casi_todos_comparten_el_optimo(ajustes):
+    # Con los datos incluidos difieren 4 de 195 (ver test_optimos_distintos_son_maximos_de_statsmodels)
+    assert len(_mismo_optimo(ajustes)) >= 0.95 * len(ajustes)
+
+
+def test_parametros_con_el_mismo_optimo(ajustes):
+    for columna, largo, _, rapido, ref in _mismo_optimo(ajustes):
+        diferencia = np.abs(rapido.params.to_numpy() - np.asarray(ref.params))
+        assert diferencia.max() < TOLERANCIA_PARAMETROS, (columna, largo, diferencia)
+
+
+def test_pronostico_con_el_mismo_optimo(ajustes):
+    for columna, largo, _, rapido, ref in _mismo_optimo(ajustes):
+        propio, esperado = rapido.get_forecast(4), ref.get_forecast(4)
+        np.testing.assert_allclose(propio.predicted_mean.to_numpy(), esperado.predicted_mean.to_numpy(),
+                                   rtol=0, atol=TOLERANCIA_PRONOSTICO, err_msg=f"{columna} ({largo})")
+        np.testing.assert_allclose(propio.conf_int().to_numpy(), esperado.conf_int().to_numpy(),
+                                   rtol=0, atol=TOLERANCIA_PRONOSTICO, err_msg=f"{columna} ({largo})")
+
+
+def test_optimos_distintos_son_maximos_de_statsmodels(ajustes):
+    """
+    Donde los óptimos difieren, statsmodels quedó en otro máximo local: arrancado
+    desde los parámetros de arma11 llega a la misma verosimilitud y parámetros
+    """
+    from statsmodels.tsa.arima.model import ARIMA
+
+    for columna, largo, serie, rapido, ref in ajustes:
+        if abs(rapido.llf - ref.llf) < TOLERANCIA_LLF:
+            continue
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            desde_rapido = ARIMA(serie, order=arma11.ORDEN).fit(start_params=rapido.params.to_numpy())
+        assert abs(rapido.llf - desde_rapido.llf) < TOLERANCIA_LLF, (columna, largo)
+        diferencia = np.abs(rapido.params.to_numpy() - np.asarray(desde_rapido.params))
+        assert diferencia.max() < TOLERANCIA_PARAMETROS, (columna, largo, diferencia)
+
+
+def test_lote_igual_a_una_a_una(ajustes):
+    for _, _, serie, rapido, _ in ajustes[::10]:
+        individual = arma11.ajustar(serie)
+        assert individual.llf == pytest.approx(rapido.llf, abs=1e-10)
+        np.testing.assert_allclose(individual.params.to_numpy(), rapido.params.to_numpy(), rtol=0, atol=1e-8)